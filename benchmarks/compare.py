@@ -0,0 +1,67 @@
+"""
+Compara benchmarks/results.json com benchmarks/baseline.json.
+
+    python benchmarks/compare.py [--results R] [--baseline B] [--tolerance 0.25]
+
+Sai com código 1 se alguma mediana de latência (ou pico de memória) piorar
+mais que a tolerância relativa em relação ao baseline.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+
+
+def compare(results: dict, baseline: dict, tolerance: float):
+    rows, regressions = [], []
+    for name, cur in sorted(results["results"].items()):
+        base = baseline["results"].get(name)
+        if base is None:
+            rows.append((name, None, cur["median_ms"], None, "novo"))
+            continue
+        ratio = cur["median_ms"] / base["median_ms"] if base["median_ms"] else float("inf")
+        mem_ratio = (cur["peak_mem_mb"] / base["peak_mem_mb"]
+                     if base.get("peak_mem_mb") and "peak_mem_mb" in cur else 1.0)
+        status = "ok"
+        if ratio > 1 + tolerance:
+            status = "REGRESSÃO (tempo)"
+        elif mem_ratio > 1 + tolerance:
+            status = "REGRESSÃO (memória)"
+        elif ratio < 1 - tolerance:
+            status = "melhora"
+        if status.startswith("REGRESSÃO"):
+            regressions.append(name)
+        rows.append((name, base["median_ms"], cur["median_ms"], ratio, status))
+    return rows, regressions
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--results", default=str(BENCH_DIR / "results.json"))
+    ap.add_argument("--baseline", default=str(BENCH_DIR / "baseline.json"))
+    ap.add_argument("--tolerance", type=float, default=0.25)
+    args = ap.parse_args(argv)
+
+    results = json.loads(Path(args.results).read_text(encoding="utf-8"))
+    baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+    scales = (results["meta"].get("scale", "small"), baseline["meta"].get("scale", "small"))
+    if scales[0] != scales[1]:
+        print(f"Aviso: escalas diferentes (atual={scales[0]}, baseline={scales[1]}); comparação pouco útil.\n")
+    rows, regressions = compare(results, baseline, args.tolerance)
+
+    width = max(len(r[0]) for r in rows) if rows else 10
+    print(f"{'medição':<{width}}  {'baseline ms':>12}  {'atual ms':>10}  {'razão':>6}  status")
+    for name, base, cur, ratio, status in rows:
+        base_s = f"{base:12.1f}" if base is not None else f"{'—':>12}"
+        ratio_s = f"{ratio:6.2f}" if ratio is not None else f"{'—':>6}"
+        print(f"{name:<{width}}  {base_s}  {cur:10.1f}  {ratio_s}  {status}")
+    if regressions:
+        print(f"\n{len(regressions)} regressão(ões) acima de {args.tolerance:.0%}.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+"""
+Benchmarks headless dos apps com streamlit.testing.v1.AppTest.
+
+Os apps rodam contra uma base sintética local (gerada numa pasta temporária
+e apontada por VDEM_DATA_DIR), então não dependem da base licenciada.
+
+    python -m pytest benchmarks -q                         # grava benchmarks/results.json
+    python -m pytest benchmarks -q --bench-save-baseline   # grava também benchmarks/baseline.json
+    python -m pytest benchmarks -q --bench-scale full      # base na escala do V-Dem real
+    python benchmarks/compare.py                            # results.json × baseline.json
+    python benchmarks/loadtest.py                           # teste de carga (sessões simultâneas)
+
+Cada medição guarda a mediana/mín./máx. de latência (ms) de `--bench-repeats`
+execuções e o pico de memória alocada (tracemalloc, numa execução extra para
+não distorcer as latências).
+"""
+from __future__ import annotations
+
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(REPO_ROOT))  # como o `streamlit run`, que põe a pasta do script no sys.path
+
+_RESULTS: dict[str, dict] = {}
+
+
+def pytest_addoption(parser):
+    g = parser.getgroup("vdem-bench")
+    g.addoption("--bench-out", default=str(BENCH_DIR / "results.json"),
+                help="Arquivo JSON de saída dos resultados.")
+    g.addoption("--bench-repeats", type=int, default=5,
+                help="Repetições por medição (a mediana é o valor comparado).")
+    g.addoption("--bench-scale", choices=sorted(BENCH_SCALES), default="small",
+                help="Tamanho da base sintética (vdem_synth).")
+    g.addoption("--bench-save-baseline", action="store_true",
+                help="Também grava os resultados em benchmarks/baseline.json.")
+
+
+# ==========================
+# BASE SINTÉTICA
+# ==========================
+# "small": base do dia a dia (rápida); "full": escala do V-Dem real (~200 países ×
+# 235 anos × ~4.600 colunas com as companheiras _sd/_codelow/_codehigh/_ord/...).
+BENCH_SCALES = {
+    "small": dict(n_countries=60, companions=False),
+    "full": dict(n_countries=200, companions=True),
+}
+
+
+def write_bench_dataset(out_dir: Path, scale: str = "small", seed: int = 7) -> Path:
+    """Base no formato das bases do app (Parquet + CSVs), gerada por vdem_synth."""
+    import vdem_synth
+
+    vdem_synth.generate(out_dir, seed=seed, write_csv=True, **BENCH_SCALES[scale])
+    return out_dir
+
+
+@pytest.fixture(scope="session")
+def data_dir(request, tmp_path_factory):
+    scale = request.config.getoption("--bench-scale")
+    out = write_bench_dataset(tmp_path_factory.mktemp("vdem_bench"), scale)
+    old = {k: os.environ.get(k) for k in ("VDEM_DATA_DIR", "VDEM_METRICS_PORT")}
+    os.environ["VDEM_DATA_DIR"] = str(out)
+    os.environ["VDEM_METRICS_PORT"] = "0"  # benchmarks não precisam do /metrics
+    yield out
+    for k, v in old.items():
+        if v is None:
+            os.environ.pop(k, None)
+        else:
+            os.environ[k] = v
+
+
+# ==========================
+# APP + MEDIÇÃO
+# ==========================
+@pytest.fixture
+def app(data_dir):
+    """Fábrica de AppTest: app("vdem_dashboard_multipage.py", page="Mapa VDEM")."""
+    from streamlit.testing.v1 import AppTest
+
+    def _make(script: str, page: str | None = None):
+        at = AppTest.from_file(str(REPO_ROOT / script), default_timeout=300)
+        if page:
+            at.query_params["page"] = page
+        return at
+    return _make
+
+
+def widget(elements, label: str):
+    """Primeiro widget com esse rótulo (AppTest só indexa por posição/key)."""
+    for w in elements:
+        if w.label == label:
+            return w
+    raise LookupError(f"widget não encontrado: {label!r}")
+
+
+class Bench:
+    def __init__(self, repeats: int):
+        self.repeats = repeats
+
+    def measure(self, name: str, fn, repeats: int | None = None, setup=None):
+        """
+        Cronometra fn() `repeats` vezes (setup() roda antes de cada uma, fora do
+        cronômetro) e mede o pico de memória numa execução extra.
+        """
+        repeats = repeats or self.repeats
+        times = []
+        for _ in range(repeats):
+            if setup:
+                setup()
+            t = time.perf_counter()
+            at = fn()
+            times.append((time.perf_counter() - t) * 1000.0)
+            if at is not None:
+                assert not at.exception, at.exception
+
+        if setup:
+            setup()
+        tracemalloc.start()
+        try:
+            fn()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        _RESULTS[name] = {
+            "median_ms": statistics.median(times),
+            "min_ms": min(times),
+            "max_ms": max(times),
+            "runs": repeats,
+            "peak_mem_mb": peak / 2**20,
+        }
+        return _RESULTS[name]
+
+
+def record_result(name: str, result: dict):
+    """Grava uma medição feita fora do Bench.measure (ex.: teste de carga)."""
+    _RESULTS[name] = result
+
+
+@pytest.fixture
+def bench(request):
+    return Bench(request.config.getoption("--bench-repeats"))
+
+
+def clear_caches():
+    """Estado de 'cold start': sem st.cache_data de execuções anteriores."""
+    import streamlit as st
+    st.cache_data.clear()
+    st.cache_resource.clear()
+
+
+def pytest_sessionfinish(session, exitstatus):
+    if not _RESULTS:
+        return
+    payload = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "repeats": session.config.getoption("--bench-repeats"),
+            "scale": session.config.getoption("--bench-scale"),
+        },
+        "results": dict(sorted(_RESULTS.items())),
+    }
+    out = Path(session.config.getoption("--bench-out"))
+    out.write_text(json.dumps(payload, indent=2, ensure_ascii=False), encoding="utf-8")
+    if session.config.getoption("--bench-save-baseline"):
+        (BENCH_DIR / "baseline.json").write_text(json.dumps(payload, indent=2, ensure_ascii=False), encoding="utf-8")
@@ -0,0 +1,489 @@
+"""
+Teste de carga do app multipage: muitas sessões simultâneas contra um servidor
+Streamlit de verdade, falando o protocolo do navegador (websocket + protobuf).
+
+O harness sobe `streamlit run vdem_dashboard_multipage.py` num subprocesso (ou
+usa --url de um servidor já no ar), abre N sessões websocket em paralelo e
+cada uma repete um roteiro de interação realista (abrir a Série Histórica,
+escolher um país, adicionar "BRICS", trocar a variável, abrir o mapa, ligar e
+desligar a animação, trocar a agregação). O número de sessões sobe em
+degraus até estourar o SLO.
+
+    python benchmarks/loadtest.py                                # degraus 1,2,4,8,16
+    python benchmarks/loadtest.py --sessions 1,8,32 --loops 3 --think-ms 500
+    python benchmarks/loadtest.py --data-dir PASTA --out benchmarks/loadtest.json
+    python benchmarks/loadtest.py --url http://localhost:8501    # servidor já no ar
+
+Controles dentro de st.fragment (países a comparar, agregação/animação do
+mapa) mandam fragment_id como o frontend, rerodando só o fragmento;
+--no-fragments força o script inteiro. No fim sai a economia por controle.
+
+Relata, por degrau: p50/p95/p99 da latência de rerun (envio do rerun_script
+até o script_finished), throughput (reruns/s), taxa de erro e crescimento de
+memória (RSS do servidor) por sessão. O primeiro degrau em que o p95 passa de
+--slo-p95-ms (ou a taxa de erro passa de --max-error-rate) é onde o servidor
+"cai".
+
+Obs.: o AppTest não serve aqui — ele troca o Runtime global a cada run e não
+é seguro com várias sessões em threads paralelas.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+from urllib.parse import urlencode
+
+import numpy as np
+
+BENCH_DIR = Path(__file__).resolve().parent
+REPO_ROOT = BENCH_DIR.parent
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(BENCH_DIR))
+
+MULTIPAGE = "vdem_dashboard_multipage.py"
+WIDGET_TYPES = ("selectbox", "multiselect", "checkbox", "slider", "text_input")
+
+
+# ==========================
+# SESSÃO (cliente websocket)
+# ==========================
+class Session:
+    """
+    Uma aba do navegador: guarda os widgets do último rerun (por rótulo) e os
+    valores que o "usuário" mudou, e reenvia tudo a cada rerun como o frontend.
+    """
+
+    def __init__(self, base_url: str, page: str | None = None, use_fragments: bool = True):
+        self.use_fragments = use_fragments
+        self.ws_url = base_url.replace("http", "ws", 1).rstrip("/") + "/_stcore/stream"
+        self.query = {"page": page} if page else {}
+        self.widgets: dict[str, tuple] = {}     # rótulo → (tipo, proto do widget)
+        self.states: dict[str, object] = {}     # id → WidgetState definido pelo usuário
+        self.fragment_of: dict[str, str] = {}   # rótulo → fragment_id (widgets dentro de st.fragment)
+        self._pending: set[str] = set()         # fragmentos disparados desde o último rerun ("" = script todo)
+        self.exceptions: list[str] = []
+        self._cache: dict[str, object] = {}     # hash → ForwardMsg (mensagens por referência)
+        self.conn = None
+
+    async def connect(self):
+        from tornado.websocket import websocket_connect
+        self.conn = await websocket_connect(self.ws_url, max_message_size=512 * 2**20)
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    # ---- interação ----
+    def widget(self, label: str):
+        if label not in self.widgets:
+            raise LookupError(f"widget não encontrado: {label!r}")
+        return self.widgets[label]
+
+    def set_value(self, label: str, value):
+        """value: índice (selectbox), lista de índices (multiselect) ou bool (checkbox)."""
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        kind, proto = self.widget(label)
+        ws = WidgetState(id=proto.id)
+        if kind == "selectbox":
+            ws.int_value = int(value)
+        elif kind == "multiselect":
+            ws.int_array_value.data.extend(int(i) for i in value)
+        elif kind == "checkbox":
+            ws.bool_value = bool(value)
+        else:
+            raise TypeError(f"widget {kind} não suportado pelo roteiro")
+        self.states[proto.id] = ws
+        self._pending.add(self.fragment_of.get(label, "") if self.use_fragments else "")
+
+    def current(self, label: str):
+        """Valor atual do widget (o definido pela sessão ou o default do servidor)."""
+        kind, proto = self.widget(label)
+        ws = self.states.get(proto.id)
+        if kind == "selectbox":
+            return ws.int_value if ws is not None else proto.default
+        if kind == "multiselect":
+            return list(ws.int_array_value.data) if ws is not None else list(proto.default)
+        if kind == "checkbox":
+            return ws.bool_value if ws is not None else proto.default
+        raise TypeError(kind)
+
+    # ---- rerun ----
+    async def rerun(self, timeout: float = 300.0) -> float:
+        """Envia rerun_script e espera o script_finished; devolve a latência em ms."""
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        msg = BackMsg()
+        msg.rerun_script.query_string = urlencode(self.query)
+        # como o frontend: widget de um fragmento dispara só o fragmento
+        fragment_id = next(iter(self._pending)) if len(self._pending) == 1 else ""
+        msg.rerun_script.fragment_id = fragment_id
+        self._pending.clear()
+        live_ids = {p.id for _, p in self.widgets.values()}
+        for wid, ws in self.states.items():
+            if not self.widgets or wid in live_ids:
+                msg.rerun_script.widget_states.widgets.append(ws)
+
+        t = time.perf_counter()
+        await self.conn.write_message(msg.SerializeToString(), binary=True)
+        widgets, fragments, exceptions = {}, {}, []
+        while True:
+            raw = await asyncio.wait_for(self.conn.read_message(), timeout)
+            if raw is None:
+                raise ConnectionError("websocket fechado pelo servidor")
+            fwd = ForwardMsg()
+            fwd.ParseFromString(raw)
+            if fwd.WhichOneof("type") == "ref_hash":
+                fwd = self._cache[fwd.ref_hash]
+            elif fwd.hash:
+                self._cache[fwd.hash] = fwd
+            kind = fwd.WhichOneof("type")
+            if kind == "delta" and fwd.delta.WhichOneof("type") == "new_element":
+                el = fwd.delta.new_element
+                etype = el.WhichOneof("type")
+                if etype in WIDGET_TYPES:
+                    proto = getattr(el, etype)
+                    widgets[proto.label] = (etype, proto)
+                    fragments[proto.label] = fwd.delta.fragment_id
+                elif etype == "exception":
+                    exceptions.append(f"{el.exception.type}: {el.exception.message}")
+            elif kind == "script_finished":
+                status = fwd.script_finished
+                if status == ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    continue
+                dt = (time.perf_counter() - t) * 1000.0
+                if fragment_id:  # só o fragmento foi reenviado; o resto da página continua
+                    widgets = {**self.widgets, **widgets}
+                    fragments = {**self.fragment_of, **fragments}
+                self.widgets, self.fragment_of = widgets, fragments
+                self.exceptions = exceptions
+                if status == ForwardMsg.FINISHED_WITH_COMPILE_ERROR:
+                    raise RuntimeError("erro de compilação do script")
+                if exceptions:
+                    raise RuntimeError(exceptions[0])
+                return dt
+
+
+# ==========================
+# ROTEIRO DE INTERAÇÃO
+# ==========================
+def _open(page):
+    def step(s, rnd):
+        s.query["page"] = page
+        s._pending.add("")
+    return step
+
+
+def _pick_country(s, rnd):
+    _, proto = s.widget("Selecione um país:")
+    s.set_value("Selecione um país:", rnd.randrange(len(proto.options)))
+
+
+def _add_region(region):
+    def step(s, rnd):
+        label = "Selecione a região (opcional):"
+        _, proto = s.widget(label)
+        idx = list(proto.options).index(region)
+        s.set_value(label, sorted(set(s.current(label)) | {idx}))
+    return step
+
+
+def _compare_countries(s, rnd):
+    label = "Selecione os países para comparar:"
+    _, proto = s.widget(label)
+    extra = rnd.sample(range(len(proto.options)), k=min(3, len(proto.options)))
+    s.set_value(label, sorted(set(s.current(label)) | set(extra)))
+
+
+def _change_variable(s, rnd):
+    _, proto = s.widget("🔹 Variável")
+    s.set_value("🔹 Variável", rnd.randrange(len(proto.options)))
+
+
+def _toggle_animation(s, rnd):
+    label = "🎬 Animação por ano"
+    s.set_value(label, not s.current(label))
+
+
+def _change_map_mode(s, rnd):
+    label = "Agregação no período selecionado:"
+    _, proto = s.widget(label)
+    s.set_value(label, rnd.randrange(len(proto.options)))
+
+
+# (nome do passo, ação antes do rerun); cada passo é exatamente um rerun
+SCENARIO = [
+    ("abrir_serie", _open("Série Histórica")),
+    ("escolher_pais", _pick_country),
+    ("adicionar_brics", _add_region("BRICS")),
+    ("comparar_paises", _compare_countries),
+    ("trocar_variavel", _change_variable),
+    ("abrir_mapa", _open("Mapa VDEM")),
+    ("animar_mapa", _toggle_animation),
+    ("parar_animacao", _toggle_animation),
+    ("trocar_agregacao", _change_map_mode),
+]
+
+
+# ==========================
+# SERVIDOR
+# ==========================
+def rss_mb(pid: int | None) -> float:
+    """RSS de um processo em MB (Linux: /proc/<pid>/status); NaN se indisponível."""
+    if pid is None:
+        return float("nan")
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii") as fh:
+            for line in fh:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    return float("nan")
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(data_dir, port: int | None = None, timeout: float = 120.0):
+    """Sobe o app multipage num subprocesso e espera o /_stcore/health."""
+    port = port or _free_port()
+    env = dict(os.environ, VDEM_DATA_DIR=str(data_dir), VDEM_METRICS_PORT="0")
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", str(REPO_ROOT / MULTIPAGE),
+         "--server.headless", "true", "--server.port", str(port), "--server.address", "127.0.0.1",
+         "--browser.gatherUsageStats", "false", "--server.fileWatcherType", "none"],
+        cwd=REPO_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"servidor saiu com código {proc.returncode}")
+        try:
+            with urllib.request.urlopen(url + "/_stcore/health", timeout=2) as r:
+                if r.status == 200:
+                    return proc, url
+        except OSError:
+            time.sleep(0.3)
+    proc.kill()
+    raise TimeoutError("servidor Streamlit não respondeu ao health check")
+
+
+# ==========================
+# MEDIÇÃO
+# ==========================
+async def _run_session(idx, url, loops, think_ms, seed, samples, errors, sessions, use_fragments=True):
+    rnd = random.Random(seed * 1000 + idx)
+    s = Session(url, use_fragments=use_fragments)
+    sessions.append(s)  # fica conectada até o fim do degrau (memória por sessão)
+    try:
+        await s.connect()
+    except Exception as exc:  # noqa: BLE001
+        errors.append(f"conectar: {exc}")
+        return
+    for _ in range(loops):
+        for name, action in SCENARIO:
+            try:
+                action(s, rnd)
+                samples.append((name, await s.rerun()))
+            except Exception as exc:  # noqa: BLE001 - conta qualquer falha da sessão
+                errors.append(f"{name}: {exc}")
+            if think_ms:
+                await asyncio.sleep(rnd.uniform(0.5, 1.5) * think_ms / 1000.0)
+
+
+def run_level(url: str, n_sessions: int, loops: int = 2, think_ms: float = 0.0,
+              seed: int = 7, server_pid: int | None = None, use_fragments: bool = True) -> dict:
+    """Roda um degrau com n_sessions sessões simultâneas e devolve as estatísticas."""
+    samples, errors, sessions = [], [], []
+
+    async def _level():
+        t0 = time.perf_counter()
+        await asyncio.gather(*[
+            _run_session(i, url, loops, think_ms, seed, samples, errors, sessions, use_fragments)
+            for i in range(n_sessions)
+        ])
+        wall = time.perf_counter() - t0
+        rss1 = rss_mb(server_pid)  # sessões ainda conectadas
+        for s in sessions:
+            s.close()
+        await asyncio.sleep(0.2)
+        return wall, rss1
+
+    rss0 = rss_mb(server_pid)
+    wall, rss1 = asyncio.run(_level())
+
+    lat = np.array([dt for _, dt in samples]) if samples else np.array([np.nan])
+    by_step = {}
+    for name, _ in SCENARIO:
+        v = np.array([dt for st_, dt in samples if st_ == name])
+        if v.size:
+            by_step[name] = {"p50_ms": float(np.percentile(v, 50)), "p95_ms": float(np.percentile(v, 95))}
+    total = len(samples) + len(errors)
+    return {
+        "sessions": n_sessions,
+        "reruns": len(samples),
+        "errors": len(errors),
+        "error_rate": len(errors) / total if total else 0.0,
+        "p50_ms": float(np.nanpercentile(lat, 50)),
+        "p95_ms": float(np.nanpercentile(lat, 95)),
+        "p99_ms": float(np.nanpercentile(lat, 99)),
+        "max_ms": float(np.nanmax(lat)),
+        "wall_s": wall,
+        "throughput_rps": len(samples) / wall if wall else 0.0,
+        "server_rss_mb": rss1,
+        "mem_per_session_mb": (rss1 - rss0) / n_sessions,
+        "steps": by_step,
+        "error_samples": errors[:5],
+    }
+
+
+def ramp(url, levels, loops=2, think_ms=0.0, slo_p95_ms=2000.0, max_error_rate=0.01,
+         seed=7, server_pid=None, warmup=True, use_fragments=True, log=print) -> dict:
+    """Sobe os degraus até o primeiro que viola o SLO (inclusive)."""
+    if warmup:  # uma sessão passa pelo roteiro antes (imports e st.cache_data do servidor)
+        run_level(url, 1, loops=1, seed=seed + 1, server_pid=server_pid)
+    results, breaking = [], None
+    for n in levels:
+        r = run_level(url, n, loops=loops, think_ms=think_ms, seed=seed, server_pid=server_pid,
+                      use_fragments=use_fragments)
+        results.append(r)
+        log(_fmt_row(r))
+        if r["p95_ms"] > slo_p95_ms or r["error_rate"] > max_error_rate:
+            breaking = n
+            break
+    ok = [r["sessions"] for r in results if r["sessions"] != breaking]
+    return {"levels": results, "breaking_point": breaking, "max_ok_sessions": max(ok) if ok else 0}
+
+
+def fragment_savings(url: str, repeats: int = 5, seed: int = 7) -> dict:
+    """
+    Economia dos st.fragment: para cada controle local, mediana do rerun só do
+    fragmento × rerun do script inteiro (mesma interação, uma sessão).
+    """
+    steps = [("comparar_paises", "Série Histórica", _compare_countries),
+             ("animar_mapa", "Mapa VDEM", _toggle_animation),
+             ("trocar_agregacao", "Mapa VDEM", _change_map_mode)]
+
+    async def _measure(use_fragments):
+        out = {}
+        for name, page, action in steps:
+            rnd = random.Random(seed)
+            s = Session(url, page=page, use_fragments=use_fragments)
+            await s.connect()
+            await s.rerun()
+            times = []
+            for _ in range(repeats):
+                action(s, rnd)
+                times.append(await s.rerun())
+            s.close()
+            out[name] = float(np.median(times))
+        await asyncio.sleep(0.2)
+        return out
+
+    frag, full = asyncio.run(_measure(True)), asyncio.run(_measure(False))
+    return {name: {"fragment_ms": frag[name], "full_ms": full[name],
+                   "saved_ms": full[name] - frag[name]} for name in frag}
+
+
+# ==========================
+# CLI
+# ==========================
+HEADER = (f"{'sessões':>7} {'reruns':>7} {'erros':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'rerun/s':>8} {'MB/sessão':>10} {'RSS MB':>8}")
+
+
+def _fmt_row(r):
+    return (f"{r['sessions']:>7} {r['reruns']:>7} {r['errors']:>6} {r['p50_ms']:>8.0f} {r['p95_ms']:>8.0f} "
+            f"{r['p99_ms']:>8.0f} {r['throughput_rps']:>8.2f} {r['mem_per_session_mb']:>10.1f} "
+            f"{r['server_rss_mb']:>8.0f}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sessions", default="1,2,4,8,16", help="Degraus de sessões simultâneas (vírgulas).")
+    ap.add_argument("--loops", type=int, default=2, help="Repetições do roteiro por sessão.")
+    ap.add_argument("--think-ms", type=float, default=0.0, help="Pausa média entre interações.")
+    ap.add_argument("--slo-p95-ms", type=float, default=2000.0)
+    ap.add_argument("--max-error-rate", type=float, default=0.01)
+    ap.add_argument("--url", help="Servidor já no ar (senão sobe um subprocesso).")
+    ap.add_argument("--server-pid", type=int, help="PID do servidor de --url (para medir memória).")
+    ap.add_argument("--data-dir", help="Pasta com vdem_all.parquet (padrão: base sintética temporária).")
+    ap.add_argument("--scale", choices=["small", "full"], default="small", help="Escala da base sintética.")
+    ap.add_argument("--no-fragments", action="store_true",
+                    help="Controles de fragmentos rerodam o script inteiro (para comparar).")
+    ap.add_argument("--no-warmup", action="store_true", help="Mede também o cold start do servidor.")
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--out", help="Grava os resultados em JSON.")
+    args = ap.parse_args(argv)
+
+    tmp, proc = None, None
+    url, pid = args.url, args.server_pid
+    try:
+        if url is None:
+            data_dir = args.data_dir
+            if data_dir is None:
+                from conftest import write_bench_dataset
+                tmp = tempfile.TemporaryDirectory(prefix="vdem_load_")
+                print(f"Gerando base sintética ({args.scale}) em {tmp.name} ...")
+                data_dir = write_bench_dataset(Path(tmp.name), args.scale, seed=args.seed)
+            proc, url = start_server(data_dir)
+            pid = proc.pid
+            print(f"Servidor em {url} (pid {pid})")
+
+        levels = [int(x) for x in args.sessions.split(",") if x.strip()]
+        print(f"Roteiro: {' → '.join(n for n, _ in SCENARIO)} (×{args.loops} por sessão)\n")
+        print(HEADER)
+        report = ramp(url, levels, loops=args.loops, think_ms=args.think_ms, slo_p95_ms=args.slo_p95_ms,
+                      max_error_rate=args.max_error_rate, seed=args.seed, server_pid=pid,
+                      warmup=not args.no_warmup, use_fragments=not args.no_fragments)
+        savings = fragment_savings(url)
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=30)
+        if tmp is not None:
+            tmp.cleanup()
+
+    last = report["levels"][-1]
+    print("\nLatência por passo no último degrau:")
+    for name, s in last["steps"].items():
+        print(f"  {name:<18} p50 {s['p50_ms']:>7.0f} ms   p95 {s['p95_ms']:>7.0f} ms")
+    print("\nst.fragment — rerun do fragmento × script inteiro (1 sessão, mediana):")
+    for name, r in savings.items():
+        print(f"  {name:<18} {r['fragment_ms']:>7.0f} ms × {r['full_ms']:>7.0f} ms   (-{r['saved_ms']:.0f} ms)")
+    if last["error_samples"]:
+        print("\nErros (amostra):", *last["error_samples"], sep="\n  ")
+    if report["breaking_point"]:
+        print(f"\nSLO estourado com {report['breaking_point']} sessões "
+              f"(p95 > {args.slo_p95_ms:.0f} ms ou erros > {args.max_error_rate:.0%}); "
+              f"último degrau dentro do SLO: {report['max_ok_sessions']} sessões.")
+    else:
+        print(f"\nTodos os degraus dentro do SLO (até {levels[-1]} sessões).")
+
+    if args.out:
+        report["fragment_savings"] = savings
+        report["meta"] = {"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "loops": args.loops,
+                          "think_ms": args.think_ms, "slo_p95_ms": args.slo_p95_ms, "scale": args.scale}
+        Path(args.out).write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    return 1 if report["breaking_point"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,281 @@
+"""
+Latências de cold start, rerun quente, troca de variável, seleção de região
+e troca de modo do mapa, por app/página (ver conftest.py).
+"""
+import time
+from itertools import cycle
+
+import pytest
+
+from conftest import clear_caches, widget
+
+MULTIPAGE = "vdem_dashboard_multipage.py"
+PAGES = ["Apresentação", "Série Histórica", "Mapa VDEM", "Controle Sintético", "Efeitos Fixos", "Correlações", "Agrupamentos"]
+
+
+# ==========================
+# vdem_dashboard_multipage.py (uma medição por página do option_menu)
+# ==========================
+@pytest.mark.parametrize("page", PAGES)
+def test_multipage_cold_start(app, bench, page):
+    bench.measure(f"multipage[{page}].cold_start",
+                  lambda: app(MULTIPAGE, page=page).run(), setup=clear_caches)
+
+
+@pytest.mark.parametrize("page", PAGES)
+def test_multipage_warm_rerun(app, bench, page):
+    at = app(MULTIPAGE, page=page).run()
+    bench.measure(f"multipage[{page}].warm_rerun", at.run)
+
+
+@pytest.mark.parametrize("page", ["Série Histórica", "Mapa VDEM"])
+def test_multipage_variable_switch(app, bench, page):
+    at = app(MULTIPAGE, page=page).run()
+    n = len(widget(at.sidebar.selectbox, "🔹 Variável").options)
+    indices = cycle(range(n)[::-1] if n > 1 else [0])
+
+    def switch():
+        widget(at.sidebar.selectbox, "🔹 Variável").select_index(next(indices))
+        return at.run()
+    bench.measure(f"multipage[{page}].variable_switch", switch)
+
+
+@pytest.mark.parametrize("page", ["Série Histórica", "Mapa VDEM"])
+def test_multipage_region_selection(app, bench, page):
+    at = app(MULTIPAGE, page=page).run()
+    regions = cycle([["BRICS"], ["BRICS", "G20"], []])
+
+    def pick():
+        widget(at.sidebar.multiselect, "Selecione a região (opcional):").set_value(next(regions))
+        return at.run()
+    bench.measure(f"multipage[{page}].region_selection", pick)
+
+
+@pytest.mark.parametrize("modo", ["imediato", "lote"])
+def test_multipage_comparison_setup(app, bench, modo):
+    """Montar um comparativo (país + região + variável): 3 reruns no modo imediato, 1 no modo lote."""
+    at = app(MULTIPAGE, page="Série Histórica").run()
+    if modo == "lote":
+        widget(at.sidebar.toggle, "Aplicar filtros em lote").set_value(True)
+        at.run()
+    countries = cycle(["Chile", "Argentina"])
+    variables = cycle([1, 0])
+
+    def setup_comparison():
+        edits = [
+            lambda: widget(at.sidebar.selectbox, "Selecione um país:").set_value(next(countries)),
+            lambda: widget(at.sidebar.multiselect, "Selecione a região (opcional):").set_value(["BRICS"]),
+            lambda: widget(at.sidebar.selectbox, "🔹 Variável").select_index(next(variables)),
+        ]
+        for edit in edits:
+            edit()
+            if modo == "imediato":
+                at.run()
+        if modo == "lote":
+            widget(at.sidebar.button, "✅ Aplicar filtros").click()
+            at.run()
+        return at
+    bench.measure(f"multipage[Série Histórica].comparison_setup[{modo}]", setup_comparison)
+
+
+def test_multipage_map_mode_switch(app, bench):
+    at = app(MULTIPAGE, page="Mapa VDEM").run()
+    modes = cycle(["Mediana", "Último ano do período", "Média"])
+
+    def switch():
+        widget(at.selectbox, "Agregação no período selecionado:").set_value(next(modes))
+        return at.run()
+    bench.measure("multipage[Mapa VDEM].map_mode_switch", switch)
+
+
+def test_multipage_map_animation_toggle(app, bench):
+    at = app(MULTIPAGE, page="Mapa VDEM").run()
+    states = cycle([True, False])
+
+    def toggle():
+        widget(at.checkbox, "🎬 Animação por ano").set_value(next(states))
+        return at.run()
+    bench.measure("multipage[Mapa VDEM].map_animation_toggle", toggle)
+
+
+def test_multipage_home_live_table(app, bench):
+    at = app(MULTIPAGE, page="Apresentação").run()
+    widget(at.radio, "Tabela").set_value("Recalculada com a base carregada")
+    bench.measure("multipage[Apresentação].live_table_cold",
+                  at.run, setup=clear_caches, repeats=3)
+
+
+def test_multipage_regional_spillover(app, bench):
+    at = app(MULTIPAGE, page="Série Histórica").run()
+    widget(at.toggle, "Comparar com a média regional (spillover)").set_value(True)
+    bench.measure("multipage[Série Histórica].regional_spillover_cold", at.run, setup=clear_caches)
+
+
+def test_multipage_episode_overlay(app, bench):
+    """Detecção de episódios em todos os países (sem cache) + faixas no gráfico."""
+    at = app(MULTIPAGE, page="Série Histórica").run()
+    variavel = widget(at.sidebar.selectbox, "🔹 Variável")
+    variavel.select_index(next(i for i, o in enumerate(variavel.options) if "v2x_libdem" in o))
+    at.run()
+    widget(at.toggle, "Episódios de democratização/autocratização").set_value(True)
+    bench.measure("multipage[Série Histórica].episode_overlay_cold", at.run, setup=clear_caches)
+
+
+def test_multipage_trajectory_search(app, bench):
+    """Busca de trajetórias parecidas (ligada, sem cache), alternando euclidiana e DTW."""
+    at = app(MULTIPAGE, page="Série Histórica").run()
+    at.toggle(key="sim_buscar").set_value(True).run()
+    metodos = cycle(["dtw", "euclidiana"])
+
+    def switch():
+        at.radio(key="sim_metodo").set_value(next(metodos))
+        return at.run()
+    bench.measure("multipage[Série Histórica].trajectory_search_cold", switch, setup=clear_caches)
+
+
+def test_multipage_synthetic_control(app, bench):
+    """Troca do país tratado: controle sintético + placebos sem cache."""
+    at = app(MULTIPAGE, page="Controle Sintético").run()
+    countries = cycle(["Chile", "Brazil", "Argentina"])
+
+    def switch():
+        widget(at.sidebar.selectbox, "Selecione um país:").set_value(next(countries))
+        return at.run()
+    bench.measure("multipage[Controle Sintético].country_switch_cold", switch, setup=clear_caches)
+
+
+def test_multipage_fixed_effects(app, bench):
+    """Troca de especificação do painel com efeitos fixos (sem cache)."""
+    at = app(MULTIPAGE, page="Efeitos Fixos").run()
+    base = widget(at.multiselect, "Regressores").value
+    specs = cycle([base + ["v2x_polyarchy"], base[:1], base])
+
+    def switch():
+        widget(at.multiselect, "Regressores").set_value(next(specs))
+        return at.run()
+    bench.measure("multipage[Efeitos Fixos].spec_switch_cold", switch, setup=clear_caches)
+
+
+def test_multipage_group_correlation(app, bench):
+    """Heatmap de correlações do Grupo (sem cache), alternando países selecionados × todos."""
+    at = app(MULTIPAGE, page="Correlações").run()
+    states = cycle([True, False])
+
+    def toggle():
+        widget(at.toggle, "Todos os países").set_value(next(states))
+        return at.run()
+    bench.measure("multipage[Correlações].group_heatmap_cold", toggle, setup=clear_caches)
+
+
+def test_multipage_trajectory_clusters(app, bench):
+    """Troca de k no agrupamento (sem cache): reruns até o job em segundo plano terminar."""
+    at = app(MULTIPAGE, page="Agrupamentos").run()
+    ks = cycle([3, 7, 5])
+
+    def switch():
+        at.slider(key="clu_k").set_value(next(ks))
+        at.run()
+        while any("segundo plano" in i.value for i in at.info):
+            time.sleep(0.02)
+            at.run()
+        return at
+    bench.measure("multipage[Agrupamentos].k_switch_cold", switch, setup=clear_caches)
+
+
+# ==========================
+# vdem_dashboard.py (página única com abas)
+# ==========================
+def test_dashboard_cold_start(app, bench):
+    bench.measure("dashboard.cold_start", lambda: app("vdem_dashboard.py").run(), setup=clear_caches)
+
+
+def test_dashboard_warm_rerun(app, bench):
+    at = app("vdem_dashboard.py").run()
+    bench.measure("dashboard.warm_rerun", at.run)
+
+
+def test_dashboard_variable_switch(app, bench):
+    at = app("vdem_dashboard.py").run()
+    n = len(widget(at.sidebar.selectbox, "🔹 Variável").options)
+    indices = cycle(range(n)[::-1] if n > 1 else [0])
+
+    def switch():
+        widget(at.sidebar.selectbox, "🔹 Variável").select_index(next(indices))
+        return at.run()
+    bench.measure("dashboard.variable_switch", switch)
+
+
+def test_dashboard_region_selection(app, bench):
+    at = app("vdem_dashboard.py").run()
+    regions = cycle([["BRICS"], ["BRICS", "G20"], []])
+
+    def pick():
+        widget(at.sidebar.multiselect, "Selecione a região (opcional):").set_value(next(regions))
+        return at.run()
+    bench.measure("dashboard.region_selection", pick)
+
+
+def test_dashboard_regional_trajectories(app, bench):
+    at = app("vdem_dashboard.py").run()
+    regions = cycle([["World", "G7"], ["World", "BRICS", "África", "Oriente Médio"], ["World"]])
+
+    def pick():
+        widget(at.multiselect, "Regiões").set_value(next(regions))
+        return at.run()
+    bench.measure("dashboard.regional_trajectories", pick)
+
+
+def test_dashboard_cross_section_year(app, bench):
+    at = app("vdem_dashboard.py").run()
+    years = cycle([2000, 1950, 1900, 2020])
+
+    def slide():
+        widget(at.slider, "Ano para o corte transversal").set_value(next(years))
+        return at.run()
+    bench.measure("dashboard.cross_section_year", slide)
+
+
+def test_dashboard_year_animation(app, bench):
+    at = app("vdem_dashboard.py").run()
+    toggles = cycle([True, False])
+
+    def toggle():
+        widget(at.toggle, "▶️ Animar pelos anos").set_value(next(toggles))
+        return at.run()
+    bench.measure("dashboard.year_animation_toggle", toggle)
+
+
+def test_dashboard_conflict_onset_window(app, bench):
+    """Resumo 'democracia N anos após o início' sobre os intervalos RLE, trocando N."""
+    at = app("vdem_dashboard.py").run()
+    ns = cycle([10, 3, 5])
+
+    def slide():
+        at.slider(key="conf_ev_n").set_value(next(ns))
+        return at.run()
+    bench.measure("dashboard.conflict_onset_window", slide)
+
+
+# ==========================
+# vdem_app.py
+# ==========================
+def test_app_cold_start(app, bench):
+    bench.measure("app.cold_start", lambda: app("vdem_app.py").run(), setup=clear_caches)
+
+
+def test_app_warm_rerun(app, bench):
+    at = app("vdem_app.py").run()
+    bench.measure("app.warm_rerun", at.run)
+
+
+def test_app_variable_switch(app, bench):
+    at = app("vdem_app.py").run()
+    n = len(widget(at.sidebar.selectbox, "🔹 Categoria").options)
+    indices = cycle(range(n)[::-1] if n > 1 else [0])
+
+    def switch():
+        sel = widget(at.sidebar.selectbox, "🔹 Categoria")
+        # format_func do vdem_app não aceita o rótulo formatado: passa o id cru ("1.7 - ..." → "1.7")
+        sel.set_value(sel.options[next(indices)].split(" - ")[0])
+        return at.run()
+    bench.measure("app.variable_switch", switch)
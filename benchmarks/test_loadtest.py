@@ -0,0 +1,51 @@
+"""
+Degrau curto do teste de carga (loadtest.py) dentro da suíte (4 sessões
+websocket simultâneas, roteiro completo uma vez) e a economia dos st.fragment.
+"""
+import pytest
+
+import loadtest
+from conftest import record_result
+
+SESSIONS = 4
+
+
+@pytest.fixture(scope="module")
+def server(data_dir):
+    proc, url = loadtest.start_server(data_dir)
+    yield proc, url
+    proc.terminate()
+    proc.wait(timeout=30)
+
+
+def test_multipage_concurrent_sessions(server):
+    proc, url = server
+    loadtest.run_level(url, 1, loops=1, seed=8, server_pid=proc.pid)  # aquecimento
+    r = loadtest.run_level(url, SESSIONS, loops=1, server_pid=proc.pid)
+    assert r["errors"] == 0, r["error_samples"]
+    record_result(f"multipage.loadtest[{SESSIONS} sessões]", {
+        "median_ms": r["p50_ms"],
+        "p95_ms": r["p95_ms"],
+        "p99_ms": r["p99_ms"],
+        "min_ms": min(s["p50_ms"] for s in r["steps"].values()),
+        "max_ms": r["max_ms"],
+        "runs": r["reruns"],
+        "throughput_rps": r["throughput_rps"],
+        "mem_per_session_mb": r["mem_per_session_mb"],
+    })
+
+
+def test_fragment_savings(server):
+    """Controles dentro de st.fragment: rerun só do fragmento × script inteiro."""
+    _, url = server
+    savings = loadtest.fragment_savings(url, repeats=6)
+    assert sum(r["saved_ms"] for r in savings.values()) > 0, savings
+    for name, r in savings.items():
+        record_result(f"multipage.fragment[{name}]", {
+            "median_ms": r["fragment_ms"],
+            "full_rerun_ms": r["full_ms"],
+            "saved_ms": r["saved_ms"],
+            "min_ms": r["fragment_ms"],
+            "max_ms": r["fragment_ms"],
+            "runs": 6,
+        })
@@ -0,0 +1,51 @@
+"""
+Scrape do /metrics (vdem_metrics.py) depois de reruns reais do app multipage
+com AppTest. Os contadores são do processo inteiro, então as asserções olham a
+diferença entre dois scrapes.
+"""
+import re
+import urllib.request
+
+import pytest
+
+import vdem_metrics
+
+MULTIPAGE = "vdem_dashboard_multipage.py"
+
+
+def _scrape(port: int) -> str:
+    return urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=10).read().decode("utf-8")
+
+
+def _valor(texto: str, amostra: str) -> float:
+    """Valor de uma amostra (nome + rótulos exatamente como no scrape); 0 se ausente."""
+    m = re.search(rf"^{re.escape(amostra)} (\S+)$", texto, re.M)
+    return float(m.group(1)) if m else 0.0
+
+
+@pytest.fixture
+def metrics_port(data_dir):
+    # os benchmarks rodam com VDEM_METRICS_PORT=0; aqui o servidor sobe numa porta livre
+    port = vdem_metrics.start_server(port=0)
+    assert port
+    yield port
+    vdem_metrics.stop_server()
+
+
+def test_metrics_scrape_after_reruns(app, metrics_port):
+    reruns = 'vdem_rerun_duration_seconds_count{app="multipage",page="Série Histórica"}'
+    hits = 'vdem_cache_hits_total{fn="_read_parquet_columns"}'
+    antes = _scrape(metrics_port)
+
+    at = app(MULTIPAGE, page="Série Histórica")
+    at.run()
+    at.run()
+    assert not at.exception, at.exception
+
+    depois = _scrape(metrics_port)
+    assert "# TYPE vdem_rerun_duration_seconds histogram" in depois
+    assert _valor(depois, reruns) - _valor(antes, reruns) == 2
+    assert _valor(depois, hits) > _valor(antes, hits)  # o 2º rerun lê a base do cache
+    assert _valor(depois, "vdem_parquet_bytes_read_total") > 0
+    assert _valor(depois, "vdem_parquet_columns_loaded_total") > 0
+    assert _valor(depois, "vdem_active_sessions") >= 1
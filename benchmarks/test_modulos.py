@@ -0,0 +1,441 @@
+"""
+Conferência numérica dos módulos de análise contra resultados de referência
+(implementações diretas, lentas e óbvias, ou fixtures montadas à mão). Não
+medem tempo: rodam em dados pequenos e só comparam os números.
+"""
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import vdem_coverage
+import vdem_cube
+import vdem_episodios
+import vdem_eventos
+import vdem_panel
+import vdem_related
+import vdem_stats
+import vdem_synthcontrol
+import vdem_teffects
+import vdem_trajetorias
+
+
+# ==========================
+# EFEITOS FIXOS (vdem_panel)
+# ==========================
+def _painel_fe(seed=3, n_paises=9, n_anos=14):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame([(f"P{i}", 1990 + t) for i in range(n_paises) for t in range(n_anos)],
+                      columns=["country_name", "year"])
+    a = rng.normal(size=n_paises)[df.index // n_anos]
+    g = rng.normal(size=n_anos)[df.index % n_anos]
+    df["x1"] = rng.normal(size=len(df)) + a
+    df["x2"] = rng.normal(size=len(df)) + g
+    df["y"] = 0.7 * df["x1"] - 0.3 * df["x2"] + a + g + rng.normal(scale=0.5, size=len(df))
+    # painel desbalanceado: some alguns país-anos (nenhum país/ano fica sozinho)
+    return df.drop(index=rng.choice(len(df), 15, replace=False)).reset_index(drop=True)
+
+
+def test_efeitos_fixos_igual_a_mqo_com_dummies():
+    df = _painel_fe()
+    res = vdem_panel.efeitos_fixos(df, "y", ["x1", "x2"])
+
+    # referência: MQO com uma dummy por país e por ano (menos uma), mesmo EP por cluster de país
+    D = pd.get_dummies(df[["country_name", "year"]].astype(str), drop_first=True, dtype=float)
+    X = np.column_stack([df[["x1", "x2"]].to_numpy(), np.ones(len(df)), D.to_numpy()])
+    y = df["y"].to_numpy()
+    b, *_ = np.linalg.lstsq(X, y, rcond=None)
+    u = y - X @ b
+    XtX_inv = np.linalg.inv(X.T @ X)
+    _, pais = np.unique(df["country_name"], return_inverse=True)
+    G, n = pais.max() + 1, len(df)
+    scores = np.column_stack([np.bincount(pais, X[:, j] * u, G) for j in range(X.shape[1])])
+    c = G / (G - 1) * (n - 1) / (n - 2)  # como no reghdfe: os efeitos absorvidos não entram em K
+    ep = np.sqrt(np.diag(XtX_inv @ scores.T @ scores @ XtX_inv * c))[:2]
+
+    tab = res["tabela"]
+    np.testing.assert_allclose(tab["coef"], b[:2], rtol=1e-8)
+    np.testing.assert_allclose(tab["ep"], ep, rtol=1e-6)
+    assert res["n_obs"] == n and res["n_paises"] == G and res["n_anos"] == 14
+    assert list(tab["sig"]) == [vdem_stats.estrelas(t) for t in tab["t"]]
+
+
+def test_efeitos_fixos_tira_singletons():
+    df = _painel_fe()
+    so = pd.DataFrame({"country_name": ["Sozinho"], "year": [1995], "x1": [9.0], "x2": [-9.0], "y": [50.0]})
+    a = vdem_panel.efeitos_fixos(df, "y", ["x1", "x2"])
+    b = vdem_panel.efeitos_fixos(pd.concat([df, so], ignore_index=True), "y", ["x1", "x2"])
+    np.testing.assert_allclose(a["tabela"]["coef"], b["tabela"]["coef"], rtol=1e-10)
+    assert a["n_obs"] == b["n_obs"]
+
+
+@pytest.mark.parametrize("z, esperado", [(0.5, ""), (-1.7, "*"), (1.96, "**"), (-3.0, "***")])
+def test_estrelas(z, esperado):
+    assert vdem_stats.estrelas(z) == esperado
+
+
+# ==========================
+# EFEITOS DE TRATAMENTO (vdem_teffects) E MÉDIA REGIONAL DEIXA-UM-FORA (vdem_cube)
+# ==========================
+def _painel_te(seed=11, n_paises=80, n_anos=30):
+    """Adesão endógena: o mesmo choque v entra na seleção e na democracia (efeito verdadeiro 0,4)."""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame([(f"P{i:02d}", 1950 + t) for i in range(n_paises) for t in range(n_anos)],
+                      columns=["country_name", "year"])
+    pi = df.index // n_anos
+    df["e_regionpol_6C"] = (pi % 4 + 1).astype(float)
+    df["colonized"] = rng.integers(0, 2, n_paises)[pi].astype(float)
+    df["dist"] = rng.normal(size=n_paises)[pi] + 0.3 * rng.normal(size=len(df))
+    df["e_gdppc"] = rng.normal(size=len(df))
+    v = rng.normal(size=len(df))
+    df["un_member"] = (0.2 + 0.8 * df["colonized"] - 0.9 * df["dist"] + v > 0).astype(float)
+    gdp_lag = df.groupby("country_name")["e_gdppc"].shift()
+    df["v2x_libdem"] = 0.5 + 0.3 * gdp_lag + 0.4 * df["un_member"] + 0.6 * v + 0.3 * rng.normal(size=len(df))
+    return df
+
+
+ESPEC_TESTE = {
+    "desfecho": "v2x_libdem",
+    "tratamento": "un_member",
+    "covariaveis": ["e_gdppc", "reg_dem"],
+    "instrumentos": ["colonized", "dist"],
+    "selecao_defasadas": [],
+    "regiao": "e_regionpol_6C",
+    "anos": None,
+}
+
+
+def _loo_laco(df, regiao_de, v):
+    """Referência: para cada país-ano, média de v nos outros países da mesma região no mesmo ano."""
+    out = np.full(len(df), np.nan)
+    for i, (pais, ano) in enumerate(zip(df["country_name"], df["year"])):
+        viz = df[(df["year"] == ano) & (df["country_name"] != pais)
+                 & df["country_name"].map(lambda c: bool(regiao_de(c, ano) & regiao_de(pais, ano)))]
+        if viz[v].notna().any():
+            out[i] = viz[v].mean()
+    return out
+
+
+def test_media_regional_loo_igual_a_laco():
+    df = _painel_te(n_paises=12, n_anos=5)
+    df.loc[[3, 17, 40], "v2x_libdem"] = np.nan
+    df.loc[[22], "e_regionpol_6C"] = np.nan  # país-ano sem região: sem vizinhos
+
+    cod = df.set_index(["country_name", "year"])["e_regionpol_6C"]
+    por_coluna = lambda c, a: set() if np.isnan(cod[(c, a)]) else {cod[(c, a)]}  # noqa: E731
+    got = vdem_cube.spillover_regional(df, "e_regionpol_6C", ["v2x_libdem"]).iloc[:, 0]
+    np.testing.assert_allclose(got, _loo_laco(df, por_coluna, "v2x_libdem"), rtol=1e-12)
+
+    # caminho do dict região → países, com um país em duas regiões
+    mapa = {"A": ["P00", "P01", "P02", "P03"], "B": ["P03", "P04", "P05"], "C": ["P06", "P07"]}
+    por_mapa = lambda c, a: {r for r, m in mapa.items() if c in m}  # noqa: E731
+    got = vdem_cube.spillover_regional(df, mapa, ["v2x_libdem"]).iloc[:, 0]
+    np.testing.assert_allclose(got, _loo_laco(df, por_mapa, "v2x_libdem"), rtol=1e-12)
+
+
+def test_vizinhos_do_spillover_so_geograficos():
+    mapa = vdem_cube.region_map_from_app(Path(__file__).resolve().parent.parent / "vdem_dashboard_multipage.py")
+    paises = sorted({c for m in mapa.values() for c in m})
+    df = pd.DataFrame({"country_name": paises, "year": 2000, "v2x_libdem": 0.0})
+    df.loc[df["country_name"].isin(["China", "India"]), "v2x_libdem"] = 1.0
+    brasil = df["country_name"] == "Brazil"
+
+    # com o REGION_MAP inteiro, G20/BRICS põem China e Índia entre os "vizinhos" do Brasil
+    assert vdem_cube.spillover_regional(df, mapa, ["v2x_libdem"]).loc[brasil].iloc[0, 0] > 0
+    geo = vdem_cube.regioes_geograficas(mapa)
+    assert not set(geo) & set(vdem_cube.AGRUPAMENTOS_POLITICOS)
+    assert vdem_cube.spillover_regional(df, geo, ["v2x_libdem"]).loc[brasil].iloc[0, 0] == 0
+
+
+def test_mqo_e_probit_contra_referencia():
+    rng = np.random.default_rng(5)
+    X = np.column_stack([np.ones(400), rng.normal(size=(400, 2))])
+    y = X @ [0.5, 1.0, -2.0] + rng.normal(size=400)
+    w = rng.integers(0, 4, 400).astype(float)
+    ref, *_ = np.linalg.lstsq(X * np.sqrt(w)[:, None], y * np.sqrt(w), rcond=None)
+    np.testing.assert_allclose(vdem_teffects.mqo(y, X, w), ref, rtol=1e-10)
+
+    d = (X @ [0.2, 0.8, -0.5] + rng.normal(size=400) > 0).astype(float)
+    g = vdem_teffects.probit(d, X, w)
+    # condição de 1ª ordem da verossimilhança ponderada: Σ w·(d − Φ)·φ/(Φ(1−Φ))·z = 0
+    xb = X @ g
+    F, f = vdem_teffects.norm_cdf(xb), vdem_teffects.norm_pdf(xb)
+    np.testing.assert_allclose(X.T @ (w * (d - F) * f / (F * (1 - F))), 0, atol=1e-8)
+
+
+def test_teffects_recupera_efeito_endogeno():
+    df = _painel_te()
+    res = vdem_teffects.estimar(df, ESPEC_TESTE, n_boot=0)
+    tab = res["tabela"].set_index("termo")
+    p = vdem_teffects.montar_painel(df, ESPEC_TESTE)
+    ingenuo = np.linalg.lstsq(np.column_stack([p["X"][:, :3], p["d"]]), p["y"], rcond=None)[0][-1]
+
+    assert abs(ingenuo - 0.4) > 0.5  # o MQO ingênuo pega a correlação com o choque
+    assert abs(tab.loc["ATE", "comum"] - 0.4) < 0.1
+    assert abs(tab.loc["ATE", "potenciais"] - 0.4) < 0.1
+    assert res["n_obs"] == len(p["y"]) and res["n_paises"] == 80
+    # a versão pontual da curva de especificações tem o mesmo δ
+    assert vdem_teffects.efeito_pontual(df, ESPEC_TESTE)["efeito"] == pytest.approx(tab.loc["ATE", "comum"], rel=1e-9)
+
+
+def test_efeito_pontual_com_residuo_generalizado_constante(monkeypatch):
+    # probit degenerado: a coluna do resíduo generalizado sai por ser constante, δ continua sendo o de d
+    df = _painel_te()
+    monkeypatch.setattr(vdem_teffects, "residuo_generalizado", lambda d, xb: np.zeros_like(d))
+    p = vdem_teffects.montar_painel(df, ESPEC_TESTE)
+    ref = np.linalg.lstsq(np.column_stack([p["X"], p["d"]]), p["y"], rcond=None)[0][-1]
+    assert vdem_teffects.efeito_pontual(df, ESPEC_TESTE)["efeito"] == pytest.approx(ref, rel=1e-9)
+
+
+# ==========================
+# CONTROLE SINTÉTICO (vdem_synthcontrol)
+# ==========================
+def _simplex_bissecao(v, permitido):
+    """Referência: θ por bisseção em Σ max(v − θ, 0) = 1 nas colunas permitidas."""
+    v = v[permitido]
+    lo, hi = v.min() - 1, v.max()
+    for _ in range(200):
+        th = (lo + hi) / 2
+        lo, hi = (th, hi) if np.maximum(v - th, 0).sum() > 1 else (lo, th)
+    out = np.zeros(len(permitido))
+    out[permitido] = np.maximum(v - th, 0)
+    return out
+
+
+def test_projecao_no_simplex_igual_a_bissecao():
+    rng = np.random.default_rng(8)
+    V = rng.normal(size=(20, 7)) * 2
+    permitido = rng.random((20, 7)) > 0.3
+    permitido[:, 0] = True
+    P = vdem_synthcontrol.projetar_simplex(V, permitido)
+    ref = np.vstack([_simplex_bissecao(V[b], permitido[b]) for b in range(len(V))])
+    np.testing.assert_allclose(P, ref, atol=1e-10)
+
+
+def test_pesos_satisfazem_kkt():
+    # alvo fora do casco convexo dos doadores: a solução fica na borda do simplex
+    rng = np.random.default_rng(9)
+    M = rng.normal(size=(25, 6))
+    alvos = rng.normal(size=(5, 25))
+    permitido = np.ones((5, 6), dtype=bool)
+    permitido[1:] = ~np.eye(6, dtype=bool)[:4, :]
+    W = vdem_synthcontrol.resolver_pesos(M, alvos, permitido, iters=20000, tol=1e-12)
+    np.testing.assert_allclose(W.sum(1), 1)
+    assert (W >= 0).all() and (W[~permitido] == 0).all()
+    for w, b, ok in zip(W, alvos, permitido):
+        g = M.T @ (M @ w - b)  # gradiente: igual nos pesos positivos, maior ou igual nos nulos
+        pos = w > 1e-8
+        np.testing.assert_allclose(g[pos], g[pos].mean(), atol=1e-6)
+        assert (g[ok & ~pos] >= g[pos].mean() - 1e-6).all()
+
+
+def test_controle_sintetico_recupera_pesos_e_efeito():
+    rng = np.random.default_rng(4)
+    anos = np.arange(1960, 1996)
+    base = np.cumsum(rng.normal(scale=0.05, size=(len(anos), 8)), 0) + rng.uniform(0.2, 0.8, 8)
+    alvo = base[:, [2, 5]] @ [0.3, 0.7] + np.where(anos >= 1980, 0.25, 0.0)
+    linhas = [(f"D{j}", a, base[t, j], 0.0) for j in range(8) for t, a in enumerate(anos)]
+    linhas += [("Alvo", a, alvo[t], float(a >= 1980)) for t, a in enumerate(anos)]
+    # entra na ONU dentro da janela: não pode ser doador, mesmo com a série idêntica à do alvo
+    linhas += [("Membro", a, alvo[t] - 0.25 * (a >= 1980), float(a >= 1985)) for t, a in enumerate(anos)]
+    df = pd.DataFrame(linhas, columns=["country_name", "year", "v2x_libdem", "un_member"])
+
+    res = vdem_synthcontrol.controle_sintetico(df, "Alvo", 1980, pre=20, pos=15, workers=1)
+    pesos = res["pesos"].set_index("country_name")["peso"]
+    assert res["n_doadores"] == 8 and "Membro" not in pesos.index
+    np.testing.assert_allclose(pesos.sort_index(), [0.3, 0.7], atol=1e-5)
+    gap = res["serie"].eval("real - sintetico").to_numpy()
+    np.testing.assert_allclose(gap[res["serie"]["year"] >= 1980], 0.25, atol=1e-5)
+    assert res["rmspe_pre"] < 1e-5
+    assert res["p_valor"] == pytest.approx(1 / 9)  # a maior razão RMSPE pós/pré entre os 9
+
+
+# ==========================
+# VARIÁVEIS RELACIONADAS (vdem_related)
+# ==========================
+def _base_correlacionada(seed=12, n=300, v=9):
+    rng = np.random.default_rng(seed)
+    f = rng.normal(size=(n, 2))
+    X = f @ rng.normal(size=(2, v)) + rng.normal(scale=0.7, size=(n, v))
+    X[rng.random((n, v)) < 0.2] = np.nan  # lacunas diferentes em cada coluna
+    return pd.DataFrame(X, columns=[f"v{j}" for j in range(v)])
+
+
+def test_artefato_com_fingerprint_de_outra_base(tmp_path):
+    df = _base_correlacionada()
+    base = tmp_path / "vdem_all.parquet"
+    df.to_parquet(base)
+    rel = vdem_related.top_k(df, df.columns, k=3)
+    art = vdem_related.gravar(rel, tmp_path / "vdem_related.parquet", vdem_related.fingerprint_da_base(base, 3))
+
+    assert set(vdem_related.carregar(art, vdem_related.fingerprint_da_base(base, 3))) == set(df.columns)
+    assert vdem_related.carregar(art) is not None  # sem fp: não confere
+    df.assign(v9=1.0).to_parquet(base)  # base com outra coluna → outro fingerprint
+    assert vdem_related.carregar(art, vdem_related.fingerprint_da_base(base, 3)) is None
+
+
+@pytest.mark.parametrize("bloco", [4, 512])
+def test_top_k_igual_a_dataframe_corr(bloco):
+    df = _base_correlacionada()
+    rel = vdem_related.top_k(df, df.columns, k=3, bloco=bloco)
+    ref = df.corr(min_periods=vdem_related.MIN_OBS)
+    obs = df.notna().astype(int)
+    pares = obs.T @ obs
+    for v, g in rel.groupby("variavel", observed=True):
+        esperado = ref[v].drop(v).abs().sort_values(ascending=False, kind="stable").head(3)
+        assert list(g["relacionada"].astype(str)) == list(esperado.index)
+        np.testing.assert_allclose(g["r"], ref.loc[esperado.index, v], rtol=1e-5)
+        assert list(g["n"]) == list(pares.loc[esperado.index, v])
+
+
+def test_matriz_correlacao_igual_a_dataframe_corr():
+    df = _base_correlacionada()
+    r, _ = vdem_related.matriz_correlacao(df, df.columns)
+    np.testing.assert_allclose(r, df.corr(min_periods=10).to_numpy(), rtol=1e-10)
+    assert sorted(vdem_related.ordem_cluster(r)) == list(range(df.shape[1]))
+
+
+# ==========================
+# EPISÓDIOS E PONTOS DE MUDANÇA (vdem_episodios)
+# ==========================
+SERIES_EPISODIOS = {
+    # 1990 … 2001
+    "Sobe": [.50, .50, .50, .50, .50, .55, .60, .65, .70, .75, .75, .75],
+    "Cai com pausa": [.80, .80, .80, .76, .72, .68, .68, .68, .64, .60, .60, .60],
+    "Sobe pouco": [.40, .40, .40, .42, .44, .46, .46, .46, .46, .46, .46, .46],
+    "Dois surtos": [.30, .30, .30, .35, .40, .45, .42, .47, .52, .57, .57, .57],
+    "Lacuna": [.20, .20, .20, .25, .30, np.nan, .40, .45, .45, .45, .45, .45],
+}
+
+
+def _df_series(series, ano0=1990, variavel="v2x_libdem"):
+    return pd.DataFrame([(p, ano0 + t, v) for p, vs in series.items() for t, v in enumerate(vs)],
+                        columns=["country_name", "year", variavel])
+
+
+def test_episodios_em_fixture_montada_a_mao():
+    ep = vdem_episodios.episodios(_df_series(SERIES_EPISODIOS), "v2x_libdem")
+    got = ep[["country_name", "tipo", "inicio", "fim", "duracao"]].values.tolist()
+    assert got == [
+        ["Cai com pausa", "autocratização", 1993, 1999, 7],  # a pausa de 2 anos é tolerada
+        ["Dois surtos", "democratização", 1993, 1995, 3],    # o recuo de 0,03 em 1996 separa os dois
+        ["Dois surtos", "democratização", 1997, 1999, 3],
+        ["Lacuna", "democratização", 1993, 1997, 5],         # 1995 interpolado
+        ["Sobe", "democratização", 1995, 1999, 5],
+    ]  # "Sobe pouco" acumula 0,06 < limiar_total
+    np.testing.assert_allclose(ep["valor_inicio"], [.80, .30, .42, .20, .50])
+    np.testing.assert_allclose(ep["variacao"], [-.20, .15, .15, .25, .25])
+
+    anual = vdem_episodios.resumo_anual(ep).set_index("year")
+    assert anual.loc[1995].tolist() == [3, 1]  # Dois surtos, Lacuna, Sobe; Cai com pausa
+    assert anual.loc[1996].tolist() == [2, 1]
+
+
+def test_pontos_de_mudanca_em_degrau():
+    df = _df_series({
+        "Degrau": [.2] * 15 + [.8] * 15,
+        "Dois degraus": [.1] * 10 + [.5] * 10 + [.3] * 10,
+        "Plano": [.4] * 30,
+    })
+    pm = vdem_episodios.pontos_de_mudanca(df, "v2x_libdem")
+    assert pm[["country_name", "year"]].values.tolist() == [
+        ["Degrau", 2005], ["Dois degraus", 2000], ["Dois degraus", 2010],
+    ]
+    np.testing.assert_allclose(pm[["antes", "depois"]].to_numpy(), [[.2, .8], [.1, .5], [.5, .3]], atol=1e-12)
+
+
+# ==========================
+# INTERVALOS DE CONFLITOS E EVENTOS (vdem_eventos)
+# ==========================
+def _df_eventos():
+    n = np.nan
+    colunas = {
+        # 1990 … 1999
+        "A": {"e_civil_war": [0, 1, 1, 0, 0, 1, 1, 1, 0, 0],
+              "v2x_regime": [0, 0, 1, 1, 1, 2, 2, 2, 2, 2],
+              "un_member": [0, 0, 0, 0, 0, 1, 1, 1, 1, 1],
+              "v2x_polyarchy": [.5, .5, .4, .3, .3, .3, .2, .1, .1, .1]},
+        "B": {"e_civil_war": [1, 1, 0, 0, n, 1, 0, 0, 0, 0],
+              "v2x_regime": [1, 1, 1, 1, 1, 1, n, 2, 2, 2],
+              "un_member": [1] * 10,
+              "v2x_polyarchy": [.6, .6, .6, .6, .7, .7, .7, .8, .8, .8]},
+        "C": {"e_civil_war": [n] * 10, "v2x_regime": [3] * 10, "un_member": [0] * 10,
+              "v2x_polyarchy": [.9] * 10},
+    }
+    linhas = [{"country_name": p, "year": 1990 + t, "e_miinteco": 0.0, **{c: v[t] for c, v in cs.items()}}
+              for p, cs in colunas.items() for t in range(10)]
+    return pd.DataFrame(linhas)
+
+
+def test_intervalos_em_fixture_montada_a_mao():
+    iv = vdem_eventos.construir_intervalos(_df_eventos())
+    got = iv.assign(country_name=iv["country_name"].astype(str), evento=iv["evento"].astype(str))
+    assert got.values.tolist() == [
+        ["A", "guerra_civil", 1991, 1992, False],
+        ["A", "mudanca_regime", 1992, 1992, False],
+        ["A", "guerra_civil", 1995, 1997, False],
+        ["A", "membro_onu", 1995, 1999, False],
+        ["A", "mudanca_regime", 1995, 1995, False],
+        ["B", "guerra_civil", 1990, 1991, True],    # começa no 1º ano da base
+        ["B", "membro_onu", 1990, 1999, True],
+        ["B", "guerra_civil", 1995, 1995, True],    # 1994 sem dado: início censurado
+    ]  # regime de B muda entre 1995 e 1997, mas 1996 falta: não conta
+    assert iv["inicio"].dtype == np.int16 and iv["fim"].dtype == np.int16
+
+    sub = vdem_eventos.no_periodo(iv, ["A"], (1996, 1998), ["guerra_civil", "membro_onu"])
+    assert sub[["inicio", "fim", "rotulo"]].values.tolist() == [
+        [1996, 1997, "Guerra civil"], [1996, 1998, "Membro da ONU"],
+    ]
+
+
+def test_mudanca_apos_inicio_igual_a_laco():
+    df = _df_eventos()
+    iv = vdem_eventos.construir_intervalos(df)
+    res = vdem_eventos.mudanca_apos_inicio(df, iv, "guerra_civil", "v2x_polyarchy", n=2)
+    # só os inícios de A entram (os de B são censurados)
+    assert res["inicios"][["country_name", "inicio"]].values.tolist() == [["A", 1991], ["A", 1995]]
+    h = res["horizontes"]
+    np.testing.assert_allclose(h["media"], [0, -.1, -.2], atol=1e-12)
+    assert h["n_inicios"].tolist() == [2, 2, 2]
+
+    Y = df.pivot(index="country_name", columns="year", values="v2x_polyarchy").to_numpy()
+    for hh in range(3):
+        ref = [Y[c, t + hh] - Y[c, t - 1] for c in range(3) for t in range(1, 10 - hh)]
+        assert h["media_base"][hh] == pytest.approx(np.mean(ref))
+
+
+# ==========================
+# COBERTURA EM BITS (vdem_coverage)
+# ==========================
+@pytest.mark.parametrize("year_range", [None, (1993, 2009), (2000, 2000)])
+def test_cobertura_igual_a_notna_sum(year_range):
+    rng = np.random.default_rng(13)
+    # 21 anos: o último byte do índice fica incompleto; um país sem alguns anos
+    df = pd.DataFrame([(f"P{i}", 1990 + t) for i in range(6) for t in range(21)], columns=["country_name", "year"])
+    df = df.drop(index=range(5, 9)).reset_index(drop=True)
+    for v in ("a", "b", "c"):
+        df[v] = np.where(rng.random(len(df)) < 0.4, np.nan, 1.0)
+    df["c"] = np.nan
+    idx = vdem_coverage.construir_indice(df, ["a", "b", "c"])
+
+    paises = ["P0", "P2", "P5", "Fora da base"]
+    cob = vdem_coverage.cobertura(idx, paises, year_range)
+    sel = df[df["country_name"].isin(paises)]
+    if year_range is not None:
+        sel = sel[sel["year"].between(*year_range)]
+    n_anos = 21 if year_range is None else year_range[1] - year_range[0] + 1
+    ref = sel[["a", "b", "c"]].notna().sum() / (3 * n_anos)  # país-ano que falta na base conta como sem dado
+    pd.testing.assert_series_equal(cob, ref, check_names=False)
+
+
+# ==========================
+# AGRUPAMENTO DE TRAJETÓRIAS (vdem_trajetorias)
+# ==========================
+@pytest.mark.parametrize("metodo", ["kmeans", "hierarquico"])
+def test_agrupar_com_menos_trajetorias_distintas_que_k(metodo):
+    X = np.repeat([[0.0, 0.0], [1.0, 1.0], [5.0, 5.0]], 4, axis=0)
+    res = vdem_trajetorias.agrupar(X, 5, metodo)
+    assert res["rotulos"].tolist() == [0] * 4 + [1] * 4 + [2] * 4
+    assert res["medoides"].tolist() == [0, 4, 8]
+
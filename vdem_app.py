@@ -1,3 +1,4 @@
+import os
 import streamlit as st
 import pandas as pd
 import time
@@ -6,12 +7,14 @@ from natsort import natsorted
 
 st.set_page_config(layout="wide", page_title="Democracias no Mundo")
 
-# Carregamento de dados
+# Carregamento de dados (VDEM_DATA_DIR permite apontar para outra pasta, ex.: base de benchmark)
+DATA_DIR = os.environ.get("VDEM_DATA_DIR", "C:/PROJECTS/P1-VDEM_dashboard")
+
 @st.cache_data
 def load_data():
     try:
-        df_dados = pd.read_csv("C:/PROJECTS/P1-VDEM_dashboard/UNdem-All.csv")
-        df_indice = pd.read_csv("C:/PROJECTS/P1-VDEM_dashboard/indicadoresVDEM.csv")
+        df_dados = pd.read_csv(f"{DATA_DIR}/UNdem-All.csv")
+        df_indice = pd.read_csv(f"{DATA_DIR}/indicadoresVDEM.csv")
         return df_dados, df_indice
     except Exception as e:
         st.error(f"Erro ao carregar dados: {e}")
@@ -91,7 +94,7 @@ selected_variavel = st.sidebar.selectbox(
     variavel_options,
     format_func=lambda x: f"{x} - {df_indice[df_indice['id'] == x]['Descricao'].values[0]}"
 )
-st.sidebar.markdown(f"{df_indice["Descricao"].get(selected_variavel, '')}")
+st.sidebar.markdown(f"{df_indice['Descricao'].get(selected_variavel, '')}")
 
 # Tabela com as descrições
 if not selected_variavel == None:
@@ -0,0 +1,104 @@
+"""
+Índice de cobertura (não-nulos) por variável × país × ano, em bits.
+
+Cada variável vira uma matriz país × ano de 0/1 empacotada com np.packbits ao
+longo dos anos (8 anos por byte). Uma consulta (países escolhidos + período)
+é um AND com a máscara de anos empacotada e uma contagem de bits por tabela
+(POPCOUNT), para todas as variáveis de uma vez — sem varrer as colunas.
+
+    idx = construir_indice(df, variaveis)
+    cobertura(idx, ["Brazil", "Chile"], (1990, 2020))   # Series variável → fração coberta
+
+Também o índice "as-of" de uma variável: para cada país e ano, a posição do
+último ano com dado até ali (np.maximum.accumulate), o que dá o "último valor
+disponível até o ano X" de todos os países num lookup só.
+
+    asof = indice_asof(df, "v2x_libdem")
+    ultimo_valor(asof, 2020, desde=1990)   # country_name, valor, ano_fonte
+"""
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+POPCOUNT = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(1).astype(np.int64)
+CHUNK = 256  # variáveis por bloco na construção (limita a memória do array denso)
+
+
+def construir_indice(df: pd.DataFrame, variaveis) -> dict:
+    """{"variaveis", "paises", "ano0", "n_anos", "bits" (V × C × ⌈anos/8⌉ uint8)}."""
+    variaveis = [v for v in variaveis if v in df.columns]
+    paises, ci = np.unique(df["country_name"].astype(str).to_numpy(), return_inverse=True)
+    anos = pd.to_numeric(df["year"], errors="coerce").to_numpy()
+    ok = ~np.isnan(anos)
+    ano0 = int(anos[ok].min())
+    n_anos = int(anos[ok].max()) - ano0 + 1
+    ci, yi = ci[ok], anos[ok].astype(int) - ano0
+
+    bits = np.zeros((len(variaveis), len(paises), (n_anos + 7) // 8), dtype=np.uint8)
+    for a in range(0, len(variaveis), CHUNK):
+        bloco = variaveis[a:a + CHUNK]
+        nn = df.loc[ok, bloco].notna().to_numpy()
+        denso = np.zeros((len(bloco), len(paises), n_anos), dtype=bool)
+        denso[:, ci, yi] = nn.T
+        bits[a:a + len(bloco)] = np.packbits(denso, axis=2)
+    return {"variaveis": variaveis, "paises": paises, "ano0": ano0, "n_anos": n_anos, "bits": bits}
+
+
+def _mascara_anos(idx: dict, year_range) -> tuple[np.ndarray, int]:
+    """Máscara empacotada dos anos do período e quantos anos ela cobre."""
+    anos = np.arange(idx["n_anos"]) + idx["ano0"]
+    m = np.ones(idx["n_anos"], dtype=bool) if year_range is None else \
+        (anos >= year_range[0]) & (anos <= year_range[1])
+    return np.packbits(m), int(m.sum())
+
+
+def cobertura(idx: dict, paises, year_range=None, variaveis=None) -> pd.Series:
+    """Fração dos país-anos da seleção com dado, por variável (0 = nada a mostrar)."""
+    pos_v = {v: i for i, v in enumerate(idx["variaveis"])}
+    variaveis = idx["variaveis"] if variaveis is None else [v for v in variaveis if v in pos_v]
+    vi = np.array([pos_v[v] for v in variaveis], dtype=int)
+    pos_c = {p: i for i, p in enumerate(idx["paises"])}
+    ci = np.array([pos_c[p] for p in paises if p in pos_c], dtype=int)
+    mascara, n_anos = _mascara_anos(idx, year_range)
+    total = len(ci) * n_anos
+    if not total or not len(vi):
+        return pd.Series(0.0, index=variaveis, dtype=float)
+    sub = idx["bits"][vi[:, None], ci[None, :], :] & mascara
+    return pd.Series(POPCOUNT[sub].sum(axis=(1, 2)) / total, index=variaveis)
+
+
+# ==========================
+# AS-OF (último valor disponível)
+# ==========================
+def indice_asof(df: pd.DataFrame, variavel: str) -> dict:
+    """{"paises", "ano0", "valores" (C × anos), "ultimo" (C × anos: índice do último ano com dado, −1 se nenhum)}."""
+    paises, ci = np.unique(df["country_name"].astype(str).to_numpy(), return_inverse=True)
+    anos = pd.to_numeric(df["year"], errors="coerce").to_numpy()
+    v = pd.to_numeric(df[variavel], errors="coerce").to_numpy(dtype=float)
+    ok = ~np.isnan(anos)
+    ano0 = int(anos[ok].min())
+    n_anos = int(anos[ok].max()) - ano0 + 1
+    valores = np.full((len(paises), n_anos), np.nan)
+    valores[ci[ok], anos[ok].astype(int) - ano0] = v[ok]
+    pos = np.where(~np.isnan(valores), np.arange(n_anos), -1)
+    ultimo = np.maximum.accumulate(pos, axis=1).astype(np.int32)
+    return {"paises": paises, "ano0": ano0, "valores": valores, "ultimo": ultimo}
+
+
+def ultimo_valor(asof: dict, ano: int, desde: int | None = None) -> pd.DataFrame:
+    """Último valor de cada país até `ano` (e não antes de `desde`), com o ano de onde veio."""
+    n_anos = asof["valores"].shape[1]
+    j = int(np.clip(ano - asof["ano0"], -1, n_anos - 1))
+    if j < 0:
+        return pd.DataFrame(columns=["country_name", "valor", "ano_fonte"])
+    k = asof["ultimo"][:, j]
+    ok = k >= 0
+    if desde is not None:
+        ok &= k >= desde - asof["ano0"]
+    linhas = np.flatnonzero(ok)
+    return pd.DataFrame({
+        "country_name": asof["paises"][linhas],
+        "valor": asof["valores"][linhas, k[linhas]],
+        "ano_fonte": k[linhas] + asof["ano0"],
+    })
@@ -0,0 +1,289 @@
+"""
+Cubo de agregados região × ano × variável (média, mediana, contagem e média
+ponderada pela população), pré-calculado e gravado como artefato Parquet.
+
+As médias saem de um produto de matrizes: pertinência região×país (0/1)
+vezes os arrays país×(ano·variável). A mediana é por região, vetorizada nos
+anos e variáveis. "World" é a região com todos os países.
+
+Uso nos apps (lê o artefato se estiver em dia, senão calcula e grava):
+    cube = vdem_cube.load_or_build(df, REGION_MAP, variables, artifact, source)
+
+Job em lote:
+    python vdem_cube.py vdem_all.parquet [--regions-from vdem_dashboard_multipage.py] [--out vdem_cube.parquet]
+"""
+from __future__ import annotations
+
+import argparse
+import ast
+import hashlib
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+WORLD = "World"
+WEIGHT_VAR = "e_pop"
+EXTRA_CORE = ["e_gdppc", "e_peaveduc", "e_pop", "e_civil_war", "e_miinteco"]
+STATS = ["mean", "median", "count", "mean_pop"]
+META_KEY = b"vdem_cube"
+# chaves do REGION_MAP que são agrupamentos políticos, não vizinhança geográfica
+AGRUPAMENTOS_POLITICOS = ("Conselho de Segurança (ONU)", "G7", "G20", "BRICS")
+
+
+def core_variables(columns) -> list[str]:
+    """Variáveis do cubo: índices v2x_* (sem as companheiras) + fatores externos principais."""
+    cols = list(columns)
+    skip = ("_sd", "_osp", "_codelow", "_codehigh", "_ord", "_mean", "_nr")
+    core = [c for c in cols if c.startswith("v2x_") and not c.endswith(skip)]
+    return core + [c for c in EXTRA_CORE if c in cols and c not in core]
+
+
+def regions_with_world(region_map: dict) -> dict:
+    """REGION_MAP sem a chave "None" e com "World" (todos os países) no começo."""
+    out = {WORLD: None}
+    out.update({k: v for k, v in region_map.items() if k != "None" and v})
+    return out
+
+
+def regioes_geograficas(region_map: dict) -> dict:
+    """REGION_MAP só com as regiões geográficas (sem "None" e sem os agrupamentos políticos)."""
+    return {k: v for k, v in region_map.items() if k != "None" and k not in AGRUPAMENTOS_POLITICOS and v}
+
+
+def fingerprint(region_map: dict, variables, source=None) -> str:
+    """Identifica o cubo: mapa de regiões, variáveis e (tamanho, mtime) da base de origem."""
+    h = hashlib.sha1()
+    h.update(json.dumps(region_map, sort_keys=True, ensure_ascii=False).encode())
+    h.update(json.dumps(list(variables)).encode())
+    if source is not None and Path(source).exists():
+        st_ = Path(source).stat()
+        h.update(f"{st_.st_size}:{int(st_.st_mtime)}".encode())
+    return h.hexdigest()
+
+
+# ==========================
+# CÁLCULO
+# ==========================
+def _country_year_arrays(df: pd.DataFrame, variables, weight):
+    """Arrays densos país × ano × variável (NaN onde não há observação)."""
+    countries, ci = np.unique(df["country_name"].astype(str).to_numpy(), return_inverse=True)
+    years_all = pd.to_numeric(df["year"], errors="coerce").to_numpy()
+    ok = ~np.isnan(years_all)
+    y0, y1 = int(years_all[ok].min()), int(years_all[ok].max())
+    years = np.arange(y0, y1 + 1)
+    yi = years_all[ok].astype(int) - y0
+    ci = ci[ok]
+
+    X = np.full((len(countries), len(years), len(variables)), np.nan)
+    X[ci, yi, :] = df.loc[ok, list(variables)].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+    W = None
+    if weight is not None and weight in df.columns:
+        W = np.full((len(countries), len(years)), np.nan)
+        W[ci, yi] = pd.to_numeric(df.loc[ok, weight], errors="coerce").to_numpy(dtype=float)
+    return countries, years, X, W
+
+
+def build_cube(df: pd.DataFrame, region_map: dict, variables=None, weight: str | None = WEIGHT_VAR) -> pd.DataFrame:
+    """
+    Cubo longo: region, year, variable, mean, median, count, mean_pop.
+    mean_pop é a média ponderada por `weight` (NaN se a base não tiver a coluna).
+    """
+    variables = list(variables) if variables is not None else core_variables(df.columns)
+    regions = regions_with_world(region_map)
+    countries, years, X, W = _country_year_arrays(df, variables, weight)
+    n_c, n_y, n_v = X.shape
+
+    # pertinência região × país
+    pos = {c: i for i, c in enumerate(countries)}
+    M = np.zeros((len(regions), n_c))
+    for r, members in enumerate(regions.values()):
+        if members is None:
+            M[r, :] = 1.0
+        else:
+            M[r, [pos[c] for c in members if c in pos]] = 1.0
+
+    obs = ~np.isnan(X)
+    flat = lambda a: a.reshape(n_c, n_y * n_v)  # noqa: E731
+    count = M @ flat(obs.astype(float))
+    sums = M @ flat(np.where(obs, X, 0.0))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = sums / count
+        if W is not None:
+            w = np.where(obs & ~np.isnan(W)[:, :, None], W[:, :, None], 0.0)
+            mean_pop = (M @ flat(w * np.where(obs, X, 0.0))) / (M @ flat(w))
+        else:
+            mean_pop = np.full_like(mean, np.nan)
+
+    median = np.full((len(regions), n_y, n_v), np.nan)
+    for r in range(len(regions)):
+        members = M[r] > 0
+        if members.any():
+            sub = X[members]
+            has = obs[members].any(axis=0)
+            med = np.full((n_y, n_v), np.nan)
+            if has.any():
+                med[has] = np.nanmedian(sub[:, has], axis=0)
+            median[r] = med
+
+    R, Y, V = np.meshgrid(np.arange(len(regions)), years, np.arange(n_v), indexing="ij")
+    cube = pd.DataFrame({
+        "region": pd.Categorical.from_codes(R.ravel(), list(regions)),
+        "year": Y.ravel().astype("int32"),
+        "variable": pd.Categorical.from_codes(V.ravel(), variables),
+        "mean": mean.ravel().astype("float32"),
+        "median": median.ravel().astype("float32"),
+        "count": count.ravel().astype("int32"),
+        "mean_pop": mean_pop.ravel().astype("float32"),
+    })
+    return cube[cube["count"] > 0].reset_index(drop=True)
+
+
+def spillover_regional(df: pd.DataFrame, regions, variables, sufixo: str = "_reg_loo") -> pd.DataFrame:
+    """
+    Média "deixa-um-fora" de cada variável sobre os vizinhos regionais do país,
+    menos ele próprio. `regions` é:
+
+    - um dict região → países (regioes_geograficas(REGION_MAP); G20, BRICS etc.
+      não são vizinhança): vizinhos são os países que dividem pelo menos uma
+      região com ele, (pertinência país×região)·(região×país) > 0
+      sem a diagonal, e as médias saem de um produto de matrizes;
+    - ou o nome de uma coluna de df com o código da região em cada país-ano
+      (ex.: e_regionpol_6C): vizinhos são os países com o mesmo código no mesmo
+      ano, e as médias saem de somas por região × ano menos o próprio país.
+
+    Devolve colunas `<var><sufixo>` alinhadas ao índice de df (NaN para países
+    sem região ou sem vizinho observado).
+    """
+    variables = list(variables)
+    countries, years, X, _ = _country_year_arrays(df, variables, None)
+    n_c, n_y, n_v = X.shape
+    obs = ~np.isnan(X)
+
+    if isinstance(regions, str):
+        _, _, R, _ = _country_year_arrays(df, [regions], None)
+        R = R[:, :, 0]
+        tem = ~np.isnan(R)
+        _, g = np.unique(np.where(tem, R, -1), return_inverse=True)
+        g = g.reshape(n_c, n_y) * n_y + np.arange(n_y)  # grupo = região × ano
+        n_g = int(g.max()) + 1
+        loo = np.full(X.shape, np.nan)
+        for v in range(n_v):
+            x, o = np.where(obs[:, :, v], X[:, :, v], 0.0), obs[:, :, v].astype(float)
+            s = np.bincount(g.ravel(), x.ravel(), n_g)[g] - x
+            n = np.bincount(g.ravel(), o.ravel(), n_g)[g] - o
+            with np.errstate(invalid="ignore", divide="ignore"):
+                loo[:, :, v] = np.where(tem & (n > 0), s / n, np.nan)
+    else:
+        pos = {c: i for i, c in enumerate(countries)}
+        regioes = [m for m in regions.values() if m]
+        M = np.zeros((len(regioes), n_c))
+        for r, members in enumerate(regioes):
+            M[r, [pos[c] for c in members if c in pos]] = 1.0
+        A = (M.T @ M) > 0
+        np.fill_diagonal(A, False)
+        A = A.astype(float)
+
+        flat = lambda a: a.reshape(n_c, n_y * n_v)  # noqa: E731
+        with np.errstate(invalid="ignore", divide="ignore"):
+            loo = (A @ flat(np.where(obs, X, 0.0))) / (A @ flat(obs.astype(float)))
+        loo = loo.reshape(n_c, n_y, n_v)
+
+    _, ci = np.unique(df["country_name"].astype(str).to_numpy(), return_inverse=True)
+    anos = pd.to_numeric(df["year"], errors="coerce").to_numpy()
+    ok = ~np.isnan(anos)
+    out = np.full((len(df), n_v), np.nan)
+    out[ok] = loo[ci[ok], anos[ok].astype(int) - years[0]]
+    return pd.DataFrame(out, index=df.index, columns=[v + sufixo for v in variables])
+
+
+# ==========================
+# ARTEFATO
+# ==========================
+def write_cube(cube: pd.DataFrame, path, fp: str) -> Path:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table = pa.Table.from_pandas(cube, preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), META_KEY: fp.encode()})
+    path = Path(path)
+    pq.write_table(table, path)
+    return path
+
+
+def read_cube(path, fp: str | None = None) -> pd.DataFrame | None:
+    """Lê o artefato; None se não existir ou se o fingerprint não bater."""
+    import pyarrow.parquet as pq
+
+    path = Path(path)
+    if not path.exists():
+        return None
+    meta = pq.read_schema(path).metadata or {}
+    if fp is not None and meta.get(META_KEY, b"").decode() != fp:
+        return None
+    return pq.read_table(path).to_pandas()
+
+
+def load_or_build(df: pd.DataFrame, region_map: dict, variables=None, artifact=None, source=None) -> pd.DataFrame:
+    """Artefato em dia → leitura direta; senão calcula e tenta gravar (pasta sem escrita é ok)."""
+    variables = list(variables) if variables is not None else core_variables(df.columns)
+    fp = fingerprint(region_map, variables, source)
+    if artifact is not None:
+        cube = read_cube(artifact, fp)
+        if cube is not None:
+            return cube
+    cube = build_cube(df, region_map, variables)
+    if artifact is not None:
+        try:
+            write_cube(cube, artifact, fp)
+        except OSError:
+            pass
+    return cube
+
+
+def trajectories(cube: pd.DataFrame, variable: str, regions, stat: str = "mean", year_range=None) -> pd.DataFrame:
+    """Fatia (region, year, valor) do cubo para o gráfico de trajetórias regionais."""
+    sub = cube[(cube["variable"] == variable) & cube["region"].isin(list(regions))]
+    if year_range is not None:
+        sub = sub[sub["year"].between(*year_range)]
+    out = sub[["region", "year", stat]].rename(columns={stat: "valor"}).dropna(subset=["valor"])
+    out["region"] = out["region"].astype(str)
+    return out
+
+
+def region_map_from_app(path) -> dict:
+    """Lê o REGION_MAP literal de um dos apps (sem executar o Streamlit)."""
+    tree = ast.parse(Path(path).read_text(encoding="utf-8"))
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(getattr(t, "id", None) == "REGION_MAP" for t in node.targets):
+            return ast.literal_eval(node.value)
+    raise LookupError(f"REGION_MAP não encontrado em {path}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Gera o cubo região × ano × variável.")
+    ap.add_argument("source", help="Base (Parquet ou CSV) com country_name, year e as variáveis.")
+    ap.add_argument("--regions-from", default=str(Path(__file__).with_name("vdem_dashboard_multipage.py")))
+    ap.add_argument("--out", help="Artefato de saída (padrão: vdem_cube.parquet ao lado da base).")
+    args = ap.parse_args(argv)
+
+    source = Path(args.source)
+    region_map = region_map_from_app(args.regions_from)
+    if source.suffix == ".parquet":
+        import pyarrow.parquet as pq
+        cols = core_variables(pq.read_schema(source).names)
+        df = pd.read_parquet(source, columns=["country_name", "year"] + cols)
+    else:
+        head = pd.read_csv(source, nrows=0).columns
+        cols = core_variables(head)
+        df = pd.read_csv(source, usecols=["country_name", "year"] + cols)
+    cube = build_cube(df, region_map, cols)
+    out = Path(args.out) if args.out else source.with_name("vdem_cube.parquet")
+    write_cube(cube, out, fingerprint(region_map, cols, source))
+    linhas = f"{len(cube):_}".replace("_", ".")
+    print(f"{linhas} linhas ({cube['region'].nunique()} regiões × {cube['variable'].nunique()} variáveis) em {out}")
+
+
+if __name__ == "__main__":
+    main()
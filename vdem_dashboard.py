@@ -1,10 +1,22 @@
 import streamlit as st
 import altair as alt
+import plotly.express as px
 import pandas as pd
+import os
+import tempfile
 import time
 import numpy as np
 from pathlib import Path
 from natsort import natsorted
+import vdem_profiler as prof
+import vdem_metrics as metrics
+import vdem_synth
+import vdem_cube
+import vdem_stats
+import vdem_eventstudy
+import vdem_speccurve
+import vdem_episodios
+import vdem_eventos
 
 # C:\PROJECTS\.venv10\Scripts\Activate.ps1
 # cd C:\PROJECTS\P1-VDEM_dashboard
@@ -14,6 +26,8 @@ from natsort import natsorted
 # CONFIG & ESTILO
 # ==========================
 st.set_page_config(page_title="Democracias no Mundo", layout="wide")
+prof.begin_rerun("dashboard")
+metrics.install()  # /metrics (Prometheus) em VDEM_METRICS_PORT, uma vez por processo
 st.markdown("""
 <style>
 /* remove padding topo */
@@ -30,28 +44,19 @@ st.write("O desenvolvimento dos direitos civis e institucionais de cada país ao
 # ==========================
 # HELPERS
 # ==========================
-DATA_PATH = Path("C:/PROJECTS/P1-VDEM_dashboard/UNdem-All.csv")
+# VDEM_DATA_DIR aponta para outra pasta de dados (ex.: base sintética de benchmark)
+DATA_DIR = Path(os.environ.get("VDEM_DATA_DIR", "C:/PROJECTS/P1-VDEM_dashboard"))
+DATA_PATH = DATA_DIR / "UNdem-All.csv"
 
 def load_data():
     if DATA_PATH.exists():
         df = pd.read_csv(DATA_PATH)
     else:
-        # ---- fallback de demonstração (mock) ----
-        np.random.seed(7)
-        years = np.arange(1900, 2021)
-        countries = ["Brazil","Argentina","Chile","United States","Canada","France","Germany","United Kingdom","Japan","China","India","South Africa"]
-        recs = []
-        for c in countries:
-            base = np.linspace(0.2, 0.8, len(years)) + np.random.normal(0, 0.05, len(years))
-            recs.append(pd.DataFrame({
-                "country_name": c,
-                "year": years,
-                "v2x_polyarchy": np.clip(base, 0, 1),
-                "e_gdppc": np.clip(500 + 20*(years-1900) + np.random.normal(0, 500, len(years)), 300, None),
-                "e_peaveduc": np.clip(2 + 0.03*(years-1900) + np.random.normal(0, 0.2, len(years)), 0, 15),
-                "e_civil_war": (np.random.rand(len(years))>0.97).astype(int),
-            }))
-        df = pd.concat(recs, ignore_index=True)
+        # ---- fallback de demonstração (base sintética, ver vdem_synth.py) ----
+        df = vdem_synth.generate_frame(
+            n_countries=12, year_start=1900, year_end=2020,
+            variables=["v2x_polyarchy", "e_gdppc", "e_peaveduc", "e_civil_war"], seed=7,
+        )
         st.info("⚠️ Base real não encontrada. Exibindo dados de demonstração.")
     # garante tipos
     if "year" in df.columns:
@@ -70,6 +75,29 @@ def line_chart_altair(df, x, y, color=None, title=None):
     )
     return enc.properties(title=title).interactive()
 
+def fitted_line(coefs, ano, sub, x, v):
+    """Reta y = a + b·x do ano (coeficientes do servidor) sobre a faixa de x do corte."""
+    if ano not in coefs.index or sub.empty:
+        return None
+    a, b = coefs.loc[ano, ["intercepto", "inclinacao"]]
+    xs = np.array([sub[x].min(), sub[x].max()])
+    return alt.Chart(pd.DataFrame({x: xs, v: a + b * xs})).mark_line().encode(x=f"{x}:Q", y=f"{v}:Q")
+
+def coef_chart(coefs, title=None):
+    """Inclinação ano a ano com faixa de ±1,96 erro-padrão (R² e n no tooltip)."""
+    d = coefs.reset_index().rename(columns={"grupo": "year"})
+    d["li"] = d["inclinacao"] - 1.96 * d["ep_inclinacao"]
+    d["ls"] = d["inclinacao"] + 1.96 * d["ep_inclinacao"]
+    x = alt.X("year:Q", axis=alt.Axis(format="d"), title="Ano")
+    banda = alt.Chart(d).mark_area(opacity=0.25).encode(x=x, y=alt.Y("li:Q", title="Inclinação (IC 95%)"), y2="ls:Q")
+    linha = alt.Chart(d).mark_line().encode(
+        x=x, y="inclinacao:Q",
+        tooltip=["year:Q", alt.Tooltip("inclinacao:Q", format=".4f"), alt.Tooltip("ep_inclinacao:Q", format=".4f"),
+                 alt.Tooltip("r2:Q", format=".3f"), "n:Q"],
+    )
+    zero = alt.Chart(pd.DataFrame({"y": [0]})).mark_rule(strokeDash=[4, 4], color="gray").encode(y="y:Q")
+    return (banda + linha + zero).properties(title=title).interactive()
+
 def group_mean_over_time(df, group_col, value_col, year_col="year"):
     g = (df
          .groupby([year_col, group_col], as_index=False)[value_col]
@@ -191,13 +219,75 @@ GROUP_MAP = {
 @st.cache_data
 def load_data():
     try:
-        df = pd.read_csv("C:/PROJECTS/P1-VDEM_dashboard/UNdem-All.csv")
+        df = pd.read_csv(DATA_PATH)
         time.sleep(1.5)
         return df
     except Exception as e:
         st.error(f"Erro ao carregar dados principais: {e}")
 
-df = load_data()
+with prof.span("load_data"):
+    df = load_data()
+
+# Índice ano → posições das linhas: o corte transversal de um ano vira um
+# fatiamento direto (iloc) em vez de varrer a base com df["year"] == ano.
+@st.cache_data
+def build_year_index(_df, source):
+    anos = pd.to_numeric(_df["year"], errors="coerce").to_numpy(dtype=float)
+    ordem = np.argsort(anos, kind="stable")
+    anos_ord = anos[ordem]
+    validos = ~np.isnan(anos_ord)
+    ordem, anos_ord = ordem[validos], anos_ord[validos]
+    unicos, inicios = np.unique(anos_ord, return_index=True)
+    fins = np.append(inicios[1:], len(anos_ord))
+    return {int(a): ordem[i:j] for a, i, j in zip(unicos, inicios, fins)}
+
+def cross_section(df, year_index, anos, cols):
+    """Linhas dos anos pedidos (um int ou uma sequência), só nas colunas `cols`."""
+    anos = [anos] if np.isscalar(anos) else anos
+    partes = [year_index[a] for a in anos if a in year_index]
+    linhas = np.concatenate(partes) if partes else np.array([], dtype=int)
+    return df.iloc[linhas, [df.columns.get_loc(c) for c in cols]]
+
+with prof.span("year_index"):
+    year_index = build_year_index(df, str(DATA_PATH))
+
+# Conflitos/eventos binários como intervalos por país (vdem_eventos.py, RLE)
+@st.cache_data(show_spinner=False)
+def load_eventos(_df, source):
+    return vdem_eventos.construir_intervalos(_df)
+
+with prof.span("eventos_rle"):
+    eventos = load_eventos(df, str(DATA_PATH))
+
+# Regressão v ~ x de todos os anos num passe só (estatísticas suficientes por ano)
+@st.cache_data(show_spinner=False)
+def ols_anual(v, x, source):
+    return vdem_stats.ols_por_grupo(df["year"].to_numpy(dtype=float), df[x], df[v])
+
+@st.cache_data(show_spinner=False)
+def scatter_animado(v, x, anos, source):
+    """
+    Dispersão x × v com um quadro por ano do período (animation_frame do Plotly):
+    todos os cortes saem do índice de anos e o play/slider rodam no navegador.
+    """
+    sub = cross_section(df, year_index, range(anos[0], anos[1] + 1), ["country_name", "year", x, v]).dropna()
+    if sub.empty:
+        return None
+    sub = sub.astype({"year": int})
+    log_x = bool((sub[x] > 0).all())
+    lim_x = [sub[x].min() / 1.25, sub[x].max() * 1.25] if log_x else None
+    folga = 0.05 * (sub[v].max() - sub[v].min() or 1)
+    fig = px.scatter(
+        sub, x=x, y=v, animation_frame="year", animation_group="country_name",
+        hover_name="country_name", log_x=log_x, range_x=lim_x,
+        range_y=[sub[v].min() - folga, sub[v].max() + folga],
+        labels={x: "PIB per capita (estim.)", v: v},
+        title=f"{v} × PIB per capita — {anos[0]}–{anos[1]}",
+    )
+    fig.update_traces(marker=dict(size=9, color="#1f77b4", opacity=0.75))
+    fig.layout.updatemenus[0].buttons[0].args[1]["frame"]["duration"] = 120
+    fig.layout.updatemenus[0].buttons[0].args[1]["transition"]["duration"] = 0
+    return fig
 
 # Filtra colunas úteis (remove estatísticas auxiliares)
 heads = df.columns.to_list()
@@ -217,7 +307,7 @@ def read_indicadores_csv(path):
                 continue
         raise
 
-csv_path = "C:/PROJECTS/P1-VDEM_dashboard/indicadores_vdem.csv"
+csv_path = DATA_DIR / "indicadores_vdem.csv"
 df_indicadores = read_indicadores_csv(csv_path)
 df_indicadores = df_indicadores.rename(columns={
     'titulo': 'titulo',
@@ -251,7 +341,8 @@ variaveis = (
 # ====================================
 st.sidebar.header("Filtros")
 # País (pré-seleção Brazil se existir)
-paises_all = natsorted(df["country_name"].dropna().unique())
+with prof.span("natsorted_paises"):
+    paises_all = natsorted(df["country_name"].dropna().unique())
 default_index = paises_all.index("Brazil") if "Brazil" in paises_all else 0
 selected_country = st.sidebar.selectbox("Selecione um país:", paises_all, index=default_index)
 
@@ -546,11 +637,12 @@ if selected_variavel_id:
             df["year"].between(year_range[0], year_range[1])
         ][["year", "country_name", selected_variavel_id]].sort_values(["year", "country_name"])
         if not df_plot.empty and pd.api.types.is_numeric_dtype(df[selected_variavel_id]):
-            pivot = df_plot.pivot(index="year", columns="country_name", values=selected_variavel_id)
-            # --- usa Altair para formatar o eixo dos anos sem vírgula ---
-            # prepara dados long (um país por linha) a partir do pivot:
-            pivot = df_plot.pivot(index="year", columns="country_name", values=selected_variavel_id).reset_index()
-            long_df = pivot.melt(id_vars="year", var_name="country_name", value_name="valor").dropna()
+            with prof.span("pivot_melt"):
+                pivot = df_plot.pivot(index="year", columns="country_name", values=selected_variavel_id)
+                # --- usa Altair para formatar o eixo dos anos sem vírgula ---
+                # prepara dados long (um país por linha) a partir do pivot:
+                pivot = df_plot.pivot(index="year", columns="country_name", values=selected_variavel_id).reset_index()
+                long_df = pivot.melt(id_vars="year", var_name="country_name", value_name="valor").dropna()
             # define passo de ticks (10 em 10 anos; se período pequeno, usa 5)
             span = max(1, year_range[1] - year_range[0])
             tick_step = 10 if span >= 20 else 5
@@ -586,7 +678,7 @@ tab_home, tab_global, tab_econ, tab_edu, tab_conflict, tab_onu, tab_mapa, tab_me
 # ==========================
 # HOME
 # ==========================
-with tab_home:
+with tab_home, prof.span("tab_home"):
     st.title("O Papel das Nações Unidas na Democratização")
     st.markdown("""
 **Objetivo**: Avaliar como a ONU se relaciona com a evolução da democracia no mundo, 
@@ -605,7 +697,20 @@ considerando fatores econômicos, educacionais e de conflito.
 # ==========================
 # EVOLUÇÃO GLOBAL
 # ==========================
-with tab_global:
+# Cubo região × ano × variável (vdem_cube.py): lido do artefato ao lado da base
+# se estiver em dia com este REGION_MAP; senão calculado uma vez e gravado.
+CUBE_PATH = DATA_DIR / "vdem_cube_dashboard.parquet"
+
+@st.cache_data(show_spinner="Carregando agregados regionais…")
+def load_cube(_df, source):
+    return vdem_cube.load_or_build(_df, REGION_MAP, vdem_cube.core_variables(_df.columns), CUBE_PATH, source)
+
+# Episódios de democratização/autocratização (vdem_episodios.py): todos os países de uma vez
+@st.cache_data(show_spinner="Detectando episódios de democratização/autocratização…")
+def load_episodios(_df, v, source):
+    return vdem_episodios.episodios(_df, v)
+
+with tab_global, prof.span("tab_global"):
     st.subheader("Média/Trajetória da Democracia")
     # variável alvo (default v2x_polyarchy)
     dem_vars = [c for c in df.columns if c.startswith("v2x_")] or [c for c in df.columns if df[c].dtype.kind in "if"]
@@ -625,8 +730,11 @@ with tab_global:
                                       title=f"Série histórica — {v}")
             st.altair_chart(chart, use_container_width=True)
 
+        with prof.span("cubo_regional"):
+            cube = load_cube(df, str(DATA_PATH))
+
         st.markdown("##### Média Global por Ano")
-        g = df[df["year"].between(*year_range)].groupby("year", as_index=False)[v].mean(numeric_only=True)
+        g = vdem_cube.trajectories(cube, v, [vdem_cube.WORLD], "mean", year_range).rename(columns={"valor": v})
         if not g.empty:
             chart2 = alt.Chart(g).mark_area(opacity=0.4).encode(
                 x=alt.X("year:Q", axis=alt.Axis(format="d")),
@@ -634,10 +742,61 @@ with tab_global:
             ).properties(title=f"Média global anual — {v}").interactive()
             st.altair_chart(chart2, use_container_width=True)
 
+        st.markdown("##### Episódios de democratização e autocratização")
+        if v not in vdem_episodios.VARIAVEIS:
+            st.caption("Disponível para v2x_libdem e v2x_polyarchy.")
+        else:
+            with prof.span("episodios"):
+                ep = load_episodios(df, v, str(DATA_PATH))
+                resumo = vdem_episodios.resumo_anual(ep, year_range)
+            if ep.empty:
+                st.info("Nenhum episódio detectado.")
+            else:
+                resumo["autocratização"] = -resumo["autocratização"]
+                long_ep = resumo.melt(id_vars="year", var_name="tipo", value_name="paises")
+                chart_ep = alt.Chart(long_ep).mark_bar().encode(
+                    x=alt.X("year:O", axis=alt.Axis(labelExpr="datum.value % 10 == 0 ? datum.value : ''"), title="Ano"),
+                    y=alt.Y("paises:Q", title="Países em episódio"),
+                    color=alt.Color("tipo:N", title="Episódio",
+                                    scale=alt.Scale(domain=["democratização", "autocratização"],
+                                                    range=["#2ca02c", "#d62728"])),
+                    tooltip=["year", "tipo", alt.Tooltip("paises:Q", title="países")],
+                ).properties(title=f"Países em episódio por ano — {v} (autocratização para baixo)")
+                st.altair_chart(chart_ep, use_container_width=True)
+                no_periodo = ep[(ep["fim"] >= year_range[0]) & (ep["inicio"] <= year_range[1])]
+                with st.expander(f"Tabela de episódios ({len(no_periodo)} no período)"):
+                    # formato por coluna no navegador (um Styler formataria célula a célula a cada rerun)
+                    st.dataframe(
+                        no_periodo, use_container_width=True, hide_index=True,
+                        column_config={c: st.column_config.NumberColumn(format=f)
+                                       for c, f in [("valor_inicio", "%.3f"), ("valor_fim", "%.3f"), ("variacao", "%+.3f")]},
+                    )
+
+        st.markdown("##### Trajetórias regionais")
+        regioes_cubo = [r for r in cube["region"].cat.categories if r in set(cube["region"].unique())]
+        c1, c2 = st.columns([3, 2])
+        with c1:
+            regs = st.multiselect("Regiões", regioes_cubo,
+                                  default=[r for r in [vdem_cube.WORLD, "G7", "BRICS", "África"] if r in regioes_cubo])
+        with c2:
+            stat_labels = {"mean": "Média", "median": "Mediana", "mean_pop": "Média ponderada (e_pop)"}
+            if not cube["mean_pop"].notna().any():
+                stat_labels.pop("mean_pop")
+            stat = st.radio("Estatística", list(stat_labels), format_func=stat_labels.get, horizontal=True)
+        traj = vdem_cube.trajectories(cube, v, regs, stat, year_range)
+        if traj.empty:
+            st.info("Sem agregados para as regiões escolhidas.")
+        else:
+            st.altair_chart(
+                line_chart_altair(traj, x="year", y="valor", color="region:N",
+                                  title=f"{stat_labels[stat]} por região — {v}"),
+                use_container_width=True,
+            )
+
 # ==========================
 # FATORES ECONÔMICOS
 # ==========================
-with tab_econ:
+with tab_econ, prof.span("tab_econ"):
     st.subheader("PIB per capita × Democracia")
     needs = ["e_gdppc"]
     if not exists_cols(df, needs):
@@ -646,24 +805,44 @@ with tab_econ:
         v = "v2x_polyarchy" if "v2x_polyarchy" in df.columns else st.selectbox(
             "Variável de democracia:", [c for c in df.columns if df[c].dtype.kind in "if"]
         )
-        latest_year = st.slider("Ano para o corte transversal", min_year, max_year, max_year, step=1)
-        sub = df[df["year"] == latest_year][["country_name", v, "e_gdppc"]].dropna()
-        if sub.empty:
-            st.info("Sem dados para o ano escolhido.")
+        with prof.span("ols_anual"):
+            coefs = ols_anual(v, "e_gdppc", str(DATA_PATH))
+        animar = st.toggle("▶️ Animar pelos anos", key="econ_animar",
+                           help="Todos os anos do período vão de uma vez para o navegador; o play roda no cliente.")
+        if animar:
+            with prof.span("econ_animacao"):
+                fig = scatter_animado(v, "e_gdppc", tuple(year_range), str(DATA_PATH))
+            if fig is None:
+                st.info("Sem dados para o período escolhido.")
+            else:
+                st.plotly_chart(fig, use_container_width=True)
         else:
-            base = alt.Chart(sub).mark_circle(size=80).encode(
-                x=alt.X("e_gdppc:Q", title="PIB per capita (estim.)"),
-                y=alt.Y(f"{v}:Q", title=v),
-                tooltip=["country_name", "e_gdppc", v],
-                color=alt.value("#1f77b4")
-            )
-            reg = base.transform_regression("e_gdppc", v).mark_line()
-            st.altair_chart((base + reg).properties(title=f"{v} × PIB per capita — {latest_year}"), use_container_width=True)
+            latest_year = st.slider("Ano para o corte transversal", min_year, max_year, max_year, step=1)
+            sub = cross_section(df, year_index, latest_year, ["country_name", v, "e_gdppc"]).dropna()
+            if sub.empty:
+                st.info("Sem dados para o ano escolhido.")
+            else:
+                base = alt.Chart(sub).mark_circle(size=80).encode(
+                    x=alt.X("e_gdppc:Q", title="PIB per capita (estim.)"),
+                    y=alt.Y(f"{v}:Q", title=v),
+                    tooltip=["country_name", "e_gdppc", v],
+                    color=alt.value("#1f77b4")
+                )
+                reg = fitted_line(coefs, latest_year, sub, "e_gdppc", v)
+                chart = base + reg if reg is not None else base
+                st.altair_chart(chart.properties(title=f"{v} × PIB per capita — {latest_year}"), use_container_width=True)
+
+        st.markdown("##### Coeficiente ao longo do tempo")
+        c = coefs[(coefs.index >= year_range[0]) & (coefs.index <= year_range[1])]
+        if c.empty:
+            st.info("Poucas observações por ano para estimar a regressão no período.")
+        else:
+            st.altair_chart(coef_chart(c, f"{v} ~ e_gdppc: inclinação por ano (MQO)"), use_container_width=True)
 
 # ==========================
 # EDUCAÇÃO & DEMOCRACIA
 # ==========================
-with tab_edu:
+with tab_edu, prof.span("tab_edu"):
     st.subheader("Escolaridade × Democracia")
     needs = ["e_peaveduc"]
     if not exists_cols(df, needs):
@@ -672,8 +851,10 @@ with tab_edu:
         v = "v2x_polyarchy" if "v2x_polyarchy" in df.columns else st.selectbox(
             "Variável de democracia:", [c for c in df.columns if df[c].dtype.kind in "if"]
         )
+        with prof.span("ols_anual"):
+            coefs = ols_anual(v, "e_peaveduc", str(DATA_PATH))
         yyear = st.slider("Ano para o corte transversal", min_year, max_year, max_year, step=1, key="edu_year")
-        sub = df[df["year"] == yyear][["country_name", v, "e_peaveduc"]].dropna()
+        sub = cross_section(df, year_index, yyear, ["country_name", v, "e_peaveduc"]).dropna()
         if sub.empty:
             st.info("Sem dados para o ano escolhido.")
         else:
@@ -683,13 +864,21 @@ with tab_edu:
                 tooltip=["country_name", "e_peaveduc", v],
                 color=alt.value("#2ca02c")
             )
-            reg = base.transform_regression("e_peaveduc", v).mark_line()
-            st.altair_chart((base + reg).properties(title=f"{v} × Escolaridade — {yyear}"), use_container_width=True)
+            reg = fitted_line(coefs, yyear, sub, "e_peaveduc", v)
+            chart = base + reg if reg is not None else base
+            st.altair_chart(chart.properties(title=f"{v} × Escolaridade — {yyear}"), use_container_width=True)
+
+        st.markdown("##### Coeficiente ao longo do tempo")
+        c = coefs[(coefs.index >= year_range[0]) & (coefs.index <= year_range[1])]
+        if c.empty:
+            st.info("Poucas observações por ano para estimar a regressão no período.")
+        else:
+            st.altair_chart(coef_chart(c, f"{v} ~ e_peaveduc: inclinação por ano (MQO)"), use_container_width=True)
 
 # ==========================
 # CONFLITOS & DEMOCRACIA
 # ==========================
-with tab_conflict:
+with tab_conflict, prof.span("tab_conflict"):
     st.subheader("Conflitos e Democracia")
     needs = ["e_civil_war"]
     if not exists_cols(df, needs):
@@ -710,33 +899,136 @@ with tab_conflict:
             ).properties(title=f"Média anual de {v}, por condição de conflito").interactive()
             st.altair_chart(chart, use_container_width=True)
 
+    eventos_disp = [e for e in vdem_eventos.EVENTOS if e in set(eventos["evento"].unique())]
+    dem_vars_conf = [c for c in ["v2x_polyarchy", "v2x_libdem"] if c in df.columns]
+    if not eventos_disp or not dem_vars_conf:
+        st.info("Sem colunas de eventos (e_civil_war, e_miinteco, un_member, v2x_regime) ou de democracia na base.")
+    else:
+        rotulo_ev = lambda e: vdem_eventos.EVENTOS[e][1]  # noqa: E731
+        v_ev = st.selectbox("Variável de democracia:", dem_vars_conf, key="conf_ev_dem")
+
+        st.markdown("##### Eventos na série de um país")
+        c1, c2 = st.columns([1, 2])
+        with c1:
+            pais_ev = st.selectbox("País", paises_all, index=_get_index_or_zero(paises_all, selected_country),
+                                   key="conf_ev_pais")
+        with c2:
+            evs = st.multiselect("Eventos", eventos_disp, default=eventos_disp, format_func=rotulo_ev,
+                                 key="conf_ev_eventos")
+        serie = df[(df["country_name"] == pais_ev) & df["year"].between(*year_range)][["year", v_ev]].dropna()
+        if serie.empty:
+            st.info("Sem dados do país no período.")
+        else:
+            bandas = vdem_eventos.no_periodo(eventos, [pais_ev], year_range, evs).assign(fim_b=lambda x: x["fim"] + 1)
+            chart = alt.Chart(serie).mark_line(color="#333333").encode(
+                x=alt.X("year:Q", axis=alt.Axis(format="d"), title="Ano"),
+                y=alt.Y(f"{v_ev}:Q", title=v_ev),
+            )
+            if not bandas.empty:
+                chart = alt.Chart(bandas).mark_rect(opacity=0.25).encode(
+                    x="inicio:Q",
+                    x2="fim_b:Q",
+                    color=alt.Color("rotulo:N", title="Evento",
+                                    scale=alt.Scale(domain=[rotulo_ev(e) for e in eventos_disp],
+                                                    range=[vdem_eventos.EVENTOS[e][2] for e in eventos_disp])),
+                    tooltip=[alt.Tooltip("rotulo:N", title="evento"), "inicio", "fim"],
+                ) + chart
+            st.altair_chart(chart.properties(title=f"{pais_ev} — {v_ev}"), use_container_width=True)
+
+        st.markdown("##### Democracia nos N anos após o início")
+        conflitos = [e for e in eventos_disp if e != "membro_onu"] or eventos_disp
+        c1, c2 = st.columns([2, 1])
+        with c1:
+            ev_ini = st.selectbox("Início de", conflitos, format_func=rotulo_ev, key="conf_ev_inicio")
+        with c2:
+            n_anos = st.slider("N (anos depois)", 1, 20, 5, key="conf_ev_n")
+        with prof.span("mudanca_pos_inicio"):
+            res = vdem_eventos.mudanca_apos_inicio(df, eventos, ev_ini, v_ev, n_anos, year_range)
+        hz, ini = res["horizontes"], res["inicios"].dropna(subset=["delta"])
+        if ini.empty:
+            st.info("Nenhum início do evento com dados de democracia no período.")
+        else:
+            m1, m2, m3 = st.columns(3)
+            m1.metric("Inícios no período", len(ini))
+            m2.metric(f"Variação média em {n_anos} anos", f"{hz['media'].iloc[-1]:+.3f}",
+                      f"{hz['media'].iloc[-1] - hz['media_base'].iloc[-1]:+.3f} vs. todos os país-anos")
+            m3.metric("Inícios com queda", f"{(ini['delta'] < 0).mean():.0%}")
+            long_hz = hz.melt(id_vars=["h", "n_inicios"], value_vars=["media", "media_base"],
+                              var_name="serie", value_name="delta")
+            long_hz["serie"] = long_hz["serie"].map({"media": f"Após início de: {rotulo_ev(ev_ini)}",
+                                                     "media_base": "Todos os país-anos"})
+            st.altair_chart(
+                alt.Chart(long_hz).mark_line(point=True).encode(
+                    x=alt.X("h:O", title="Anos após o início (0 = ano do início)"),
+                    y=alt.Y("delta:Q", title=f"Variação de {v_ev} desde t − 1"),
+                    color=alt.Color("serie:N", title=None),
+                    tooltip=["h", alt.Tooltip("delta:Q", format="+.3f"), "n_inicios"],
+                ).properties(title=f"Variação média de {v_ev} após o início"),
+                use_container_width=True,
+            )
+            with st.expander(f"Inícios ({len(ini)})"):
+                st.dataframe(ini.sort_values("delta"), use_container_width=True, hide_index=True,
+                             column_config={"antes": st.column_config.NumberColumn(format="%.3f"),
+                                            "delta": st.column_config.NumberColumn(format="%+.3f")})
+
 # ==========================
 # ONU & DEMOCRACIA (DiD)
 # ==========================
-with tab_onu:
-    st.subheader("Diferença-em-Diferença (mock)")
-    st.caption("Funciona se existirem colunas como **un_member** (0/1) e **un_entry_year** no dataset.")
-    if exists_cols(df, ["un_member","un_entry_year","v2x_polyarchy"]):
-        v = "v2x_polyarchy"
-        # cria tempo relativo à entrada na ONU
-        sub = df.copy()
-        sub = sub[sub["year"].between(*year_range)]
-        sub["t_rel"] = sub["year"] - sub["un_entry_year"]
-        sub = sub[(sub["t_rel"] >= -10) & (sub["t_rel"] <= 10)]
-        agg = sub.groupby(["t_rel","un_member"], as_index=False)[v].mean(numeric_only=True)
-        chart = alt.Chart(agg).mark_line().encode(
-            x=alt.X("t_rel:Q", title="Anos em relação à entrada na ONU"),
-            y=alt.Y(f"{v}:Q", title=v),
-            color=alt.Color("un_member:N", title="Grupo", scale=alt.Scale(scheme='tableau10'))
-        ).properties(title="Efeito médio de entrar na ONU (±10 anos)").interactive()
-        st.altair_chart(chart, use_container_width=True)
+# Um pool de processos ("spawn") por processo do servidor, reaproveitado pelos bootstraps
+@st.cache_resource
+def pool_processos():
+    return vdem_stats.pool_processos()
+
+# Estudo de evento (vdem_eventstudy.py): tempo relativo direto dos arrays e IC
+# por bootstrap de países (no próprio processo se for pequeno, senão no pool);
+# cache por (variável, janela, período).
+@st.cache_data(show_spinner="Rodando o bootstrap do estudo de evento…")
+def event_study(v, janela, year_range, n_boot, source):
+    return vdem_eventstudy.estudo_de_evento(
+        df["country_name"], df["year"], df["un_entry_year"], df[v],
+        janela=janela, year_range=year_range, n_boot=n_boot, pool=pool_processos(),
+    )
+
+with tab_onu, prof.span("tab_onu"):
+    st.subheader("Estudo de evento — entrada na ONU")
+    st.caption("Funciona se existir a coluna **un_entry_year** no dataset. Efeito = média em t − média em t = −1; "
+               "faixa = IC 95% por bootstrap de países.")
+    if exists_cols(df, ["un_entry_year"]) and default_dem is not None:
+        c1, c2, c3 = st.columns([2, 2, 1])
+        with c1:
+            v = st.selectbox("Variável", dem_vars, index=dem_vars.index(default_dem), key="onu_var")
+        with c2:
+            janela = st.slider("Janela (anos em relação à entrada)", -30, 30, (-10, 10), key="onu_janela")
+        with c3:
+            n_boot = st.selectbox("Réplicas", [200, 500, 1000, 2000], index=1, key="onu_boot")
+        if janela[0] > -1 or janela[1] < 0:
+            st.info("A janela precisa conter t = −1 (referência) e t = 0 (entrada).")
+        else:
+            with prof.span("event_study"):
+                res = event_study(v, tuple(janela), tuple(year_range), n_boot, str(DATA_PATH))
+            if res.empty:
+                st.info("Sem dados para a seleção atual.")
+            else:
+                x = alt.X("t_rel:Q", title="Anos em relação à entrada na ONU")
+                banda = alt.Chart(res).mark_area(opacity=0.25).encode(
+                    x=x, y=alt.Y("efeito_li:Q", title=f"Efeito sobre {v}"), y2="efeito_ls:Q")
+                linha = alt.Chart(res).mark_line(point=True).encode(
+                    x=x, y="efeito:Q",
+                    tooltip=["t_rel:Q", alt.Tooltip("efeito:Q", format=".3f"), alt.Tooltip("efeito_li:Q", format=".3f"),
+                             alt.Tooltip("efeito_ls:Q", format=".3f"), alt.Tooltip("media:Q", format=".3f"), "n_paises:Q"])
+                zero = alt.Chart(pd.DataFrame({"t": [-0.5]})).mark_rule(strokeDash=[4, 4], color="gray").encode(x="t:Q")
+                st.altair_chart((banda + linha + zero).properties(
+                    title=f"Efeito médio de entrar na ONU ({janela[0]:+d} a {janela[1]:+d} anos)").interactive(),
+                    use_container_width=True)
+                with st.expander("Tabela do estudo de evento"):
+                    st.dataframe(res, use_container_width=True, hide_index=True)
     else:
-        st.info("Adicione **un_member** e **un_entry_year** para ativar este painel.")
+        st.info("Adicione **un_entry_year** para ativar este painel.")
 
 # ==========================
 # MAPAS & GIF
 # ==========================
-with tab_mapa:
+with tab_mapa, prof.span("tab_mapa"):
     st.subheader("Ideias para mapas e GIFs")
     st.markdown("""
 - **Mapa interativo** com slider de ano usando `altair` (topojson) ou `pydeck`.
@@ -751,7 +1043,43 @@ with tab_mapa:
 # ==========================
 # METODOLOGIA & RESULTADOS
 # ==========================
-with tab_metodo:
+# Curva de especificações (vdem_speccurve.py): checkpoint por arquivo de dados
+def speccurve_checkpoint():
+    """Caminho do checkpoint (pasta da base ou temporária); None se nenhuma das duas for gravável."""
+    st_ = DATA_PATH.stat() if DATA_PATH.exists() else None
+    tag = f"{st_.st_size}_{int(st_.st_mtime)}" if st_ else "demo"
+    for pasta in (DATA_DIR / "speccurve", Path(tempfile.gettempdir()) / "vdem_speccurve"):
+        try:
+            pasta.mkdir(parents=True, exist_ok=True)
+            arq = pasta / f"speccurve_{tag}.jsonl"
+            arq.open("a").close()  # mkdir não falha numa pasta que já existe só para leitura
+            return arq
+        except OSError:
+            continue
+    return None
+
+def spec_curve_chart(d):
+    """Painel de cima: δ ordenado com IC 95%; painel de baixo: o que entra em cada especificação."""
+    x = alt.X("rank:Q", title="Especificação (ordenada pelo efeito)", axis=alt.Axis(labels=False, ticks=False))
+    cor = alt.Color("significativo:N", title="IC 95% exclui 0", scale=alt.Scale(domain=[True, False], range=["#1f77b4", "#bbbbbb"]))
+    ic = alt.Chart(d).mark_rule(opacity=0.5).encode(x=x, y=alt.Y("li:Q", title="Efeito da ONU (δ)"), y2="ls:Q", color=cor)
+    pts = alt.Chart(d).mark_circle(size=18).encode(
+        x=x, y="efeito:Q", color=cor,
+        tooltip=["desfecho", "janela_txt", alt.Tooltip("controles:N"), alt.Tooltip("efeito:Q", format=".4f"),
+                 alt.Tooltip("ep:Q", format=".4f"), "n_obs:Q"])
+    zero = alt.Chart(pd.DataFrame({"y": [0]})).mark_rule(strokeDash=[4, 4], color="gray").encode(y="y:Q")
+    topo = (ic + pts + zero).properties(height=260)
+
+    itens = pd.concat([
+        d[["rank"]].assign(item="desfecho: " + d["desfecho"]),
+        d[["rank"]].assign(item="janela: " + d["janela_txt"]),
+        *[d.loc[d[c], ["rank"]].assign(item=f"controle: {c}") for c in vdem_speccurve.CONTROLES],
+    ])
+    base = alt.Chart(itens).mark_tick(thickness=2, size=10).encode(
+        x=x, y=alt.Y("item:N", title=None, sort=None))
+    return alt.vconcat(topo, base.properties(height=22 * itens["item"].nunique())).resolve_scale(x="shared")
+
+with tab_metodo, prof.span("tab_metodo"):
     st.subheader("Metodologia & Principais Resultados (resumo)")
     st.markdown("""
 **Metodologia**  
@@ -771,4 +1099,45 @@ with tab_metodo:
 - Use os filtros (ano, região, bloco) para contextualizar.
 - Compare trajetórias de grupos (ex.: BRICS, G7, P5).
 - Explore a relação com PIB e educação nos anos mais recentes (cross-section).
-    """)
\ No newline at end of file
+    """)
+
+    st.markdown("#### Curva de especificações")
+    st.caption("Efeito da ONU (δ, tratamento endógeno em 2 etapas, EP robusto por país) em cada combinação de "
+               "desfecho × controles × janela. Os modelos rodam num pool de processos e ficam num checkpoint em "
+               "disco: interromper e rodar de novo continua de onde parou.")
+    desfechos_ok = [d for d in vdem_speccurve.DESFECHOS if d in df.columns]
+    faltam = [c for c in vdem_speccurve.colunas(vdem_speccurve.gerar_especificacoes(desfechos_ok[:1] or None))
+              if c not in df.columns]
+    ckpt = speccurve_checkpoint()
+    if not desfechos_ok or faltam:
+        st.info("A base carregada não tem as colunas do paper: " + ", ".join(faltam or vdem_speccurve.DESFECHOS))
+    elif ckpt is None:
+        st.warning(f"Sem pasta gravável para o checkpoint ({DATA_DIR / 'speccurve'} nem "
+                   f"{Path(tempfile.gettempdir()) / 'vdem_speccurve'}): curva de especificações desativada.")
+    else:
+        desfechos = st.multiselect("Desfechos", desfechos_ok, default=desfechos_ok[:2], key="sc_desfechos")
+        especs = vdem_speccurve.gerar_especificacoes(desfechos) if desfechos else []
+        ids = {vdem_speccurve.id_espec(e) for e in especs}
+        res = vdem_speccurve.ler_checkpoint(ckpt)
+        res = res[res["id"].isin(ids)] if not res.empty else res
+        status = st.empty()
+        grafico = st.empty()
+        if especs and len(res) < len(especs) and st.button("▶️ Rodar / continuar", key="sc_rodar"):
+            barra = st.progress(len(res) / len(especs))
+            novos, passo = [], max(10, len(especs) // 20)
+            with prof.span("speccurve"):
+                for i, r in enumerate(vdem_speccurve.rodar(df, especs, ckpt), 1):
+                    novos.append(r)
+                    if i % passo == 0:
+                        parcial = pd.concat([res, pd.DataFrame(novos)], ignore_index=True)
+                        barra.progress(len(parcial) / len(especs))
+                        grafico.altair_chart(spec_curve_chart(vdem_speccurve.tabela_curva(parcial)),
+                                             use_container_width=True)
+            res = pd.concat([res, pd.DataFrame(novos)], ignore_index=True)
+            barra.progress(1.0)
+        status.caption(f"{len(res)}/{len(especs)} especificações prontas · checkpoint: `{ckpt}`")
+        if not res.empty:
+            grafico.altair_chart(spec_curve_chart(vdem_speccurve.tabela_curva(res)), use_container_width=True)
+
+prof.end_rerun()
+prof.render_debug_panel()
@@ -2,7 +2,13 @@
 # cd C:\PROJECTS\vdem_dashboard
 # streamlit run vdem_dashboard_multipage.py --server.runOnSave true
 
+import os
+import json
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+import numpy as np
 import pandas as pd
 import streamlit as st
 from streamlit_option_menu import option_menu
@@ -11,10 +17,24 @@ import plotly.express as px
 from natsort import natsorted
 import random
 import altair as alt
+import vdem_profiler as prof
+import vdem_metrics as metrics
+import vdem_stats
+import vdem_teffects
+import vdem_cube
+import vdem_synthcontrol
+import vdem_panel
+import vdem_coverage
+import vdem_related
+import vdem_trajetorias
+import vdem_episodios
+import vdem_eventos
 
 st.set_page_config(layout="wide",
                    page_title="Democracias no Mundo",
                    initial_sidebar_state="collapsed")
+prof.begin_rerun("multipage")
+metrics.install()  # /metrics (Prometheus) em VDEM_METRICS_PORT, uma vez por processo
 
 # ==========================
 # MAPAS DE CLASSE / GRUPO / REGIÕES
@@ -220,6 +240,8 @@ REGION_MAP = {
         "Iran","Saudi Arabia","United Arab Emirates"
     ]
 }
+# vizinhança do spillover regional: só as regiões geográficas (sem G7, G20, BRICS, CS-ONU)
+REGIOES_GEOGRAFICAS = vdem_cube.regioes_geograficas(REGION_MAP)
 
 # ==========================
 # CARREGAR DADOS (cache) — robusto para Cloud
@@ -229,8 +251,13 @@ import pandas as pd
 import streamlit as st
 
 REPO_ROOT = Path(__file__).resolve().parent
-VDEM_PARQ  = REPO_ROOT / "vdem_all.parquet"
-INDIC_CSV  = REPO_ROOT / "indicadores_vdem.csv"
+# VDEM_DATA_DIR aponta para outra pasta de dados (ex.: base sintética de benchmark)
+DATA_DIR   = Path(os.environ.get("VDEM_DATA_DIR", REPO_ROOT))
+VDEM_PARQ  = DATA_DIR / "vdem_all.parquet"
+INDIC_CSV  = DATA_DIR / "indicadores_vdem.csv"
+RELATED_PATH = DATA_DIR / "vdem_related.parquet"  # gerado por: python vdem_related.py vdem_all.parquet
+if not INDIC_CSV.exists():
+    INDIC_CSV = REPO_ROOT / "indicadores_vdem.csv"
 
 def _assert_is_real_parquet(path: Path):
     if not path.exists():
@@ -248,6 +275,7 @@ def _assert_is_real_parquet(path: Path):
     if start != b"PAR1" or end != b"PAR1":
         raise RuntimeError(f"{path.name} não tem assinatura PAR1 (arquivo corrompido ou incompleto).")
 
+@metrics.track_cache("_read_parquet_columns")
 @st.cache_data(show_spinner="Lendo Parquet (colunas selecionadas)…")
 def _read_parquet_columns(path: Path, columns: list[str] | None = None) -> pd.DataFrame:
     """
@@ -256,6 +284,7 @@ def _read_parquet_columns(path: Path, columns: list[str] | None = None) -> pd.Da
     2) pandas com engine=pyarrow
     3) pandas com engine=fastparquet
     """
+    metrics.note_cache_miss()
     _assert_is_real_parquet(path)
 
     # 1) PyArrow Dataset (preferido no Cloud)
@@ -263,15 +292,20 @@ def _read_parquet_columns(path: Path, columns: list[str] | None = None) -> pd.Da
         import pyarrow.dataset as ds
         dataset = ds.dataset(str(path), format="parquet")
         table = dataset.to_table(columns=columns) if columns else dataset.to_table()
+        metrics.record_parquet_read(path, columns, table.num_columns)
         return table.to_pandas(use_threads=True)
     except Exception as e_ds:
         # 2) pandas + pyarrow
         try:
-            return pd.read_parquet(path, engine="pyarrow", columns=columns)
+            out = pd.read_parquet(path, engine="pyarrow", columns=columns)
+            metrics.record_parquet_read(path, columns, out.shape[1])
+            return out
         except Exception as e_pdpa:
             # 3) fallback final: fastparquet (pode falhar no Cloud; por isso é último)
             try:
-                return pd.read_parquet(path, engine="fastparquet", columns=columns)
+                out = pd.read_parquet(path, engine="fastparquet", columns=columns)
+                metrics.record_parquet_read(path, columns, out.shape[1])
+                return out
             except Exception as e_fp:
                 raise RuntimeError(
                     f"Falha ao ler {path.name}.\n"
@@ -280,8 +314,10 @@ def _read_parquet_columns(path: Path, columns: list[str] | None = None) -> pd.Da
                     f"- pandas(engine=fastparquet): {e_fp}"
                 )
 
+@metrics.track_cache("_read_indicadores_csv")
 @st.cache_data(show_spinner="Carregando indicadores (CSV)…")
 def _read_indicadores_csv(path: Path) -> pd.DataFrame:
+    metrics.note_cache_miss()
     return pd.read_csv(path, sep=",", low_memory=False)
 
 def load_data_minimal():
@@ -312,6 +348,23 @@ def load_columns_for_pages(vars_needed: list[str], extra_cols: list[str] = None)
         df_part = df_part.rename(columns={year_col: "year"})
     return df_part
 
+@st.cache_data(show_spinner=False)
+def _parquet_schema_names(path: Path) -> list[str]:
+    """Nomes das colunas do Parquet (só o rodapé do arquivo, sem ler dados)."""
+    import pyarrow.parquet as pq
+    return pq.read_schema(str(path)).names
+
+def load_faixa_incerteza(variavel: str) -> pd.DataFrame | None:
+    """
+    Intervalo de medição do V-Dem (<var>_codelow / <var>_codehigh) da variável,
+    lido por projeção só dessas colunas. None se a base não tiver as companheiras.
+    """
+    low, high = f"{variavel}_codelow", f"{variavel}_codehigh"
+    if not {low, high} <= set(_parquet_schema_names(VDEM_PARQ)):
+        return None
+    faixa = _read_parquet_columns(VDEM_PARQ, columns=["country_name", "year", low, high])
+    return faixa.rename(columns={low: "low", high: "high"})
+
 def load_data():
     """
     Só use se realmente precisar da base inteira (evite em páginas que podem operar por colunas).
@@ -323,7 +376,8 @@ def load_data():
 # DADOS
 # ==========================
 try:
-    df, df_indicadores = load_data()
+    with prof.span("load_data"):
+        df, df_indicadores = load_data()
 except Exception as e:
     # Mostra erro na página e interrompe execução segura
     st.error("Falha ao carregar os dados (Parquet/CSV).")
@@ -331,31 +385,53 @@ except Exception as e:
     st.code(traceback.format_exc())
     st.stop()
 
-# remove estatísticas auxiliares
-heads = df.columns.to_list()
-head = [c for c in heads if not c.endswith(('_sd', '_osp', '_codelow', '_codehigh', '_ord', '_mean', '_nr'))]
-
-# decompõe id → classe/grupo (compatível com ids 2/3/4 níveis)
-df_indicadores["partes"]    = df_indicadores["id"].astype(str).str.split(".")
-df_indicadores["classe_id"] = df_indicadores["partes"].apply(lambda p: p[0] if len(p)>=1 else None)
-df_indicadores["grupo_id"]  = df_indicadores["partes"].apply(lambda p: ".".join(p[:2]) if len(p)>=2 else None)
-
-df_indicadores["Classe"] = df_indicadores["classe_id"].map(CLASS_MAP)
-df_indicadores["Grupo"]  = df_indicadores["grupo_id"].map(GROUP_MAP)
-
-# nível
-def define_nivel(p):
-    if len(p)==1: return "Classe"
-    if len(p)==2: return "Grupo"
-    return "Variavel"
-df_indicadores["nivel"] = df_indicadores["partes"].apply(define_nivel)
-
-# catálogo final (existentes no df principal)
-variaveis = (
-    df_indicadores[df_indicadores["nivel"] == "Variavel"]
-    .query("variavel in @df.columns")
-    .copy()
-)
+# Conflitos/eventos binários como intervalos por país (vdem_eventos.py, RLE), montados junto com a base
+@metrics.track_cache("_eventos_rle")
+@st.cache_data(show_spinner=False)
+def _eventos_rle(source: str, _df):
+    metrics.note_cache_miss()
+    return vdem_eventos.construir_intervalos(_df)
+
+with prof.span("eventos_rle"):
+    eventos_rle = _eventos_rle(str(VDEM_PARQ), df)
+
+with prof.span("catalogo"):
+    # remove estatísticas auxiliares
+    heads = df.columns.to_list()
+    head = [c for c in heads if not c.endswith(('_sd', '_osp', '_codelow', '_codehigh', '_ord', '_mean', '_nr'))]
+
+    # decompõe id → classe/grupo (compatível com ids 2/3/4 níveis)
+    df_indicadores["partes"]    = df_indicadores["id"].astype(str).str.split(".")
+    df_indicadores["classe_id"] = df_indicadores["partes"].apply(lambda p: p[0] if len(p)>=1 else None)
+    df_indicadores["grupo_id"]  = df_indicadores["partes"].apply(lambda p: ".".join(p[:2]) if len(p)>=2 else None)
+
+    df_indicadores["Classe"] = df_indicadores["classe_id"].map(CLASS_MAP)
+    df_indicadores["Grupo"]  = df_indicadores["grupo_id"].map(GROUP_MAP)
+
+    # nível
+    def define_nivel(p):
+        if len(p)==1: return "Classe"
+        if len(p)==2: return "Grupo"
+        return "Variavel"
+    df_indicadores["nivel"] = df_indicadores["partes"].apply(define_nivel)
+
+    # catálogo final (existentes no df principal)
+    variaveis = (
+        df_indicadores[df_indicadores["nivel"] == "Variavel"]
+        .query("variavel in @df.columns")
+        .copy()
+    )
+
+# Cobertura (não-nulos) do catálogo em bits (vdem_coverage.py), montada junto com a base
+# como os intervalos de eventos: a sidebar só faz a consulta (AND + contagem de bits)
+@metrics.track_cache("_indice_cobertura")
+@st.cache_data(show_spinner="Indexando a cobertura das variáveis…")
+def _indice_cobertura(source: str, _df, _variaveis):
+    metrics.note_cache_miss()
+    return vdem_coverage.construir_indice(_df, _variaveis)
+
+with prof.span("indice_cobertura"):
+    indice_cobertura = _indice_cobertura(str(VDEM_PARQ), df, variaveis["variavel"].drop_duplicates().tolist())
 
 # ==========================
 # HELPERS
@@ -455,9 +531,7 @@ def _safe_image(path, **kwargs):
     else:
         st.warning(f"Imagem não encontrada: `{p}`")
 
-def _html_tabela_resultados() -> str:
-    """Tabela HTML compacta (scroll, cabeçalho/1ª coluna fixos) baseada na Tabela 3."""
-    return """
+_CSS_TABELA = """
 <style>
 /* Container com rolagem e limite de altura/largura */
 .table-wrap {
@@ -509,7 +583,8 @@ def _html_tabela_resultados() -> str:
 }
 
 /* Subtítulos de seção (linhas com colspan) */
-.table-res td[colspan="5"] {
+.table-res td[colspan="5"],
+.table-res td[colspan="4"] {
   background: #fafafa;
   font-weight: 600;
   text-align: left !important;
@@ -531,6 +606,11 @@ def _html_tabela_resultados() -> str:
 /* Colunas mais estreitas para (0)/(1) */
 .col-narrow { width: 52px; }
 </style>
+"""
+
+def _html_tabela_resultados() -> str:
+    """Tabela HTML compacta (scroll, cabeçalho/1ª coluna fixos) baseada na Tabela 3."""
+    return _CSS_TABELA + """
 
 <div class="table-wrap">
 <table class="table-res">
@@ -593,41 +673,112 @@ def _html_tabela_resultados() -> str:
   Nota: Níveis de significância — * p &lt; 0,10; ** p &lt; 0,05; *** p &lt; 0,01.
 </div>
 """
-def build_common_sidebar(enable_sidebar: bool = True):
-    # Se a página quiser esconder a sidebar, apenas retorne None e não construa UI
-    if not enable_sidebar:
-        return None
+def _fmt_coef(x, sig="") -> str:
+    """0,041804*** no formato da Tabela 3 (sinal '-' invisível nos positivos, p/ alinhar)."""
+    if pd.isna(x):
+        return ""
+    num = f"{abs(x):.6f}".replace(".", ",")
+    sinal = "-" if x < 0 else '<span class="small">-</span>'
+    return f"{sinal} {num}<sup>{sig}</sup>"
+
+def _html_tabela_estimada(res: dict) -> str:
+    """Tabela no layout da Tabela 3, montada com o resultado de vdem_teffects.estimar."""
+    tab = res["tabela"]
+    modelos = list(vdem_teffects.MODELOS)
+    def celulas(r):
+        return "".join(f"<td>{_fmt_coef(r[m], r[f'{m}_sig'])}</td>" for m in modelos)
+
+    linhas, ultimo = [], None
+    for _, r in tab.iterrows():
+        if r["equacao"] in ("(0)", "(1)") and ultimo not in ("(0)", "(1)"):
+            linhas.append('<tr><td colspan="4"><i><b>Índice de Democracia</b></i></td></tr>')
+        if r["equacao"] == "seleção" and ultimo != "seleção":
+            linhas.append('<tr><td colspan="4"><i><b>Adesão à ONU</b></i></td></tr>')
+        if r["equacao"] == "":
+            linhas.append(f'<tr><td colspan="2"><b>{r["termo"]}</b></td>{celulas(r)}</tr>')
+        else:
+            rotulo = vdem_teffects.ROTULOS.get(r["termo"], r["termo"]) if r["equacao"] != "(1)" else ""
+            eq = r["equacao"] if r["equacao"] != "seleção" else ""
+            linhas.append(f"<tr><td>{rotulo}</td><td>{eq}</td>{celulas(r)}</tr>")
+        ultimo = r["equacao"]
+    n_obs = f"{res['n_obs']:,}".replace(",", ".")
+    linhas.append(f"<tr><td><b>Nº de Observações</b></td><td></td><td>{n_obs}</td><td>{n_obs}</td></tr>")
+    cab = "".join(f"<th>{vdem_teffects.MODELOS[m]}</th>" for m in modelos)
+    corpo = "\n    ".join(linhas)
+    return _CSS_TABELA + f"""
+<div class="table-wrap">
+<table class="table-res">
+  <colgroup><col style="width: 38%;"><col class="col-narrow"><col><col></colgroup>
+  <thead><tr><th></th><th></th>{cab}</tr></thead>
+  <tbody>
+    {corpo}
+  </tbody>
+</table>
+</div>
 
-    with st.sidebar:
-        st.header("Filtros")
+<div class="note">
+  Nota: erros-padrão por bootstrap de países ({res['n_boot']} réplicas, {res['n_paises']} países);
+  * p &lt; 0,10; ** p &lt; 0,05; *** p &lt; 0,01.
+</div>
+"""
 
-        # País (pré-seleção Brazil se existir)
-        paises_all = natsorted(df["country_name"].dropna().unique())
-        default_index = paises_all.index("Brazil") if "Brazil" in paises_all else 0
-        selected_country = st.selectbox("Selecione um país:", paises_all, index=default_index)
+# Um pool de processos ("spawn") por processo do servidor: bootstrap e placebos reaproveitam
+@st.cache_resource
+def _pool_processos():
+    return vdem_stats.pool_processos()
 
-        # Lista de países disponíveis (aqui é global, então usamos todos)
-        available_countries = paises_all
+# Estimação ao vivo da Tabela 3 (vdem_teffects.py): cache por especificação
+@metrics.track_cache("_estimar_teffects")
+@st.cache_data(show_spinner="Estimando efeitos de tratamento (bootstrap em paralelo)…")
+def _estimar_teffects(espec_json: str, n_boot: int, source: str, _df):
+    metrics.note_cache_miss()
+    espec = json.loads(espec_json)
+    return vdem_teffects.estimar(_df, espec, n_boot=n_boot, pool=_pool_processos())
 
-        # Inicializa estado do comparativo uma única vez
-        if "selected_countries" not in st.session_state:
-            st.session_state["selected_countries"] = (
-                [selected_country] if selected_country in available_countries else []
-            )
+# ==========================
+# SIDEBAR COMUM
+# ==========================
+# Modo "imediato": cada widget da sidebar dispara um rerun (padrão).
+# Modo "lote": país/regiões/período/variável ficam num st.form e só valem ao
+# clicar em "Aplicar filtros" (um rerun só); Classe/Grupo rodam num fragmento
+# para atualizar a lista de variáveis sem rerodar a página.
+SIDEBAR_MODO_PADRAO = os.environ.get("VDEM_SIDEBAR_MODO", "imediato").lower()
+FILTROS_APLICADOS = "_filtros_aplicados"
+
+
+def _sidebar_pais_regioes_periodo(paises_all):
+    """País principal, regiões e intervalo de anos (só os widgets)."""
+    default_index = paises_all.index("Brazil") if "Brazil" in paises_all else 0
+    selected_country = st.selectbox("Selecione um país:", paises_all, index=default_index)
+
+    # Regiões (garanta que REGION_MAP tenha a chave "None": [])
+    selected_regions = st.multiselect(
+        "Selecione a região (opcional):",
+        options=list(REGION_MAP.keys())
+    )
 
-        # Se o usuário mudar o país principal, garante que ele fique na lista
-        if selected_country not in st.session_state["selected_countries"]:
-            st.session_state["selected_countries"] = natsorted(
-                list(set(st.session_state["selected_countries"]) | {selected_country})
-            )
+    # PERÍODO
+    min_year, max_year = int(df["year"].min()), int(df["year"].max())
+    year_range = st.slider("Intervalo de anos:", min_year, max_year, (min_year, max_year))
+    return selected_country, selected_regions, year_range
 
-        # Regiões (garanta que REGION_MAP tenha a chave "None": [])
-        selected_regions = st.multiselect(
-            "Selecione a região (opcional):",
-            options=list(REGION_MAP.keys())
+
+def _aplicar_pais_regioes(selected_country, selected_regions, available_countries):
+    """Atualiza st.session_state["selected_countries"] a partir do país e das regiões."""
+    # Inicializa estado do comparativo uma única vez
+    if "selected_countries" not in st.session_state:
+        st.session_state["selected_countries"] = (
+            [selected_country] if selected_country in available_countries else []
+        )
+
+    # Se o usuário mudar o país principal, garante que ele fique na lista
+    if selected_country not in st.session_state["selected_countries"]:
+        st.session_state["selected_countries"] = natsorted(
+            list(set(st.session_state["selected_countries"]) | {selected_country})
         )
 
-        # Atualiza lista de países automaticamente
+    # Atualiza lista de países automaticamente
+    with prof.span("regioes"):
         if "None" in selected_regions:
             # Zera e deixa só o país principal
             selected_countries = [selected_country]
@@ -639,33 +790,33 @@ def build_common_sidebar(enable_sidebar: bool = True):
                         to_add.add(c)
             selected_countries = natsorted(list(to_add))
 
-        # Grava no estado e usa esse mesmo valor daqui pra frente
-        st.session_state["selected_countries"] = selected_countries
+    # Grava no estado e usa esse mesmo valor daqui pra frente
+    st.session_state["selected_countries"] = selected_countries
+    return selected_countries
 
-        # PERÍODO
-        min_year, max_year = int(df["year"].min()), int(df["year"].max())
-        year_range = st.slider("Intervalo de anos:", min_year, max_year, (min_year, max_year))
-        st.markdown("---")
 
-        # UI DE VARIÁVEIS (Visualização dos Dados)
-        # Classes (iniciar da 2 em diante)
+def _sidebar_classe_grupo():
+    """Selects de Classe e Grupo; devolve as variáveis disponíveis e suas descrições."""
+    # Classes (iniciar da 2 em diante)
+    with prof.span("catalogo_classes"):
         classes_presentes = natsorted(
             [cid for cid in df_indicadores["classe_id"].dropna().unique().tolist() if int(str(cid).split('.')[0]) >= 2],
             alg=0
         )
         classe_labels = {cid: f"{cid} - {CLASS_MAP.get(cid, 'Classe desconhecida')}" for cid in classes_presentes}
 
-        pre_classe = st.session_state.get("selected_classe_id")
-        classe_index = classes_presentes.index(pre_classe) if pre_classe in classes_presentes else 0
-        selected_classe_id = st.selectbox(
-            "🔹 Classe",
-            classes_presentes,
-            format_func=lambda cid: classe_labels[cid],
-            index=classe_index
-        )
-        st.session_state["selected_classe_id"] = selected_classe_id  # mantém em sessão
+    pre_classe = st.session_state.get("selected_classe_id")
+    classe_index = classes_presentes.index(pre_classe) if pre_classe in classes_presentes else 0
+    selected_classe_id = st.selectbox(
+        "🔹 Classe",
+        classes_presentes,
+        format_func=lambda cid: classe_labels[cid],
+        index=classe_index
+    )
+    st.session_state["selected_classe_id"] = selected_classe_id  # mantém em sessão
 
-        # Grupos da classe
+    # Grupos da classe
+    with prof.span("catalogo_grupos"):
         grupos_da_classe = natsorted(
             df_indicadores.loc[df_indicadores["classe_id"] == selected_classe_id, "grupo_id"]
             .dropna().unique().tolist(),
@@ -673,21 +824,22 @@ def build_common_sidebar(enable_sidebar: bool = True):
         )
         grupo_labels = {gid: f"{gid} - {GROUP_MAP.get(gid, 'Grupo sem nome (TOC)')}" for gid in grupos_da_classe}
 
-        pre_grupo = st.session_state.get("selected_grupo_id")
-        grupo_index = grupos_da_classe.index(pre_grupo) if pre_grupo in grupos_da_classe else 0
-        selected_grupo_id = st.selectbox(
-            "🔹 Grupo",
-            grupos_da_classe if grupos_da_classe else ["—"],
-            format_func=lambda gid: grupo_labels.get(gid, gid),
-            index=(grupo_index if grupos_da_classe else 0)
-        ) if grupos_da_classe else None
+    pre_grupo = st.session_state.get("selected_grupo_id")
+    grupo_index = grupos_da_classe.index(pre_grupo) if pre_grupo in grupos_da_classe else 0
+    selected_grupo_id = st.selectbox(
+        "🔹 Grupo",
+        grupos_da_classe if grupos_da_classe else ["—"],
+        format_func=lambda gid: grupo_labels.get(gid, gid),
+        index=(grupo_index if grupos_da_classe else 0)
+    ) if grupos_da_classe else None
 
-        if selected_grupo_id:
-            st.session_state["selected_grupo_id"] = selected_grupo_id
-        else:
-            st.session_state.pop("selected_grupo_id", None)
+    if selected_grupo_id:
+        st.session_state["selected_grupo_id"] = selected_grupo_id
+    else:
+        st.session_state.pop("selected_grupo_id", None)
 
-        # Variáveis filtradas por grupo (ou por classe se não houver grupo)
+    # Variáveis filtradas por grupo (ou por classe se não houver grupo)
+    with prof.span("catalogo_variaveis"):
         if selected_grupo_id:
             variaveis_filtradas = variaveis[variaveis["grupo_id"] == selected_grupo_id].copy()
         else:
@@ -698,78 +850,242 @@ def build_common_sidebar(enable_sidebar: bool = True):
             if not variaveis_filtradas.empty else {}
         )
         variaveis_disponiveis = natsorted(list(descricao_variaveis.keys())) if descricao_variaveis else []
+    return variaveis_disponiveis, descricao_variaveis
 
-        # Pré-seleção de variável (vinda do search)
-        pre_var1 = st.session_state.pop("graph_var1_from_search", None)
-        if pre_var1 and pre_var1 in variaveis_disponiveis:
-            var_index = variaveis_disponiveis.index(pre_var1)
+
+def _sidebar_variavel(variaveis_disponiveis, descricao_variaveis, paises=None, year_range=None,
+                     lote: bool = False):
+    """
+    Select da variável (com a pré-seleção vinda da busca); devolve (variável, veio_da_busca).
+    Com `paises`/`year_range`, mostra a cobertura de cada variável na seleção
+    (índice de bits) e permite esconder as que não têm nenhum dado. `lote`: a
+    seleção é a dos filtros já aplicados, não a que está no formulário.
+    """
+    # Pré-seleção de variável (vinda do search)
+    pre_var1 = st.session_state.pop("graph_var1_from_search", None)
+
+    cob = {}
+    if paises and variaveis_disponiveis:
+        with prof.span("cobertura"):
+            cob = vdem_coverage.cobertura(indice_cobertura, paises, year_range, variaveis_disponiveis).to_dict()
+        vazias = [v for v in variaveis_disponiveis if cob.get(v, 0) == 0]
+        esconder = st.checkbox(
+            "Ocultar variáveis sem dados",
+            value=False,
+            key="sidebar_ocultar_vazias",
+            help="Sem nenhuma observação para os países e o período selecionados.",
+        )
+        if lote:
+            st.caption("Cobertura com os países e o período do último **Aplicar filtros** "
+                       "(mudanças ainda não aplicadas não entram).")
+        if vazias:
+            st.caption(f"∅ {len(vazias)} de {len(variaveis_disponiveis)} variável(is) sem dados na seleção.")
+        if esconder and len(vazias) < len(variaveis_disponiveis):
+            variaveis_disponiveis = [v for v in variaveis_disponiveis if v not in vazias or v == pre_var1]
+
+    def _cob_txt(v):
+        if v not in cob:
+            return ""
+        return " · ∅ sem dados" if cob[v] == 0 else f" · {cob[v]:.0%}"
+
+    da_busca = bool(pre_var1 and pre_var1 in variaveis_disponiveis)
+    if da_busca:
+        var_index = variaveis_disponiveis.index(pre_var1)
+    else:
+        var_index = 0 if variaveis_disponiveis else 0
+
+    selected_variavel_id = st.selectbox(
+        "🔹 Variável",
+        variaveis_disponiveis if variaveis_disponiveis else ["—"],
+        index=(var_index if variaveis_disponiveis else 0),
+        format_func=lambda v: (
+            f"{df_indicadores.loc[df_indicadores['variavel'] == v, 'id'].values[0]} - {v} - {descricao_variaveis.get(v, 'Sem descrição')}{_cob_txt(v)}"
+            if v != "—" and not df_indicadores.loc[df_indicadores['variavel'] == v, 'id'].empty
+            else v
+        )
+    ) if variaveis_disponiveis else None
+
+    if selected_variavel_id:
+        st.caption(descricao_variaveis.get(selected_variavel_id, "Sem descrição disponível."))
+        if selected_variavel_id in cob:
+            st.caption(f"Cobertura na seleção: **{cob[selected_variavel_id]:.0%}** dos país-anos.")
+    return selected_variavel_id, da_busca
+
+
+@st.fragment
+def _sidebar_lote(paises_all):
+    """
+    Sidebar no modo "lote". Classe/Grupo só rerodam este fragmento (a lista de
+    variáveis muda sem rerodar a página); o resto fica no form e é aplicado de
+    uma vez em st.session_state[FILTROS_APLICADOS], seguido de um rerun completo.
+    """
+    with prof.fragment("multipage", "sidebar_lote"):
+        variaveis_disponiveis, descricao_variaveis = _sidebar_classe_grupo()
+        with st.form("filtros_sidebar", border=False):
+            selected_country, selected_regions, year_range = _sidebar_pais_regioes_periodo(paises_all)
+            ja_aplicados = st.session_state.get(FILTROS_APLICADOS) or {}
+            selected_variavel_id, da_busca = _sidebar_variavel(
+                variaveis_disponiveis, descricao_variaveis,
+                st.session_state.get("selected_countries"), ja_aplicados.get("year_range"), lote=True,
+            )
+            aplicar = st.form_submit_button("✅ Aplicar filtros", use_container_width=True)
+
+        aplicados = st.session_state.get(FILTROS_APLICADOS)
+        novos = {
+            "selected_country": selected_country,
+            "selected_regions": selected_regions,
+            "year_range": year_range,
+            "selected_variavel_id": selected_variavel_id,
+        }
+        if aplicar or aplicados is None:
+            st.session_state[FILTROS_APLICADOS] = novos
+            if aplicar:
+                st.rerun()
+        elif da_busca:
+            # 📌 da busca vale na hora, como no modo imediato
+            aplicados["selected_variavel_id"] = selected_variavel_id
+        elif novos != aplicados:
+            st.caption("⏸️ Há alterações não aplicadas.")
+
+
+@metrics.track_cache("_indice_relacionadas")
+@st.cache_data(show_spinner=False)
+def _indice_relacionadas(path: str, mtime: float, source: str, source_mtime: float):
+    metrics.note_cache_miss()
+    return vdem_related.carregar(path, vdem_related.fingerprint_da_base(source))
+
+
+def _fixar_variavel(var, classe_id, grupo_id):
+    """Leva a sidebar para a Classe/Grupo da variável e a pré-seleciona (busca e relacionadas)."""
+    st.session_state["selected_classe_id"] = classe_id
+    if grupo_id:
+        st.session_state["selected_grupo_id"] = grupo_id
+    else:
+        st.session_state.pop("selected_grupo_id", None)
+    st.session_state["graph_var1_from_search"] = var
+    st.rerun()
+
+
+def _sidebar_relacionadas(variavel, k: int = 10):
+    """As k variáveis do catálogo mais correlacionadas com a escolhida (lookup no artefato)."""
+    st.sidebar.markdown("---")
+    st.sidebar.subheader("🔗 Variáveis relacionadas")
+    if not RELATED_PATH.exists():
+        st.sidebar.caption(f"Índice não gerado. Rode `python vdem_related.py {VDEM_PARQ.name}`.")
+        return
+    indice = _indice_relacionadas(str(RELATED_PATH), RELATED_PATH.stat().st_mtime,
+                                  str(VDEM_PARQ), VDEM_PARQ.stat().st_mtime)
+    if indice is None:
+        st.sidebar.caption(f"Índice desatualizado: a base mudou depois que ele foi gerado. "
+                           f"Rode `python vdem_related.py {VDEM_PARQ.name}` de novo.")
+        return
+    rel = indice.get(variavel)
+    if rel is None or rel.empty:
+        st.sidebar.caption("Sem variáveis relacionadas para esta variável.")
+        return
+    catalogo = variaveis.drop_duplicates(subset=["variavel"]).set_index("variavel")
+    rel = rel[rel["relacionada"].isin(catalogo.index)].head(k)
+    for _, row in rel.iterrows():
+        var = row["relacionada"]
+        col1, col2 = st.sidebar.columns([5, 1])
+        with col1:
+            st.caption(f"**{var}** · r = {row['r']:+.2f} (n = {row['n']})  \n{catalogo.at[var, 'titulo']}")
+        with col2:
+            if st.button("📌", key=f"rel_{var}"):
+                gid = catalogo.at[var, "grupo_id"]
+                _fixar_variavel(var, str(catalogo.at[var, "classe_id"]), str(gid) if pd.notna(gid) else None)
+
+
+def build_common_sidebar(enable_sidebar: bool = True):
+    # Se a página quiser esconder a sidebar, apenas retorne None e não construa UI
+    if not enable_sidebar:
+        return None
+
+    with st.sidebar:
+        st.header("Filtros")
+        modo_lote = st.toggle(
+            "Aplicar filtros em lote",
+            value=(SIDEBAR_MODO_PADRAO == "lote"),
+            key="sidebar_modo_lote",
+            help="Acumula as mudanças da sidebar e atualiza a página uma vez só, no botão 'Aplicar filtros'.",
+        )
+
+        # País (pré-seleção Brazil se existir)
+        with prof.span("natsorted_paises"):
+            paises_all = natsorted(df["country_name"].dropna().unique())
+
+        # Lista de países disponíveis (aqui é global, então usamos todos)
+        available_countries = paises_all
+
+        if modo_lote:
+            _sidebar_lote(paises_all)
+            aplicados = st.session_state[FILTROS_APLICADOS]
+            selected_country = aplicados["selected_country"]
+            selected_regions = aplicados["selected_regions"]
+            year_range = aplicados["year_range"]
+            selected_variavel_id = aplicados["selected_variavel_id"]
+            selected_countries = _aplicar_pais_regioes(selected_country, selected_regions, available_countries)
         else:
-            var_index = 0 if variaveis_disponiveis else 0
-
-        selected_variavel_id = st.selectbox(
-            "🔹 Variável",
-            variaveis_disponiveis if variaveis_disponiveis else ["—"],
-            index=(var_index if variaveis_disponiveis else 0),
-            format_func=lambda v: (
-                f"{df_indicadores.loc[df_indicadores['variavel'] == v, 'id'].values[0]} - {v} - {descricao_variaveis.get(v, 'Sem descrição')}"
-                if v != "—" and not df_indicadores.loc[df_indicadores['variavel'] == v, 'id'].empty
-                else v
+            st.session_state.pop(FILTROS_APLICADOS, None)
+            selected_country, selected_regions, year_range = _sidebar_pais_regioes_periodo(paises_all)
+            selected_countries = _aplicar_pais_regioes(selected_country, selected_regions, available_countries)
+            st.markdown("---")
+
+            # UI DE VARIÁVEIS (Visualização dos Dados)
+            variaveis_disponiveis, descricao_variaveis = _sidebar_classe_grupo()
+            selected_variavel_id, _ = _sidebar_variavel(
+                variaveis_disponiveis, descricao_variaveis, selected_countries, year_range
             )
-        ) if variaveis_disponiveis else None
 
-        if selected_variavel_id:
-            st.caption(descricao_variaveis.get(selected_variavel_id, "Sem descrição disponível."))
+    # ====== VARIÁVEIS RELACIONADAS (artefato de vdem_related.py) ======
+    if selected_variavel_id:
+        _sidebar_relacionadas(selected_variavel_id)
 
      # ====== BUSCA GLOBAL (ID / VARIÁVEL / TÍTULO) ======
     st.sidebar.markdown("---")
     st.sidebar.subheader("🔍 Buscar Variável")
     pesquisa = st.sidebar.text_input("Parte do nome ou descrição:")
     if pesquisa:
-        catalogo_vars = (
-            df_indicadores[["id", "titulo", "variavel", "classe_id", "grupo_id"]]
-            .dropna(subset=["variavel"])
-            .query("variavel in @df.columns")
-            .copy()
-        )
-        mask = (
-            catalogo_vars["variavel"].str.contains(pesquisa, case=False, na=False) |
-            catalogo_vars["titulo"].str.contains(pesquisa, case=False, na=False) |
-            catalogo_vars["id"].str.contains(pesquisa, case=False, na=False)
-        )
-        resultados = (
-            catalogo_vars.loc[mask]
-            .drop_duplicates(subset=["variavel"])
-            .sort_values(by=["classe_id", "grupo_id", "variavel"])
-        )
-        if not resultados.empty:
-            st.sidebar.caption(
-                f"{len(resultados)} variável(is) encontrada(s). "
-                "Clique no nome para ver detalhes ou no botão para selecionar."
+        with prof.span("busca"):
+            catalogo_vars = (
+                df_indicadores[["id", "titulo", "variavel", "classe_id", "grupo_id"]]
+                .dropna(subset=["variavel"])
+                .query("variavel in @df.columns")
+                .copy()
             )
-            for _, row in resultados.iterrows():
-                var   = row["variavel"]
-                desc  = row["titulo"] or ""
-                rid   = str(row["id"])
-                rcid  = str(row["classe_id"])
-                rgid  = str(row["grupo_id"]) if pd.notna(row["grupo_id"]) else None
-
-                # Linha com duas colunas: nome da variável (expander) e botão
-                col1, col2 = st.sidebar.columns([5, 1])
-                with col1:
-                    with st.expander(f"**{var}**", expanded=False):
-                        st.caption(f"**ID:** {rid}")
-                        st.caption(desc if desc else "Sem descrição.")
-                with col2:
-                    if st.button("📌", key=f"pick_{var}"):
-                        st.session_state["selected_classe_id"] = rcid
-                        if rgid:
-                            st.session_state["selected_grupo_id"] = rgid
-                        else:
-                            st.session_state.pop("selected_grupo_id", None)
-                        st.session_state["graph_var1_from_search"] = var
-                        st.rerun()
-        else:
-            st.sidebar.info("Nenhum resultado na base.")
+            mask = (
+                catalogo_vars["variavel"].str.contains(pesquisa, case=False, na=False) |
+                catalogo_vars["titulo"].str.contains(pesquisa, case=False, na=False) |
+                catalogo_vars["id"].str.contains(pesquisa, case=False, na=False)
+            )
+            resultados = (
+                catalogo_vars.loc[mask]
+                .drop_duplicates(subset=["variavel"])
+                .sort_values(by=["classe_id", "grupo_id", "variavel"])
+            )
+            if not resultados.empty:
+                st.sidebar.caption(
+                    f"{len(resultados)} variável(is) encontrada(s). "
+                    "Clique no nome para ver detalhes ou no botão para selecionar."
+                )
+                for _, row in resultados.iterrows():
+                    var   = row["variavel"]
+                    desc  = row["titulo"] or ""
+                    rid   = str(row["id"])
+                    rcid  = str(row["classe_id"])
+                    rgid  = str(row["grupo_id"]) if pd.notna(row["grupo_id"]) else None
+
+                    # Linha com duas colunas: nome da variável (expander) e botão
+                    col1, col2 = st.sidebar.columns([5, 1])
+                    with col1:
+                        with st.expander(f"**{var}**", expanded=False):
+                            st.caption(f"**ID:** {rid}")
+                            st.caption(desc if desc else "Sem descrição.")
+                    with col2:
+                        if st.button("📌", key=f"pick_{var}"):
+                            _fixar_variavel(var, rcid, rgid)
+            else:
+                st.sidebar.info("Nenhum resultado na base.")
 
     # Retorna TUDO que a página precisa usar
     return {
@@ -918,8 +1234,26 @@ Segurança das Nações Unidas).
     with col2:
         # Tabela de Resultados
         st.caption("Tabela 1 — Resultado das Estimações")
-        html = _html_tabela_resultados()
-        components.html(html, height=620, width=720, scrolling=True)
+        fonte = st.radio("Tabela", ["Paper (publicada)", "Recalculada com a base carregada"],
+                         horizontal=True, label_visibility="collapsed", key="home_tabela_fonte")
+        if fonte == "Paper (publicada)":
+            html = _html_tabela_resultados()
+        else:
+            espec = vdem_teffects.ESPEC_PAPER
+            faltam = [c for c in vdem_teffects.colunas_necessarias(espec) if c not in df.columns]
+            n_boot = st.select_slider("Réplicas do bootstrap", [50, 100, 200, 500], value=200, key="home_tabela_boot")
+            html = None
+            if faltam:
+                st.info("A base carregada não tem as colunas do paper: " + ", ".join(faltam))
+            else:
+                try:
+                    with prof.span("teffects"):
+                        res = _estimar_teffects(json.dumps(espec, sort_keys=True), n_boot, str(VDEM_PARQ), df)
+                    html = _html_tabela_estimada(res)
+                except ValueError as e:
+                    st.info(str(e))
+        if html:
+            components.html(html, height=620, width=720, scrolling=True)
 
 
     col1, col2 = st.columns([1.25, 1])
@@ -987,9 +1321,42 @@ Em síntese, o estudo oferece evidências do papel significativo da ONU como cat
 #    st.success("Resumo: a adesão à ONU está associada a aumentos de democracia, sobretudo em países mais pobres e em contextos regionais democráticos.")
 
 
+# Spillover regional (vdem_cube.spillover_regional): colunas derivadas <var>_reg_loo, cache por variável
+@metrics.track_cache("_spillover_regional")
+@st.cache_data(show_spinner="Calculando a média regional (deixa-um-fora)…")
+def _spillover_regional(variavel: str, source: str, _df):
+    metrics.note_cache_miss()
+    return vdem_cube.spillover_regional(_df, REGIOES_GEOGRAFICAS, [variavel])
+
+
+# Episódios de democratização/autocratização (vdem_episodios.py): todos os países num passe, cache por variável
+@metrics.track_cache("_episodios")
+@st.cache_data(show_spinner="Detectando episódios de democratização/autocratização…")
+def _episodios(variavel: str, source: str, _df):
+    metrics.note_cache_miss()
+    return vdem_episodios.episodios(_df, variavel), vdem_episodios.pontos_de_mudanca(_df, variavel)
+
+
+# Trajetórias parecidas (vdem_trajetorias.py): cache por país/variável/período/método
+@metrics.track_cache("_trajetorias_parecidas")
+@st.cache_data(show_spinner="Comparando trajetórias…")
+def _trajetorias_parecidas(pais: str, variavel: str, year_range: tuple, metodo: str, k: int, banda: int,
+                           source: str, _df):
+    metrics.note_cache_miss()
+    return vdem_trajetorias.similares(_df, pais, variavel, year_range, k=k, metodo=metodo, banda=banda)
+
+
+def _adicionar_ao_comparativo(paises_novos):
+    """Callback: soma os países ao comparativo antes do rerun (o multiselect renasce com eles como default)."""
+    atuais = st.session_state.get("country_picker", st.session_state.get("selected_countries", []))
+    st.session_state["selected_countries"] = list(dict.fromkeys(list(atuais) + list(paises_novos)))
+    st.session_state.pop("country_picker", None)
+
+
 def render_serie_historica():
     # Constrói a sidebar e captura os valores
-    sidebar = build_common_sidebar(enable_sidebar=True)
+    with prof.span("sidebar"):
+        sidebar = build_common_sidebar(enable_sidebar=True)
     if sidebar is None:
         st.error("Sidebar não construída — verifique o parâmetro enable_sidebar.")
         return
@@ -998,87 +1365,305 @@ def render_serie_historica():
     sel_year_r   = sidebar["year_range"]
     main_country = sidebar["selected_country"]
     all_options  = sidebar["available_countries"]
-    paises       = st.multiselect(
-        "Selecione os países para comparar:",
-        options=all_options,
-        default=[c for c in st.session_state.get("selected_countries", [main_country]) if c in all_options],
-        key="country_picker",
-    )
+    _fragmento_serie(sel_var, sel_year_r, main_country, all_options)
 
-    # Garante que o país principal fique como 1º na legenda/cores
-    paises_ordenados = [c for c in [main_country] + [p for p in paises if p != main_country] if c in all_options]
 
-    # Sincroniza estado se usuário mudou manualmente
-    if paises != st.session_state.get("selected_countries", []):
-        st.session_state["selected_countries"] = paises
+@st.fragment
+def _fragmento_serie(sel_var, sel_year_r, main_country, all_options):
+    """
+    Comparativo de países + gráfico. Mexer no multiselect reroda só este
+    bloco (st.fragment): sidebar e catálogo não são reconstruídos.
+    """
+    with prof.fragment("multipage", "fragmento_serie"):
+        paises       = st.multiselect(
+            "Selecione os países para comparar:",
+            options=all_options,
+            default=[c for c in st.session_state.get("selected_countries", [main_country]) if c in all_options],
+            key="country_picker",
+        )
 
-    # Título da variável
-    if sel_var:
-        titulo_var = df_indicadores.loc[df_indicadores["variavel"] == sel_var, "titulo"].values
-        titulo_var = titulo_var[0] if len(titulo_var) > 0 else sel_var
-    else:
-        titulo_var = "—"
+        # Garante que o país principal fique como 1º na legenda/cores
+        paises_ordenados = [c for c in [main_country] + [p for p in paises if p != main_country] if c in all_options]
+
+        # Sincroniza estado se usuário mudou manualmente
+        if paises != st.session_state.get("selected_countries", []):
+            st.session_state["selected_countries"] = paises
 
-    st.subheader(f" 📈 Série Histórica: {titulo_var}")
-    st.write(f"Período: **{sel_year_r[0]}–{sel_year_r[1]}**")
+        # Título da variável
+        if sel_var:
+            titulo_var = df_indicadores.loc[df_indicadores["variavel"] == sel_var, "titulo"].values
+            titulo_var = titulo_var[0] if len(titulo_var) > 0 else sel_var
+        else:
+            titulo_var = "—"
+
+        st.subheader(f" 📈 Série Histórica: {titulo_var}")
+        st.write(f"Período: **{sel_year_r[0]}–{sel_year_r[1]}**")
+        mostrar_spillover = st.toggle(
+            "Comparar com a média regional (spillover)",
+            value=False,
+            key="serie_spillover",
+            help="Linha tracejada: média da variável nos países que dividem alguma região geográfica com cada país, sem ele próprio (G7, G20, BRICS e Conselho de Segurança não contam).",
+        )
+        # as duas companheiras, como em load_faixa_incerteza (que devolve None se faltar uma)
+        tem_faixa = bool(sel_var) and {f"{sel_var}_codelow", f"{sel_var}_codehigh"} <= set(_parquet_schema_names(VDEM_PARQ))
+        mostrar_faixa = st.toggle(
+            "Faixa de incerteza (codelow–codehigh)",
+            value=False,
+            key="serie_faixa",
+            disabled=not tem_faixa,
+            help="Intervalo de medição do V-Dem para a variável (colunas _codelow/_codehigh), lido só quando ligado."
+            if tem_faixa else "A variável selecionada não tem as colunas _codelow/_codehigh na base.",
+        )
 
-    # Plot
-    if sel_var:
-        if sel_var not in df.columns:
-            st.warning(f"A variável '{sel_var}' não está na base.")
-            return
+        tem_episodios = sel_var in vdem_episodios.VARIAVEIS and sel_var in df.columns
+        mostrar_episodios = st.toggle(
+            "Episódios de democratização/autocratização",
+            value=False,
+            key="serie_episodios",
+            disabled=not tem_episodios,
+            help="Faixas: sequências de variações anuais ≥ 0,01 (até 4 anos parados tolerados) que somam ≥ 0,10. "
+                 "Triângulos: rupturas de nível (segmentação binária)."
+            if tem_episodios else "Disponível para v2x_libdem e v2x_polyarchy.",
+        )
 
-        df_plot = (
-            df[df["country_name"].isin(paises) & df["year"].between(sel_year_r[0], sel_year_r[1])]
-            [["year", "country_name", sel_var]]
-            .sort_values(["year", "country_name"])
+        eventos_disp = [e for e in vdem_eventos.EVENTOS if e in set(eventos_rle["evento"].unique())]
+        eventos_sel = st.multiselect(
+            "Faixas de conflitos e eventos",
+            eventos_disp,
+            key="serie_eventos",
+            format_func=lambda e: vdem_eventos.EVENTOS[e][1],
+            help="Anos com o indicador ligado em cada país (e_civil_war, e_miinteco, un_member; "
+                 "mudança de categoria em v2x_regime).",
         )
 
-        if df_plot.empty:
-            st.info("Sem dados para o período/países selecionados.")
-            return
-
-        if not pd.api.types.is_numeric_dtype(df[sel_var]):
-            st.warning("A variável selecionada não é numérica.")
-            return
-
-        # prepara dados long
-        pivot = df_plot.pivot(index="year", columns="country_name", values=sel_var).reset_index()
-        long_df = pivot.melt(id_vars="year", var_name="country_name", value_name="valor").dropna()
-        num_paises = long_df["country_name"].nunique()
-
-        # Ticks do eixo X
-        span = max(1, sel_year_r[1] - sel_year_r[0])
-        tick_step = 10 if span >= 20 else 5
-        tick_vals = list(range(int(sel_year_r[0]), int(sel_year_r[1]) + 1, tick_step))
-
-        # Cores — assegura 1ª cor para o país principal
-        base_colors = generate_colors(num_paises, seed=52)
-        # Reordena cores para bater com paises_ordenados
-        # (mantém 1ª cor para main_country)
-        legend_order = paises_ordenados
-        color_map = dict(zip(legend_order, base_colors[:len(legend_order)]))
-
-        chart = (
-            alt.Chart(long_df)
-            .mark_line()
-            .encode(
-                x=alt.X("year:Q", axis=alt.Axis(format="d", values=tick_vals, title="Ano")),
-                y=alt.Y("valor:Q", title=titulo_var),
-                color=alt.Color(
-                    "country_name:N",
-                    title="País",
-                    sort=legend_order,
-                    scale=alt.Scale(domain=list(color_map.keys()), range=list(color_map.values()))
+        # Plot
+        if sel_var:
+            if sel_var not in df.columns:
+                st.warning(f"A variável '{sel_var}' não está na base.")
+                return
+
+            with prof.span("filtro"):
+                mask_plot = df["country_name"].isin(paises) & df["year"].between(sel_year_r[0], sel_year_r[1])
+                df_plot = (
+                    df[mask_plot]
+                    [["year", "country_name", sel_var]]
+                    .sort_values(["year", "country_name"])
                 )
-            )
-            .properties(width="container", height=420)
-        )
-        st.altair_chart(chart, use_container_width=True)
-    else:
-        st.info("Selecione uma variável para visualizar o gráfico.")
+
+            if df_plot.empty:
+                st.info("Sem dados para o período/países selecionados.")
+                return
+
+            if not pd.api.types.is_numeric_dtype(df[sel_var]):
+                st.warning("A variável selecionada não é numérica.")
+                return
+
+            # prepara dados long
+            with prof.span("pivot_melt"):
+                pivot = df_plot.pivot(index="year", columns="country_name", values=sel_var).reset_index()
+                long_df = pivot.melt(id_vars="year", var_name="country_name", value_name="valor").dropna()
+            num_paises = long_df["country_name"].nunique()
+
+            # Ticks do eixo X
+            span = max(1, sel_year_r[1] - sel_year_r[0])
+            tick_step = 10 if span >= 20 else 5
+            tick_vals = list(range(int(sel_year_r[0]), int(sel_year_r[1]) + 1, tick_step))
+
+            # Cores — assegura 1ª cor para o país principal
+            base_colors = generate_colors(num_paises, seed=52)
+            # Reordena cores para bater com paises_ordenados
+            # (mantém 1ª cor para main_country)
+            legend_order = paises_ordenados
+            color_map = dict(zip(legend_order, base_colors[:len(legend_order)]))
+
+            with prof.span("altair_spec"):
+                chart = (
+                    alt.Chart(long_df)
+                    .mark_line()
+                    .encode(
+                        x=alt.X("year:Q", axis=alt.Axis(format="d", values=tick_vals, title="Ano")),
+                        y=alt.Y("valor:Q", title=titulo_var),
+                        color=alt.Color(
+                            "country_name:N",
+                            title="País",
+                            sort=legend_order,
+                            scale=alt.Scale(domain=list(color_map.keys()), range=list(color_map.values()))
+                        )
+                    )
+                    .properties(width="container", height=420)
+                )
+                if mostrar_faixa and tem_faixa:
+                    with prof.span("faixa_incerteza"):
+                        faixa = load_faixa_incerteza(sel_var)
+                        faixa = faixa[
+                            faixa["country_name"].isin(paises) & faixa["year"].between(sel_year_r[0], sel_year_r[1])
+                        ].dropna(subset=["low", "high"])
+                    if not faixa.empty:
+                        chart = (
+                            alt.Chart(faixa)
+                            .mark_area(opacity=0.18)
+                            .encode(
+                                x="year:Q",
+                                y="low:Q",
+                                y2="high:Q",
+                                color=alt.Color("country_name:N", sort=legend_order, legend=None,
+                                                scale=alt.Scale(domain=list(color_map.keys()), range=list(color_map.values()))),
+                            )
+                        ) + chart
+                if mostrar_spillover:
+                    col_reg = f"{sel_var}_reg_loo"
+                    reg = _spillover_regional(sel_var, str(VDEM_PARQ), df)[col_reg]
+                    reg_df = (
+                        df.loc[mask_plot, ["year", "country_name"]]
+                        .assign(valor=reg[mask_plot])
+                        .dropna(subset=["valor"])
+                    )
+                    if not reg_df.empty:
+                        chart = chart + (
+                            alt.Chart(reg_df)
+                            .mark_line(strokeDash=[5, 4], opacity=0.8)
+                            .encode(
+                                x="year:Q",
+                                y="valor:Q",
+                                color=alt.Color("country_name:N", sort=legend_order,
+                                                scale=alt.Scale(domain=list(color_map.keys()), range=list(color_map.values()))),
+                                tooltip=["country_name", "year", alt.Tooltip("valor:Q", title="média regional", format=".3f")],
+                            )
+                        )
+                if mostrar_episodios and tem_episodios:
+                    with prof.span("episodios"):
+                        ep, rupturas = _episodios(sel_var, str(VDEM_PARQ), df)
+                        ep = ep[
+                            ep["country_name"].isin(paises)
+                            & (ep["fim"] >= sel_year_r[0]) & (ep["inicio"] <= sel_year_r[1])
+                        ].assign(
+                            x0=lambda e: (e["inicio"] - 1).clip(lower=sel_year_r[0]),
+                            x1=lambda e: e["fim"].clip(upper=sel_year_r[1]),
+                        )
+                        rupturas = rupturas[rupturas["country_name"].isin(paises)].merge(
+                            long_df, on=["country_name", "year"]
+                        )
+                    cores_tipo = {"democratização": "#2ca02c", "autocratização": "#d62728"}
+                    tooltip_ep = ["country_name", "tipo", "inicio", "fim",
+                                  alt.Tooltip("variacao:Q", title="variação", format="+.3f")]
+                    for tipo, cor in cores_tipo.items():
+                        sub_ep = ep[ep["tipo"] == tipo]
+                        if not sub_ep.empty:
+                            chart = (
+                                alt.Chart(sub_ep)
+                                .mark_rect(opacity=0.12, color=cor)
+                                .encode(x="x0:Q", x2="x1:Q", tooltip=tooltip_ep)
+                            ) + chart
+                    if not rupturas.empty:
+                        chart = chart + (
+                            alt.Chart(rupturas)
+                            .mark_point(shape="triangle", filled=True, size=70)
+                            .encode(
+                                x="year:Q",
+                                y="valor:Q",
+                                color=alt.Color("country_name:N", sort=legend_order,
+                                                scale=alt.Scale(domain=list(color_map.keys()), range=list(color_map.values()))),
+                                tooltip=["country_name", "year",
+                                         alt.Tooltip("antes:Q", format=".3f"),
+                                         alt.Tooltip("depois:Q", format=".3f")],
+                            )
+                        )
+                if eventos_sel:
+                    bandas = vdem_eventos.no_periodo(eventos_rle, paises, sel_year_r, eventos_sel).assign(
+                        country_name=lambda x: x["country_name"].astype(str),
+                        fim_b=lambda x: x["fim"] + 1,
+                    )
+                    for ev in eventos_sel:
+                        sub_ev = bandas[bandas["evento"] == ev]
+                        if not sub_ev.empty:
+                            chart = (
+                                alt.Chart(sub_ev)
+                                .mark_rect(opacity=0.15, color=vdem_eventos.EVENTOS[ev][2])
+                                .encode(x="inicio:Q", x2="fim_b:Q",
+                                        tooltip=["country_name", alt.Tooltip("rotulo:N", title="evento"),
+                                                 "inicio", "fim"])
+                            ) + chart
+            with prof.span("altair_render"):
+                st.altair_chart(chart, use_container_width=True)
+            if eventos_sel:
+                st.caption("Faixas: " + "; ".join(
+                    f"{vdem_eventos.EVENTOS[e][1]} ({int((bandas['evento'] == e).sum())})" for e in eventos_sel
+                ) + ".")
+            if mostrar_episodios and tem_episodios:
+                st.caption(
+                    f"Faixas verdes: democratização; vermelhas: autocratização ({len(ep)} episódio(s) na seleção). "
+                    f"▲ rupturas de nível: {len(rupturas)}."
+                )
+            if mostrar_spillover:
+                sem_regiao = [p for p in paises if not any(p in m for m in REGIOES_GEOGRAFICAS.values())]
+                st.caption(
+                    "Tracejado: média regional deixa-um-fora de cada país."
+                    + (f" Sem região geográfica: {', '.join(sem_regiao)}." if sem_regiao else "")
+                )
+
+            # Países com trajetória parecida com a do país principal
+            with st.expander(f"🔎 Países com trajetória parecida com {main_country}"):
+                buscar = st.toggle("Buscar trajetórias parecidas", value=False, key="sim_buscar",
+                                   help="A busca compara o país com todos os outros (o DTW é o mais caro); "
+                                        "só roda com esta opção ligada.")
+                c1, c2, c3 = st.columns([1.2, 1, 1])
+                with c1:
+                    metodo = st.radio("Distância", ["euclidiana", "dtw"], horizontal=True, key="sim_metodo",
+                                      format_func=lambda m: {"euclidiana": "Euclidiana (anos alinhados)",
+                                                             "dtw": "DTW (permite defasagem)"}[m])
+                with c2:
+                    k_sim = st.slider("Quantos países", 3, 15, 8, key="sim_k")
+                with c3:
+                    banda = st.slider("Defasagem máx. (anos)", 1, 20, 5, key="sim_banda",
+                                      disabled=(metodo != "dtw"))
+                if buscar:
+                    try:
+                        with prof.span("similaridade"):
+                            # a banda só vale no DTW: fixa em 0 na euclidiana para o slider desativado
+                            # não abrir entradas novas no cache
+                            sim = _trajetorias_parecidas(main_country, sel_var, tuple(sel_year_r), metodo, k_sim,
+                                                         banda if metodo == "dtw" else 0, str(VDEM_PARQ), df)
+                    except ValueError as e:
+                        st.info(str(e))
+                    else:
+                        if sim.empty:
+                            st.info("Nenhum país com anos suficientes em comum no período.")
+                        else:
+                            st.dataframe(
+                                sim, use_container_width=True, hide_index=True,
+                                column_config={"distancia": st.column_config.NumberColumn(format="%.4f")},
+                            )
+                            st.button(
+                                "➕ Adicionar ao comparativo",
+                                key="sim_adicionar",
+                                on_click=_adicionar_ao_comparativo,
+                                args=(sim["country_name"].tolist(),),
+                            )
+        else:
+            st.info("Selecione uma variável para visualizar o gráfico.")
             
 
+def choropleth_paises(df_map: pd.DataFrame, **kwargs):
+    """px.choropleth por nome de país (o mesmo setup do Mapa VDEM e da página de agrupamentos)."""
+    fig = px.choropleth(
+        df_map,
+        locations="country_name",
+        locationmode="country names",
+        hover_name="country_name",
+        **kwargs,
+    )
+    fig.update_layout(margin=dict(l=0, r=0, t=40, b=0))
+    return fig
+
+
+# Índice as-of (vdem_coverage.indice_asof): último dado até cada ano, cache por variável
+@metrics.track_cache("_indice_asof")
+@st.cache_data(show_spinner=False)
+def _indice_asof(variavel: str, source: str, _df):
+    metrics.note_cache_miss()
+    return vdem_coverage.indice_asof(_df, variavel)
+
+
 def render_mapas(ctx: dict):
     """
     Página 'Mapas & GIF' reaproveitando o estado/variáveis da sidebar comum.
@@ -1091,7 +1676,6 @@ def render_mapas(ctx: dict):
     year_range        = ctx["year_range"]
     selected_var      = ctx["selected_variavel_id"]
     selected_country  = ctx["selected_country"]
-    selected_countries = st.session_state.get("selected_countries", [selected_country])
 
     st.title("🗺️ Mapa Interativo")
     # ==============================
@@ -1108,117 +1692,519 @@ def render_mapas(ctx: dict):
     titulo_var = df_indicadores.loc[df_indicadores["variavel"] == selected_var, "titulo"].values
     titulo_var = titulo_var[0] if len(titulo_var) > 0 else selected_var
 
-    # ==============================
-    # Controles locais da página de mapas
-    # ==============================
+    _fragmento_mapa(df, selected_var, titulo_var, year_range, selected_country)
+
+
+@st.fragment
+def _fragmento_mapa(df, selected_var, titulo_var, year_range, selected_country):
+    """
+    Controles locais (agregação, animação, filtro) + mapa. Trocar esses
+    controles reroda só este bloco (st.fragment), não o script inteiro.
+    """
+    selected_countries = st.session_state.get("selected_countries", [selected_country])
+    with prof.fragment("multipage", "fragmento_mapa"):
+        # ==============================
+        # Controles locais da página de mapas
+        # ==============================
+        c1, c2, c3 = st.columns([1.2, 1, 1])
+        with c1:
+            modo_agg = st.selectbox(
+                "Agregação no período selecionado:",
+                ["Média", "Mediana", "Último ano do período"]
+            )
+        with c2:
+            animar = st.checkbox("🎬 Animação por ano", value=False, help="Exibe o mapa ano a ano no período selecionado.")
+        with c3:
+            show_only_selected = st.checkbox("Filtrar países selecionados", value=False,
+                                             help="Se marcado, mostra apenas os países escolhidos na sidebar.")
+
+        # ==============================
+        # Filtra dados do período e (opcionalmente) países selecionados
+        # ==============================
+        with prof.span("filtro"):
+            mask_periodo = df["year"].between(year_range[0], year_range[1])
+            dff = df.loc[mask_periodo, ["country_name", "year", selected_var]].copy()
+
+            if show_only_selected and len(selected_countries) > 0:
+                dff = dff[dff["country_name"].isin(selected_countries)]
+
+        # ==============================
+        # Construção do DataFrame de mapa
+        # ==============================
+        if animar:
+            # Mapa animado: um frame por ano dentro do período
+            # (se desejar reduzir frames, pode amostrar anos aqui)
+            with prof.span("agregacao"):
+                df_map = dff.dropna(subset=[selected_var]).copy()
+            # Mantém apenas linhas com valores numéricos
+            if not pd.api.types.is_numeric_dtype(df[selected_var]):
+                st.warning("A variável selecionada não é numérica — impossível mapear.")
+                return
+
+            # Escala contínua vermelho→azul (RdBu com reverso=True dá vermelho=baixa; azul=alta)
+            with prof.span("plotly_fig"):
+                fig = choropleth_paises(
+                    df_map,
+                    color=selected_var,
+                    animation_frame="year",
+                    color_continuous_scale="RdBu",
+                    range_color=(float(df_map[selected_var].min()), float(df_map[selected_var].max())),
+                    title=f"{titulo_var} — {year_range[0]}–{year_range[1]} (animação)"
+                )
+                fig.update_layout(
+                    updatemenus=[{
+                        "buttons": [
+                            {"args": [None, {"frame": {"duration": 100, "redraw": True}, "fromcurrent": True}],
+                            "label": "Play", "method": "animate"},
+                            {"args": [[None], {"frame": {"duration": 0, "redraw": True}, "mode": "immediate"}],
+                            "label": "Pause", "method": "animate"}
+                        ],
+                        "type": "buttons"
+                    }]
+                )
+            with prof.span("plotly_render"):
+                st.plotly_chart(fig, use_container_width=True)
+
+        else:
+            # Mapa estático: agrega por país dentro do período
+            if not pd.api.types.is_numeric_dtype(df[selected_var]):
+                st.warning("A variável selecionada não é numérica — impossível mapear.")
+                return
+        
+            with prof.span("agregacao"):
+                if modo_agg == "Média":
+                    df_map = dff.groupby("country_name", as_index=False)[selected_var].mean()
+                elif modo_agg == "Mediana":
+                    df_map = dff.groupby("country_name", as_index=False)[selected_var].median()
+                else:  # "Último ano do período": último valor disponível até o fim do período
+                    last_year = year_range[1]
+                    asof = _indice_asof(selected_var, str(VDEM_PARQ), df)
+                    df_map = (
+                        vdem_coverage.ultimo_valor(asof, last_year, desde=year_range[0])
+                        .rename(columns={"valor": selected_var})
+                    )
+                    if show_only_selected and len(selected_countries) > 0:
+                        df_map = df_map[df_map["country_name"].isin(selected_countries)]
+
+            if df_map.empty:
+                st.info("Sem dados para o período/seleção atual.")
+                return
+            with prof.span("plotly_fig"):
+                fig = choropleth_paises(
+                    df_map,
+                    color=selected_var,
+                    hover_data={"ano_fonte": True} if "ano_fonte" in df_map.columns else None,
+                    labels={"ano_fonte": "Ano do dado"},
+                    color_continuous_scale="RdBu",  # vermelho (baixo) → azul (alto)
+                    range_color=(float(df_map[selected_var].min()), float(df_map[selected_var].max())),
+                    title=f"{titulo_var} — {modo_agg} ({year_range[0]}–{year_range[1]})"
+                )
+            with prof.span("plotly_render"):
+                st.plotly_chart(fig, use_container_width=True)
+            if "ano_fonte" in df_map.columns:
+                atrasados = int((df_map["ano_fonte"] < year_range[1]).sum())
+                if atrasados:
+                    st.caption(
+                        f"{atrasados} país(es) sem dado em {year_range[1]}: mostrado o último valor disponível "
+                        f"desde {year_range[0]} (o ano aparece ao passar o mouse)."
+                    )
+
+        # ==============================
+        # Notas e tips
+        # ==============================
+        st.caption(
+            "Dica: use a mesma sidebar da Série Histórica para trocar **país**, **período** e **variável**. "
+            "Ative a animação para ver a evolução ano a ano."
+        )
+
+ 
+# Controle sintético (vdem_synthcontrol.py): tratado + todos os placebos num só cache
+@metrics.track_cache("_controle_sintetico")
+@st.cache_data(show_spinner="Ajustando o controle sintético e os placebos (em paralelo)…")
+def _controle_sintetico(pais: str, t0: int, pre: int, pos: int, desfecho: str, source: str, _df):
+    metrics.note_cache_miss()
+    return vdem_synthcontrol.controle_sintetico(_df, pais, t0, pre=pre, pos=pos, desfecho=desfecho,
+                                                pool=_pool_processos())
+
+
+def render_controle_sintetico(ctx: dict):
+    """
+    Página 'Controle Sintético': o país da sidebar contra uma combinação convexa
+    de países que ainda não eram membros da ONU, em torno do seu un_entry_year.
+    """
+    df      = ctx["df"]
+    pais    = ctx["selected_country"]
+
+    st.title("🎯 Controle Sintético — entrada na ONU")
+    faltando = [c for c in ["un_member", "un_entry_year"] if c not in df.columns]
+    if faltando:
+        st.warning(f"A base não tem as colunas do paper: {', '.join(faltando)}.")
+        return
+    desfechos = [c for c in ["v2x_libdem", "v2x_polyarchy", "v2x_partipdem", "v2x_delibdem", "v2x_egaldem"]
+                 if c in df.columns]
+    if not desfechos:
+        st.warning("Nenhum índice de democracia (v2x_*) na base.")
+        return
+
+    entrada = pd.to_numeric(df.loc[df["country_name"] == pais, "un_entry_year"], errors="coerce").dropna()
+    if entrada.empty:
+        st.info(f"**{pais}** não tem ano de entrada na ONU na base — escolha outro país na sidebar.")
+        return
+    t0 = int(entrada.iloc[0])
+
     c1, c2, c3 = st.columns([1.2, 1, 1])
     with c1:
-        modo_agg = st.selectbox(
-            "Agregação no período selecionado:",
-            ["Média", "Mediana", "Último ano do período"]
-        )
+        desfecho = st.selectbox("Desfecho", desfechos, key="sc_desfecho")
     with c2:
-        animar = st.checkbox("🎬 Animação por ano", value=False, help="Exibe o mapa ano a ano no período selecionado.")
+        pre = st.slider("Anos antes da entrada", 5, 40, 20, key="sc_pre")
     with c3:
-        show_only_selected = st.checkbox("Filtrar países selecionados", value=False,
-                                         help="Se marcado, mostra apenas os países escolhidos na sidebar.")
-
-    # ==============================
-    # Filtra dados do período e (opcionalmente) países selecionados
-    # ==============================
-    mask_periodo = df["year"].between(year_range[0], year_range[1])
-    dff = df.loc[mask_periodo, ["country_name", "year", selected_var]].copy()
+        pos = st.slider("Anos depois da entrada", 5, 30, 15, key="sc_pos")
 
-    if show_only_selected and len(selected_countries) > 0:
-        dff = dff[dff["country_name"].isin(selected_countries)]
+    st.write(f"**{pais}** entrou na ONU em **{t0}** · janela **{t0 - pre}–{t0 + pos}**")
+    try:
+        res = _controle_sintetico(pais, t0, pre, pos, desfecho, str(VDEM_PARQ), df)
+    except ValueError as e:
+        st.info(str(e))
+        return
 
-    # ==============================
-    # Construção do DataFrame de mapa
-    # ==============================
-    if animar:
-        # Mapa animado: um frame por ano dentro do período
-        # (se desejar reduzir frames, pode amostrar anos aqui)
-        df_map = dff.dropna(subset=[selected_var]).copy()
-        # Mantém apenas linhas com valores numéricos
-        if not pd.api.types.is_numeric_dtype(df[selected_var]):
-            st.warning("A variável selecionada não é numérica — impossível mapear.")
-            return
-
-        # Escala contínua vermelho→azul (RdBu com reverso=True dá vermelho=baixa; azul=alta)
-        fig = px.choropleth(
-            df_map,
-            locations="country_name",
-            locationmode="country names",
-            color=selected_var,
-            hover_name="country_name",
-            animation_frame="year",
-            color_continuous_scale="RdBu",
-            range_color=(float(df_map[selected_var].min()), float(df_map[selected_var].max())),
-            title=f"{titulo_var} — {year_range[0]}–{year_range[1]} (animação)"
+    m1, m2, m3, m4 = st.columns(4)
+    m1.metric("Doadores", res["n_doadores"])
+    m2.metric("RMSPE pré", f"{res['rmspe_pre']:.3f}")
+    m3.metric("RMSPE pós", f"{res['rmspe_pos']:.3f}")
+    m4.metric("p-valor (placebos)", f"{res['p_valor']:.2f}",
+              help="Fração de países (tratado + placebos) com razão RMSPE pós/pré pelo menos tão grande quanto a do tratado.")
+
+    serie = res["serie"].rename(columns={"real": pais, "sintetico": f"{pais} sintético"})
+    long_df = serie.melt(id_vars="year", var_name="serie", value_name="valor")
+    regra = alt.Chart(pd.DataFrame({"year": [t0]})).mark_rule(strokeDash=[4, 4], color="gray").encode(x="year:Q")
+    linhas = (
+        alt.Chart(long_df)
+        .mark_line()
+        .encode(
+            x=alt.X("year:Q", axis=alt.Axis(format="d", title="Ano")),
+            y=alt.Y("valor:Q", title=desfecho),
+            color=alt.Color("serie:N", title=None),
+            strokeDash=alt.StrokeDash("serie:N", legend=None),
         )
-        fig.update_layout(
-            margin=dict(l=0, r=0, t=40, b=0),
-            updatemenus=[{
-                "buttons": [
-                    {"args": [None, {"frame": {"duration": 100, "redraw": True}, "fromcurrent": True}],
-                    "label": "Play", "method": "animate"},
-                    {"args": [[None], {"frame": {"duration": 0, "redraw": True}, "mode": "immediate"}],
-                    "label": "Pause", "method": "animate"}
-                ],
-                "type": "buttons"
-            }]
-        )
-        st.plotly_chart(fig, use_container_width=True)
+    )
+    st.altair_chart((linhas + regra).properties(width="container", height=380), use_container_width=True)
+
+    # Placebos: gaps dos doadores (cinza) × gap do tratado; fora os de ajuste pré muito pior (5× o RMSPE do tratado)
+    st.subheader("Placebos")
+    plac = res["placebos"]
+    plac = plac[plac["rmspe_pre"] <= 5 * max(res["rmspe_pre"], 1e-6)]
+    gap = res["serie"].assign(gap=lambda d: d["real"] - d["sintetico"])
+    cinza = (
+        alt.Chart(plac)
+        .mark_line(color="lightgray", strokeWidth=1)
+        .encode(x=alt.X("year:Q", axis=alt.Axis(format="d", title="Ano")),
+                y=alt.Y("gap:Q", title="Real − sintético"),
+                detail="country_name:N",
+                tooltip=["country_name", "year", alt.Tooltip("gap:Q", format=".3f")])
+    )
+    tratado = alt.Chart(gap).mark_line(color="#c0392b", strokeWidth=2.5).encode(x="year:Q", y="gap:Q")
+    st.altair_chart((cinza + tratado + regra).properties(width="container", height=320), use_container_width=True)
+    st.caption(f"{plac['country_name'].nunique()} placebos com ajuste pré-entrada comparável (de {res['n_doadores']}).")
+
+    with st.expander("Pesos dos doadores"):
+        st.dataframe(res["pesos"], use_container_width=True, hide_index=True,
+                     column_config={"peso": st.column_config.NumberColumn(format="%.3f")})
+
+
+# Efeitos fixos de país e ano (vdem_panel.py): cache por especificação
+@metrics.track_cache("_efeitos_fixos")
+@st.cache_data(show_spinner="Estimando o painel com efeitos fixos…")
+def _efeitos_fixos(desfecho: str, regressores: tuple, year_range: tuple, log_vars: tuple, source: str, _df):
+    metrics.note_cache_miss()
+    return vdem_panel.efeitos_fixos(_df, desfecho, regressores, year_range=year_range, log_vars=log_vars)
+
+
+def render_efeitos_fixos(ctx: dict):
+    """
+    Página 'Efeitos Fixos': MQO com efeitos fixos de país e de ano e erro-padrão
+    por país, no período da sidebar. Substitui o vai-e-volta com o Stata.
+    """
+    df         = ctx["df"]
+    year_range = ctx["year_range"]
+
+    st.title("🧮 Painel com Efeitos Fixos (país e ano)")
+    candidatos = [c for c in numeric_candidates(df) if c not in ("un_entry_year",)]
+    if not candidatos:
+        st.warning("Nenhuma variável numérica na base.")
+        return
+    padrao_y = pick_default_var(df)
+    padrao_x = [c for c in ["e_gdppc", "e_peaveduc", "e_civil_war"] if c in candidatos]
+
+    c1, c2 = st.columns([1, 2])
+    with c1:
+        desfecho = st.selectbox("Variável dependente", candidatos,
+                                index=candidatos.index(padrao_y) if padrao_y in candidatos else 0, key="fe_desfecho")
+    with c2:
+        regressores = st.multiselect("Regressores", [c for c in candidatos if c != desfecho],
+                                     default=[c for c in padrao_x if c != desfecho], key="fe_regressores",
+                                     format_func=lambda v: f"{v} — {get_titulo_by_var(v)}" if get_titulo_by_var(v) != v else v)
+    log_vars = st.multiselect("Em log", [c for c in regressores if c in ("e_gdppc", "e_pop")],
+                              default=[c for c in regressores if c in ("e_gdppc", "e_pop")], key="fe_log")
+    if not regressores:
+        st.info("Escolha pelo menos um regressor.")
+        return
+
+    try:
+        res = _efeitos_fixos(desfecho, tuple(regressores), tuple(year_range), tuple(log_vars), str(VDEM_PARQ), df)
+    except ValueError as e:
+        st.info(str(e))
+        return
+
+    st.write(f"**{desfecho}** ~ {' + '.join(res['tabela']['termo'])} + EF país + EF ano · "
+             f"período **{year_range[0]}–{year_range[1]}**")
+    m1, m2, m3, m4 = st.columns(4)
+    m1.metric("Observações", f"{res['n_obs']:,}".replace(",", "."))
+    m2.metric("Países (clusters)", res["n_paises"])
+    m3.metric("Anos", res["n_anos"])
+    m4.metric("R² within", f"{res['r2_within']:.3f}")
+
+    tab = res["tabela"]
+    st.dataframe(
+        tab, use_container_width=True, hide_index=True,
+        column_config={c: st.column_config.NumberColumn(format=f)
+                       for c, f in [("coef", "%.4f"), ("ep", "%.4f"), ("t", "%.2f"), ("p", "%.3f")]},
+    )
+    ic = tab.dropna(subset=["coef"]).assign(li=lambda d: d["coef"] - 1.96 * d["ep"],
+                                              ls=lambda d: d["coef"] + 1.96 * d["ep"])
+    base = alt.Chart(ic).encode(y=alt.Y("termo:N", title=None))
+    zero = alt.Chart(pd.DataFrame({"x": [0]})).mark_rule(color="gray", strokeDash=[4, 4]).encode(x="x:Q")
+    st.altair_chart(
+        (base.mark_rule().encode(x=alt.X("li:Q", title="Coeficiente (IC 95%)"), x2="ls:Q")
+         + base.mark_point(filled=True, size=70).encode(x="coef:Q", tooltip=["termo", alt.Tooltip("coef:Q", format=".4f"),
+                                                                           alt.Tooltip("ep:Q", format=".4f"), "sig"])
+         + zero).properties(width="container", height=40 + 35 * len(ic)),
+        use_container_width=True,
+    )
+    st.caption(
+        "Efeitos fixos absorvidos por centragem alternada (país/ano, "
+        f"{res['iteracoes']} iteração(ões)); observações isoladas no país ou no ano saem da amostra. "
+        "Erro-padrão robusto por país; * p < 0,10; ** p < 0,05; *** p < 0,01."
+    )
 
+
+# Correlações de um Grupo (vdem_related.matriz_correlacao): cache por (grupo, países, período)
+@metrics.track_cache("_correlacao_grupo")
+@st.cache_data(show_spinner="Calculando correlações do grupo…")
+def _correlacao_grupo(grupo_id: str, paises: tuple, year_range: tuple, source: str, _df, _cols):
+    metrics.note_cache_miss()
+    mask = _df["year"].between(year_range[0], year_range[1])
+    if paises:
+        mask &= _df["country_name"].isin(paises)
+    r, n = vdem_related.matriz_correlacao(_df.loc[mask, list(_cols)], _cols)
+    ordem = vdem_related.ordem_cluster(r)
+    return r[np.ix_(ordem, ordem)], n[np.ix_(ordem, ordem)], [_cols[i] for i in ordem], int(mask.sum())
+
+
+def render_correlacoes(ctx: dict):
+    """
+    Página 'Correlações': matriz de correlação entre as variáveis do Grupo (ou
+    da Classe) escolhido na sidebar, para os países e o período selecionados.
+    """
+    df         = ctx["df"]
+    year_range = ctx["year_range"]
+    classe_id  = st.session_state.get("selected_classe_id")
+    grupo_id   = st.session_state.get("selected_grupo_id")
+
+    st.title("🧩 Correlações dentro do Grupo")
+    if grupo_id:
+        cols = variaveis.loc[variaveis["grupo_id"] == grupo_id, "variavel"]
+        nome = f"{grupo_id} - {GROUP_MAP.get(grupo_id, 'Grupo')}"
     else:
-        # Mapa estático: agrega por país dentro do período
-        if not pd.api.types.is_numeric_dtype(df[selected_var]):
-            st.warning("A variável selecionada não é numérica — impossível mapear.")
-            return
-        
-        if modo_agg == "Média":
-            df_map = dff.groupby("country_name", as_index=False)[selected_var].mean()
-        elif modo_agg == "Mediana":
-            df_map = dff.groupby("country_name", as_index=False)[selected_var].median()
-        else:  # "Último ano do período"
-            last_year = year_range[1]
-            df_map = dff[dff["year"] == last_year].dropna(subset=[selected_var]).copy()
-
-        if df_map.empty:
-            st.info("Sem dados para o período/seleção atual.")
-            return
-        fig = px.choropleth(
-            df_map,
-            locations="country_name",
-            locationmode="country names",
-            color=selected_var,
-            hover_name="country_name",
-            color_continuous_scale="RdBu",  # vermelho (baixo) → azul (alto)
-            range_color=(float(df_map[selected_var].min()), float(df_map[selected_var].max())),
-            title=f"{titulo_var} — {modo_agg} ({year_range[0]}–{year_range[1]})"
-        )
-        fig.update_layout(margin=dict(l=0, r=0, t=40, b=0))
-        st.plotly_chart(fig, use_container_width=True)
+        cols = variaveis.loc[variaveis["classe_id"] == classe_id, "variavel"]
+        nome = f"{classe_id} - {CLASS_MAP.get(classe_id, 'Classe')}"
+    cols = [c for c in natsorted(cols.drop_duplicates()) if pd.api.types.is_numeric_dtype(df[c])]
+    if len(cols) < 2:
+        st.info("O grupo selecionado tem menos de 2 variáveis numéricas na base.")
+        return
 
-    # ==============================
-    # Notas e tips
-    # ==============================
+    todos = st.toggle("Todos os países", value=False, key="corr_todos",
+                      help="Desligado: só os países selecionados na sidebar (país + regiões).")
+    paises = () if todos else tuple(st.session_state.get("selected_countries", [ctx["selected_country"]]))
+
+    r, n, ordem, n_linhas = _correlacao_grupo(
+        grupo_id or classe_id, paises, tuple(year_range), str(VDEM_PARQ), df, tuple(cols)
+    )
+    st.write(f"**{nome}** · {len(ordem)} variáveis · {n_linhas:,} país-anos · período **{year_range[0]}–{year_range[1]}**"
+             .replace(",", "."))
+    if np.isnan(r).all():
+        st.info("Poucos país-anos com dados para correlacionar — amplie o período ou a seleção de países.")
+        return
+
+    titulos = [get_titulo_by_var(v) for v in ordem]
+    fig = px.imshow(
+        r, x=ordem, y=ordem, zmin=-1, zmax=1, color_continuous_scale="RdBu", aspect="auto",
+        labels=dict(color="r"),
+    )
+    fig.update_traces(
+        customdata=np.dstack([n, np.broadcast_to(np.array(titulos, dtype=object), r.shape)]),
+        hovertemplate="%{y} × %{x}<br>r = %{z:.2f}<br>n = %{customdata[0]}<br>%{customdata[1]}<extra></extra>",
+    )
+    lado = min(900, max(420, 14 * len(ordem)))
+    fig.update_layout(height=lado, margin=dict(l=0, r=0, t=10, b=0),
+                      xaxis=dict(showticklabels=len(ordem) <= 60), yaxis=dict(showticklabels=len(ordem) <= 60))
+    st.plotly_chart(fig, use_container_width=True)
     st.caption(
-        "Dica: use a mesma sidebar da Série Histórica para trocar **país**, **período** e **variável**. "
-        "Ative a animação para ver a evolução ano a ano."
+        "Correlação de Pearson par a par (só os país-anos com as duas variáveis; mínimo de 10). "
+        "Linhas e colunas ordenadas por agrupamento hierárquico (1 − |r|): blocos escuros são famílias de variáveis."
     )
 
- 
+
+# Agrupamento de trajetórias (vdem_trajetorias.py): features em cache; o
+# agrupamento roda numa thread de fundo e a página acompanha pelo fragmento.
+@metrics.track_cache("_features_agrupamento")
+@st.cache_data(show_spinner="Montando a matriz de trajetórias…")
+def _features_agrupamento(variavel: str, year_range: tuple, padronizar: bool, source: str, _df):
+    metrics.note_cache_miss()
+    return vdem_trajetorias.features_agrupamento(_df, variavel, year_range, padronizar=padronizar)
+
+
+AGRUPAMENTOS_GUARDADOS = 32  # jobs terminados mantidos (LRU); os em andamento nunca saem
+# threads do executor compartilhado: pelo menos 2, para um Ward/k-means longo de uma
+# sessão não enfileirar o agrupamento de todas as outras
+AGRUPAMENTOS_THREADS = max(2, min(4, os.cpu_count() or 1))
+
+
+@st.cache_resource
+def _agrupamentos_em_fundo():
+    """Executor, trava e os jobs já pedidos, compartilhados entre sessões: {chave: Future} (LRU)."""
+    return (ThreadPoolExecutor(max_workers=AGRUPAMENTOS_THREADS, thread_name_prefix="agrupamento"),
+            threading.Lock(), OrderedDict())
+
+
+def _job_agrupamento(chave, X, k, metodo):
+    """Future do agrupamento `chave`: reaproveita o já pedido ou submete; descarta os terminados mais antigos."""
+    executor, trava, jobs = _agrupamentos_em_fundo()
+    with trava:
+        if chave in jobs:
+            jobs.move_to_end(chave)
+        else:
+            jobs[chave] = executor.submit(vdem_trajetorias.agrupar, X, k, metodo)
+            excesso = len(jobs) - AGRUPAMENTOS_GUARDADOS
+            for velha in [c for c, f in jobs.items() if f.done()][:max(excesso, 0)]:
+                del jobs[velha]
+        return jobs[chave]
+
+
+def _descartar_job_agrupamento(chave):
+    _, trava, jobs = _agrupamentos_em_fundo()
+    with trava:
+        jobs.pop(chave, None)
+
+
+@st.fragment(run_every=0.5)
+def _aguardar_agrupamento(futuro):
+    """Enquanto o agrupamento roda, só este bloco reroda; ao terminar, rerun da página."""
+    if futuro.done():
+        st.rerun()
+    st.info("⏳ Agrupando as trajetórias em segundo plano… a página continua respondendo.")
+
+
+def render_agrupamentos(ctx: dict):
+    """
+    Página 'Agrupamentos': países agrupados pela forma da trajetória da variável
+    da sidebar (k-means ou Ward), com as trajetórias medoides e o mapa dos grupos.
+    """
+    df         = ctx["df"]
+    year_range = ctx["year_range"]
+    var        = ctx["selected_variavel_id"]
+
+    st.title("🧬 Agrupamento de trajetórias")
+    if not var or var not in df.columns or not pd.api.types.is_numeric_dtype(df[var]):
+        st.warning("Selecione uma variável numérica na sidebar.")
+        return
+    titulo_var = get_titulo_by_var(var)
+
+    c1, c2, c3 = st.columns([1.2, 1, 1])
+    with c1:
+        metodo = st.radio("Método", list(vdem_trajetorias.AGRUPAMENTOS), horizontal=True, key="clu_metodo",
+                          format_func=lambda m: {"kmeans": "k-means", "hierarquico": "Hierárquico (Ward)"}[m])
+    with c2:
+        k = st.slider("Número de grupos", 2, 10, 5, key="clu_k")
+    with c3:
+        padronizar = st.toggle("Comparar só a forma (z-score por país)", value=True, key="clu_padronizar")
+
+    try:
+        paises, anos, X = _features_agrupamento(var, tuple(year_range), padronizar, str(VDEM_PARQ), df)
+    except ValueError as e:
+        st.info(str(e))
+        return
+
+    chave = (str(VDEM_PARQ), var, tuple(year_range), padronizar, metodo, k)
+    futuro = _job_agrupamento(chave, X, k, metodo)
+    if not futuro.done():
+        _aguardar_agrupamento(futuro)
+        return
+    try:
+        res = futuro.result()
+    except Exception as e:
+        _descartar_job_agrupamento(chave)
+        st.error(f"Falha no agrupamento: {e}")
+        return
+
+    rotulos, medoides = res["rotulos"], res["medoides"]
+    if len(medoides) < k:
+        st.caption(f"Só {len(medoides)} trajetória(s) distinta(s) no período: {len(medoides)} grupo(s) em vez de {k}.")
+    grupos = [f"Grupo {g + 1}" for g in range(len(medoides))]
+    membros = pd.DataFrame({"country_name": paises, "grupo": np.array(grupos)[rotulos]})
+    st.write(f"**{titulo_var}** · {len(paises)} países · anos **{anos[0]}–{anos[-1]}**"
+             + (" · séries padronizadas" if padronizar else ""))
+
+    # Trajetórias medoides (país real mais central de cada grupo) sobre os membros em cinza
+    linhas = pd.DataFrame({
+        "year": np.tile(anos, len(paises)),
+        "country_name": np.repeat(paises, len(anos)),
+        "grupo": np.repeat(np.array(grupos)[rotulos], len(anos)),
+        "valor": X.ravel(),
+    })
+    med = linhas[linhas["country_name"].isin(paises[medoides])]
+    cores = alt.Scale(domain=grupos, range=generate_colors(len(grupos), seed=52))
+    fundo = (
+        alt.Chart(linhas).mark_line(strokeWidth=0.6, opacity=0.25)
+        .encode(x=alt.X("year:Q", axis=alt.Axis(format="d", title="Ano")),
+                y=alt.Y("valor:Q", title="z-score" if padronizar else titulo_var),
+                detail="country_name:N", color=alt.Color("grupo:N", scale=cores, legend=None))
+    )
+    frente = (
+        alt.Chart(med).mark_line(strokeWidth=3)
+        .encode(x="year:Q", y="valor:Q", color=alt.Color("grupo:N", scale=cores, title="Grupo (medoide)"),
+                tooltip=["grupo", "country_name", "year", alt.Tooltip("valor:Q", format=".3f")])
+    )
+    st.altair_chart((fundo + frente).properties(width="container", height=380), use_container_width=True)
+    st.caption("Linha grossa: país medoide de cada grupo (o mais próximo de todos os outros membros).")
+
+    fig = choropleth_paises(
+        membros,
+        color="grupo",
+        category_orders={"grupo": grupos},
+        color_discrete_sequence=generate_colors(len(grupos), seed=52),
+        title=f"{titulo_var} — grupos de trajetória ({anos[0]}–{anos[-1]})",
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+    with st.expander("Membros de cada grupo"):
+        resumo = (membros.assign(medoide=membros["country_name"].isin(paises[medoides]))
+                  .sort_values(["grupo", "medoide", "country_name"], ascending=[True, False, True]))
+        st.dataframe(resumo, use_container_width=True, hide_index=True)
+
+
 # ==========================
 # CONFIG / TÍTULO
 # ==========================
 # ---- NAV BAR (topo) ----
+PAGINAS = ["Apresentação","Série Histórica","Mapa VDEM","Controle Sintético","Efeitos Fixos","Correlações","Agrupamentos"]
+# ?page=<nome> abre direto numa página (links, benchmarks e AppTest)
+pagina_url = st.query_params.get("page")
 selected = option_menu(
     None,
-    ["Apresentação","Série Histórica","Mapa VDEM"],
-    icons=["house","graph-up","map"],
+    PAGINAS,
+    icons=["house","graph-up","map","bullseye","grid-3x3","grid","diagram-3"],
     menu_icon="cast",
-    default_index=0,
+    default_index=PAGINAS.index(pagina_url) if pagina_url in PAGINAS else 0,
     orientation="horizontal",
     styles={
         "container": {"padding": "0!important", "background-color": "white",
@@ -1228,12 +2214,41 @@ selected = option_menu(
     }
 )
 
+prof.set_page(selected)
+
 # ---- Conteúdo + filtros específicos por página ----
 if selected == "Apresentação":
-    render_home()
+    with prof.span("render_home"):
+        render_home()
 elif selected == "Série Histórica":
-    render_serie_historica()
+    with prof.span("render_serie_historica"):
+        render_serie_historica()
 elif selected == "Mapa VDEM":
-    ctx = build_common_sidebar(enable_sidebar=True)
-    render_mapas(ctx)
+    with prof.span("sidebar"):
+        ctx = build_common_sidebar(enable_sidebar=True)
+    with prof.span("render_mapas"):
+        render_mapas(ctx)
+elif selected == "Controle Sintético":
+    with prof.span("sidebar"):
+        ctx = build_common_sidebar(enable_sidebar=True)
+    with prof.span("render_controle_sintetico"):
+        render_controle_sintetico(ctx)
+elif selected == "Efeitos Fixos":
+    with prof.span("sidebar"):
+        ctx = build_common_sidebar(enable_sidebar=True)
+    with prof.span("render_efeitos_fixos"):
+        render_efeitos_fixos(ctx)
+elif selected == "Correlações":
+    with prof.span("sidebar"):
+        ctx = build_common_sidebar(enable_sidebar=True)
+    with prof.span("render_correlacoes"):
+        render_correlacoes(ctx)
+elif selected == "Agrupamentos":
+    with prof.span("sidebar"):
+        ctx = build_common_sidebar(enable_sidebar=True)
+    with prof.span("render_agrupamentos"):
+        render_agrupamentos(ctx)
 # …e assim por diante…
+
+prof.end_rerun()
+prof.render_debug_panel()
@@ -0,0 +1,188 @@
+"""
+Episódios de democratização e autocratização (v2x_libdem / v2x_polyarchy),
+detectados para todos os países de uma vez.
+
+Regra de limiar + duração (inspirada nos ERT do V-Dem): um ano "se move" quando
+a variação anual passa de `limiar_ano` no sentido do episódio; anos parados (ou
+com recuo menor que `limiar_ano`) dentro de uma sequência são tolerados até
+`tolerancia` anos seguidos; o episódio vale se a variação acumulada do início
+ao fim passa de `limiar_total`. Tudo é feito em codificação por corridas (RLE)
+da matriz país × ano achatada, sem laço por país.
+
+Pontos de mudança: segmentação binária da média do nível, vetorizada nos
+países — a cada rodada, o ganho de soma de quadrados de cada corte possível sai
+de somas acumuladas e cada país ganha o seu melhor corte (se passar da penalidade).
+
+    ep = episodios(df, "v2x_libdem")           # country_name, tipo, inicio, fim, duracao, variacao, …
+    pm = pontos_de_mudanca(df, "v2x_libdem")   # country_name, year, antes, depois, salto
+    resumo_anual(ep)                           # year, democratização, autocratização
+"""
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+VARIAVEIS = ("v2x_libdem", "v2x_polyarchy")
+TIPOS = {1: "democratização", -1: "autocratização"}
+
+
+def _matriz(df: pd.DataFrame, variavel: str):
+    """(paises, anos, Y) país × ano, com lacunas internas interpoladas (pontas ficam NaN)."""
+    anos_all = pd.to_numeric(df["year"], errors="coerce").to_numpy()
+    ok = ~np.isnan(anos_all)
+    paises, ci = np.unique(df.loc[ok, "country_name"].astype(str).to_numpy(), return_inverse=True)
+    a0 = int(anos_all[ok].min())
+    anos = np.arange(a0, int(anos_all[ok].max()) + 1)
+    Y = np.full((len(paises), len(anos)), np.nan)
+    Y[ci, anos_all[ok].astype(int) - a0] = pd.to_numeric(df.loc[ok, variavel], errors="coerce").to_numpy(dtype=float)
+    Yi = pd.DataFrame(Y.T).interpolate(limit_area="inside").to_numpy().T
+    return paises, anos, Yi
+
+
+def corridas(m: np.ndarray):
+    """RLE das linhas de uma matriz booleana: (linha, início, fim inclusive) de cada corrida de True."""
+    n, T = m.shape
+    pad = np.zeros((n, T + 2), dtype=np.int8)
+    pad[:, 1:-1] = m
+    d = np.diff(pad, axis=1)
+    li, ini = np.nonzero(d == 1)
+    _, fim = np.nonzero(d == -1)
+    return li, ini, fim - 1
+
+
+def _fechar_lacunas(m: np.ndarray, tolerancia: int, bloqueio: np.ndarray) -> np.ndarray:
+    """
+    Preenche corridas de False de até `tolerancia` entre dois True da mesma
+    linha, desde que a lacuna não tenha nenhuma posição de `bloqueio`.
+    """
+    li, ini, fim = corridas(~m)
+    n, T = m.shape
+    cs = np.concatenate([np.zeros((n, 1), dtype=int), np.cumsum(bloqueio, axis=1)], axis=1)
+    curta = (fim - ini + 1 <= tolerancia) & (ini > 0) & (fim < T - 1) & (cs[li, fim + 1] == cs[li, ini])
+    out = m.copy()
+    if curta.any():
+        comp = fim[curta] - ini[curta] + 1
+        linhas = np.repeat(li[curta], comp)
+        cols = np.repeat(ini[curta], comp) + (np.arange(comp.sum()) - np.repeat(np.cumsum(comp) - comp, comp))
+        out[linhas, cols] = True
+    return out
+
+
+def episodios(df: pd.DataFrame, variavel: str = "v2x_libdem", limiar_ano: float = 0.01,
+              limiar_total: float = 0.10, tolerancia: int = 4) -> pd.DataFrame:
+    """
+    Tabela de episódios: country_name, tipo, inicio (1º ano de mudança), fim,
+    duracao, valor_inicio (ano anterior ao início), valor_fim, variacao, variavel.
+    """
+    paises, anos, Y = _matriz(df, variavel)
+    d = np.diff(Y, axis=1)  # d[:, t] = variação de anos[t] para anos[t+1]
+    partes = []
+    for sinal, tipo in TIPOS.items():
+        move = np.nan_to_num(sinal * d, nan=-np.inf) >= limiar_ano
+        # recuo no sentido contrário (ou ano sem dado) encerra o episódio: não é tolerado
+        recuo = np.nan_to_num(-sinal * d, nan=np.inf) >= limiar_ano
+        li, ini, fim = corridas(_fechar_lacunas(move, tolerancia, recuo))
+        v0 = Y[li, ini]
+        v1 = Y[li, fim + 1]
+        ok = sinal * (v1 - v0) >= limiar_total
+        partes.append(pd.DataFrame({
+            "country_name": paises[li[ok]],
+            "tipo": tipo,
+            "inicio": anos[ini[ok] + 1],
+            "fim": anos[fim[ok] + 1],
+            "valor_inicio": v0[ok],
+            "valor_fim": v1[ok],
+        }))
+    ep = pd.concat(partes, ignore_index=True)
+    ep["duracao"] = ep["fim"] - ep["inicio"] + 1
+    ep["variacao"] = ep["valor_fim"] - ep["valor_inicio"]
+    ep["variavel"] = variavel
+    cols = ["country_name", "tipo", "inicio", "fim", "duracao", "valor_inicio", "valor_fim", "variacao", "variavel"]
+    return ep[cols].sort_values(["country_name", "inicio"]).reset_index(drop=True)
+
+
+def _segmentos(cortes: np.ndarray):
+    """Para cada fronteira t: último corte ≤ t e próximo corte ≥ t (acumulados vetorizados)."""
+    T = cortes.shape[1] - 1
+    t = np.arange(T + 1)
+    a = np.maximum.accumulate(np.where(cortes, t, 0), axis=1)
+    b = np.minimum.accumulate(np.where(cortes, t, T)[:, ::-1], axis=1)[:, ::-1]
+    return a, b
+
+
+def pontos_de_mudanca(df: pd.DataFrame, variavel: str = "v2x_libdem", max_pontos: int = 4,
+                      min_seg: int = 5, penalidade: float = 0.05) -> pd.DataFrame:
+    """
+    Rupturas de nível por segmentação binária (soma de quadrados), vetorizada
+    nos países: country_name, year (1º ano do novo patamar), antes, depois, salto.
+    `penalidade`: redução mínima da soma de quadrados para aceitar um corte.
+    """
+    paises, anos, Y = _matriz(df, variavel)
+    n, T = Y.shape
+    ok = ~np.isnan(Y)
+    zero = np.zeros((n, 1))
+    X = np.where(ok, Y, 0.0)
+    S = np.concatenate([zero, np.cumsum(X, 1)], 1)
+    S2 = np.concatenate([zero, np.cumsum(X * X, 1)], 1)
+    N = np.concatenate([zero, np.cumsum(ok, 1)], 1)
+    linhas = np.arange(n)[:, None]
+    t = np.broadcast_to(np.arange(T + 1), (n, T + 1))
+
+    def sse(a, b):
+        """Soma de quadrados em torno da média no trecho [a, b) de cada linha, e quantos anos observados."""
+        m = N[linhas, b] - N[linhas, a]
+        s = S[linhas, b] - S[linhas, a]
+        return S2[linhas, b] - S2[linhas, a] - s * s / np.maximum(m, 1), m
+
+    # cortes[i, t]: fronteira entre anos[t−1] e anos[t]; as pontas são cortes fixos
+    cortes = np.zeros((n, T + 1), dtype=bool)
+    cortes[:, [0, T]] = True
+    for _ in range(max_pontos):
+        a, b = _segmentos(cortes)
+        sse_ab, _ = sse(a, b)
+        sse_at, n1 = sse(a, t)
+        sse_tb, n2 = sse(t, b)
+        ganho = sse_ab - sse_at - sse_tb
+        ganho[(n1 < min_seg) | (n2 < min_seg) | cortes] = -np.inf
+        melhor = ganho.argmax(1)
+        aceita = ganho[np.arange(n), melhor] >= penalidade
+        if not aceita.any():
+            break
+        cortes[np.flatnonzero(aceita), melhor[aceita]] = True
+
+    cols = ["country_name", "year", "antes", "depois", "salto", "variavel"]
+    li, tc = np.nonzero(cortes[:, 1:T])
+    tc = tc + 1
+    if not len(li):
+        return pd.DataFrame(columns=cols)
+    a, b = _segmentos(cortes)
+    ini, fim = a[li, tc - 1], b[li, tc + 1]
+    antes = (S[li, tc] - S[li, ini]) / (N[li, tc] - N[li, ini])
+    depois = (S[li, fim] - S[li, tc]) / (N[li, fim] - N[li, tc])
+    out = pd.DataFrame({
+        "country_name": paises[li],
+        "year": anos[tc],
+        "antes": antes,
+        "depois": depois,
+        "salto": depois - antes,
+        "variavel": variavel,
+    })
+    return out[cols].sort_values(["country_name", "year"]).reset_index(drop=True)
+
+
+def resumo_anual(ep: pd.DataFrame, anos=None) -> pd.DataFrame:
+    """Países em episódio em cada ano, por tipo (year, democratização, autocratização)."""
+    if ep.empty:
+        return pd.DataFrame(columns=["year", *TIPOS.values()])
+    a0 = int(ep["inicio"].min()) if anos is None else int(anos[0])
+    a1 = int(ep["fim"].max()) if anos is None else int(anos[1])
+    T = a1 - a0 + 1
+    out = {"year": np.arange(a0, a1 + 1)}
+    for tipo in TIPOS.values():
+        sub = ep[ep["tipo"] == tipo]
+        ini = np.clip(sub["inicio"].to_numpy() - a0, 0, T)
+        fim = np.clip(sub["fim"].to_numpy() - a0 + 1, 0, T)
+        # +1 no início, −1 depois do fim; a soma acumulada conta os episódios ativos em cada ano
+        delta = np.bincount(ini, minlength=T + 1)[:T + 1] - np.bincount(fim, minlength=T + 1)[:T + 1]
+        out[tipo] = np.cumsum(delta)[:T]
+    return pd.DataFrame(out)
@@ -0,0 +1,146 @@
+"""
+Conflitos e eventos por país como intervalos (codificação por corridas, RLE).
+
+Os indicadores binários anuais (guerra civil, conflito internacional, membro
+da ONU) e as mudanças de regime (v2x_regime diferente do ano anterior) viram,
+no carregamento, uma tabela pequena de intervalos país × evento × [início, fim]
+— uma linha por corrida de anos com o indicador ligado, em vez de uma coluna
+por país-ano. As corridas saem da matriz densa país × ano com
+vdem_episodios.corridas, sem laço por país.
+
+    iv = construir_intervalos(df)       # country_name, evento, inicio, fim, censura_esq
+    no_periodo(iv, ["Brazil"], (1900, 2020))
+    mudanca_apos_inicio(df, iv, "guerra_civil", "v2x_polyarchy", n=5)   # {"inicios", "horizontes"}
+
+censura_esq: o ano anterior ao início não tem dado do indicador (o evento pode
+ter começado antes do que a base mostra); esses inícios ficam fora do resumo.
+"""
+from __future__ import annotations
+
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from vdem_episodios import corridas
+
+# evento → (coluna, rótulo, cor das faixas)
+EVENTOS = {
+    "guerra_civil": ("e_civil_war", "Guerra civil", "#d62728"),
+    "guerra_internacional": ("e_miinteco", "Conflito armado internacional", "#ff7f0e"),
+    "membro_onu": ("un_member", "Membro da ONU", "#1f77b4"),
+    "mudanca_regime": ("v2x_regime", "Mudança de regime", "#9467bd"),
+}
+COLUNAS = ["country_name", "evento", "inicio", "fim", "censura_esq"]
+
+
+def _eixos(df: pd.DataFrame):
+    """Países (ordenados), índice de linha de cada registro, ano inicial, nº de anos e coluna de cada registro."""
+    anos = pd.to_numeric(df["year"], errors="coerce").to_numpy()
+    ok = ~np.isnan(anos)
+    paises, ci = np.unique(df.loc[ok, "country_name"].astype(str).to_numpy(), return_inverse=True)
+    a0 = int(anos[ok].min())
+    return paises, ci, a0, int(anos[ok].max()) - a0 + 1, anos[ok].astype(int) - a0, ok
+
+
+def _denso(df, col, ci, yi, ok, forma):
+    Y = np.full(forma, np.nan)
+    Y[ci, yi] = pd.to_numeric(df.loc[ok, col], errors="coerce").to_numpy(dtype=float)
+    return Y
+
+
+def construir_intervalos(df: pd.DataFrame, eventos=None) -> pd.DataFrame:
+    """Tabela RLE de todos os eventos com coluna na base (anos em int16, nomes categóricos)."""
+    eventos = [e for e in (eventos or EVENTOS) if EVENTOS[e][0] in df.columns]
+    if not eventos:
+        return pd.DataFrame(columns=COLUNAS)
+    paises, ci, a0, T, yi, ok = _eixos(df)
+    partes = []
+    for ev in eventos:
+        X = _denso(df, EVENTOS[ev][0], ci, yi, ok, (len(paises), T))
+        if ev == "mudanca_regime":
+            # categoria do regime (0–3); mudança = difere do ano anterior, ambos observados
+            R = np.rint(X)
+            liga = np.zeros_like(R, dtype=bool)
+            liga[:, 1:] = (R[:, 1:] != R[:, :-1]) & ~np.isnan(R[:, 1:]) & ~np.isnan(R[:, :-1])
+            obs = ~np.isnan(R)
+        else:
+            liga = np.nan_to_num(X, nan=0.0) > 0
+            obs = ~np.isnan(X)
+        li, ini, fim = corridas(liga)
+        censura = (ini == 0) | ~obs[li, np.maximum(ini - 1, 0)]
+        partes.append(pd.DataFrame({
+            "country_name": paises[li],
+            "evento": ev,
+            "inicio": (ini + a0).astype(np.int16),
+            "fim": (fim + a0).astype(np.int16),
+            "censura_esq": censura,
+        }))
+    iv = pd.concat(partes, ignore_index=True)
+    iv["country_name"] = pd.Categorical(iv["country_name"], categories=paises)
+    iv["evento"] = pd.Categorical(iv["evento"], categories=list(EVENTOS))
+    return iv.sort_values(["country_name", "inicio"], kind="stable").reset_index(drop=True)
+
+
+def no_periodo(iv: pd.DataFrame, paises=None, year_range=None, eventos=None) -> pd.DataFrame:
+    """Intervalos dos países/eventos pedidos que tocam o período, recortados nas bordas dele."""
+    m = np.ones(len(iv), dtype=bool)
+    if paises is not None:
+        m &= iv["country_name"].isin(paises).to_numpy()
+    if eventos is not None:
+        m &= iv["evento"].isin(eventos).to_numpy()
+    sub = iv[m]
+    if year_range is not None:
+        sub = sub[(sub["fim"] >= year_range[0]) & (sub["inicio"] <= year_range[1])].assign(
+            inicio=lambda x: x["inicio"].clip(lower=year_range[0]),
+            fim=lambda x: x["fim"].clip(upper=year_range[1]),
+        )
+    return sub.assign(rotulo=sub["evento"].map({e: v[1] for e, v in EVENTOS.items()}).astype(str))
+
+
+def mudanca_apos_inicio(df: pd.DataFrame, iv: pd.DataFrame, evento: str, variavel: str, n: int = 5,
+                        year_range=None) -> dict:
+    """
+    Variação de `variavel` do ano anterior ao início do evento até h = 0..n anos
+    depois, para todos os inícios de uma vez (índices na matriz país × ano).
+    "inicios": country_name, inicio, delta (em h = n); "horizontes": h, media,
+    mediana, n_inicios, media_base (mesma variação em todos os país-anos, a
+    referência sem evento).
+    """
+    paises, ci, a0, T, yi, ok = _eixos(df)
+    Y = _denso(df, variavel, ci, yi, ok, (len(paises), T))
+    sub = iv[(iv["evento"] == evento) & ~iv["censura_esq"]]
+    if year_range is not None:
+        sub = sub[sub["inicio"].between(year_range[0], year_range[1])]
+    li = pd.Index(paises).get_indexer(sub["country_name"].astype(str))
+    j = sub["inicio"].to_numpy(dtype=int) - a0
+    fica = (li >= 0) & (j >= 1)
+    li, j, sub = li[fica], j[fica], sub[fica]
+
+    h = np.arange(n + 1)
+    col = j[:, None] + h[None, :]
+    dentro = col < T
+    D = np.where(dentro, Y[li[:, None], np.minimum(col, T - 1)], np.nan) - Y[li, j - 1][:, None]
+    # referência: Y[t + h] − Y[t − 1] em todos os país-anos
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # horizonte sem nenhum dado → NaN
+        base = np.array([
+            np.nanmean(Y[:, hh + 1:] - Y[:, :T - hh - 1]) if hh + 1 < T else np.nan for hh in h
+        ])
+        media = np.nanmean(D, axis=0) if len(D) else np.full(n + 1, np.nan)
+        mediana = np.nanmedian(D, axis=0) if len(D) else np.full(n + 1, np.nan)
+    return {
+        "inicios": pd.DataFrame({
+            "country_name": sub["country_name"].astype(str).to_numpy(),
+            "inicio": sub["inicio"].to_numpy(dtype=int),
+            "antes": Y[li, j - 1],
+            "delta": D[:, n] if len(D) else np.array([]),
+        }),
+        "horizontes": pd.DataFrame({
+            "h": h,
+            "media": media,
+            "mediana": mediana,
+            "n_inicios": (~np.isnan(D)).sum(0) if len(D) else np.zeros(n + 1, dtype=int),
+            "media_base": base,
+        }),
+    }
@@ -0,0 +1,93 @@
+"""
+Estudo de evento em torno da entrada na ONU (aba "ONU & Democracia").
+
+O tempo relativo t = ano − un_entry_year sai direto dos arrays das colunas
+(nada de df.copy()). Para cada t da janela calcula a média da variável e o
+efeito em relação ao período de referência (t = −1 por padrão). Os ICs vêm
+de um bootstrap por país (cluster): cada réplica sorteia países com reposição,
+o que vira um vetor de pesos por país; as médias de todas as réplicas saem
+de um produto de matrizes pesos × somas(país, t), em blocos num pool de
+processos (vdem_stats.bootstrap_paralelo).
+
+    res = estudo_de_evento(df["country_name"], df["year"], df["un_entry_year"], df["v2x_polyarchy"])
+"""
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+import vdem_stats
+
+
+def _num(a) -> np.ndarray:
+    return pd.to_numeric(pd.Series(a), errors="coerce").to_numpy(dtype=float)
+
+
+def tempo_relativo(anos, entrada, janela=(-10, 10), year_range=None):
+    """t = ano − ano de entrada (inteiro) e a máscara das linhas dentro da janela/período."""
+    anos, entrada = _num(anos), _num(entrada)
+    t = anos - entrada
+    ok = ~np.isnan(t) & (t >= janela[0]) & (t <= janela[1])
+    if year_range is not None:
+        ok &= (anos >= year_range[0]) & (anos <= year_range[1])
+    return np.where(ok, t, 0).astype(int), ok
+
+
+def somas_por_pais(paises, t, valores, ok, janela):
+    """Matrizes país × t com a soma e a contagem dos valores observados."""
+    v = _num(valores)
+    ok = ok & ~np.isnan(v)
+    _, cod = np.unique(np.asarray(paises)[ok], return_inverse=True)
+    k = janela[1] - janela[0] + 1
+    n_c = int(cod.max()) + 1 if cod.size else 0
+    pos = cod * k + (t[ok] - janela[0])
+    S = np.bincount(pos, v[ok], n_c * k).reshape(n_c, k)
+    N = np.bincount(pos, minlength=n_c * k).astype(float).reshape(n_c, k)
+    return S, N
+
+
+def _boot_medias(dados, n, seed):
+    """n réplicas: pesos multinomiais por país → médias por t (n × k)."""
+    S, N = dados
+    rng = np.random.default_rng(seed)
+    c = S.shape[0]
+    W = rng.multinomial(c, np.full(c, 1.0 / c), size=n).astype(float)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (W @ S) / (W @ N)
+
+
+def estudo_de_evento(paises, anos, entrada, valores, janela=(-10, 10), ref: int = -1,
+                     year_range=None, n_boot: int = 500, nivel: float = 0.95,
+                     seed: int = 2024, workers: int | None = None, pool=None) -> pd.DataFrame:
+    """
+    Uma linha por t da janela: n (país-anos), n_paises, media, efeito
+    (media − media[ref]) e os limites do IC bootstrap de cada um.
+    """
+    janela = (int(janela[0]), int(janela[1]))
+    t, ok = tempo_relativo(anos, entrada, janela, year_range)
+    S, N = somas_por_pais(paises, t, valores, ok, janela)
+    ts = np.arange(janela[0], janela[1] + 1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        media = S.sum(0) / N.sum(0)
+
+    out = pd.DataFrame({
+        "t_rel": ts,
+        "n": N.sum(0).astype(int),
+        "n_paises": (N > 0).sum(0),
+        "media": media,
+    })
+    i_ref = ref - janela[0] if janela[0] <= ref <= janela[1] else None
+    out["efeito"] = media - media[i_ref] if i_ref is not None else np.nan
+
+    a = (1 - nivel) / 2
+    if n_boot and S.shape[0] > 1:
+        boot = vdem_stats.bootstrap_paralelo(_boot_medias, (S, N), n_boot, seed, workers, pool)
+        out["media_li"], out["media_ls"] = np.nanquantile(boot, [a, 1 - a], axis=0)
+        if i_ref is not None:
+            ef = boot - boot[:, [i_ref]]
+            out["efeito_li"], out["efeito_ls"] = np.nanquantile(ef, [a, 1 - a], axis=0)
+        else:
+            out["efeito_li"] = out["efeito_ls"] = np.nan
+    else:
+        out["media_li"] = out["media_ls"] = out["efeito_li"] = out["efeito_ls"] = np.nan
+    return out[out["n"] > 0].reset_index(drop=True)
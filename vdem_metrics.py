@@ -0,0 +1,311 @@
+"""
+Exportador de métricas no formato texto do Prometheus.
+
+Sobe um pequeno servidor HTTP (thread daemon) ao lado do servidor Streamlit,
+uma única vez por processo, e expõe `/metrics`:
+
+- vdem_rerun_duration_seconds{app,page}   histograma da duração dos reruns
+                                          (alimentado pelo vdem_profiler)
+- vdem_parquet_bytes_read_total           bytes (comprimidos) das colunas lidas
+- vdem_parquet_columns_loaded_total       colunas lidas do Parquet
+- vdem_cache_hits_total{fn} / vdem_cache_misses_total{fn}
+- vdem_active_sessions                    sessões ativas
+
+Porta: variável de ambiente VDEM_METRICS_PORT (padrão 9464; "0"/"off" desliga).
+
+Teste (reruns do app com AppTest + scrape de /metrics):
+    python -m pytest benchmarks/test_metrics.py -q
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_PORT = 9464
+SESSION_TTL_S = 300  # fallback: sessão "ativa" se rodou um rerun nos últimos 5 min
+
+_lock = threading.RLock()  # render() chama o gauge, que também usa o lock
+_local = threading.local()
+
+
+def _fmt_labels(names, values) -> str:
+    if not names:
+        return ""
+    parts = []
+    for n, v in zip(names, values):
+        v = str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{n}="{v}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _fmt_num(x) -> str:
+    if x == float("inf"):
+        return "+Inf"
+    return repr(float(x)) if isinstance(x, float) else str(x)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help_, labels=()):
+        self.name, self.help, self.labels = name, help_, tuple(labels)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount=1.0, **labels):
+        key = tuple(labels.get(n, "") for n in self.labels)
+        with _lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(labels.get(n, "") for n in self.labels), 0.0)
+
+    def samples(self):
+        items = list(self._values.items()) or ([((), 0.0)] if not self.labels else [])
+        return [(self.name, _fmt_labels(self.labels, k), v) for k, v in items]
+
+
+class Gauge:
+    kind = "gauge"
+
+    def __init__(self, name, help_, fn):
+        self.name, self.help, self.fn = name, help_, fn
+
+    def samples(self):
+        try:
+            v = float(self.fn())
+        except Exception:
+            v = float("nan")
+        return [(self.name, "", v)]
+
+
+class Histogram:
+    kind = "histogram"
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+
+    def __init__(self, name, help_, labels=(), buckets=None):
+        self.name, self.help, self.labels = name, help_, tuple(labels)
+        self.buckets = tuple(buckets or self.BUCKETS)
+        self._series: dict[tuple, dict] = {}
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(n, "") for n in self.labels)
+        with _lock:
+            s = self._series.setdefault(key, {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0})
+            for i, b in enumerate(self.buckets):
+                if value <= b:
+                    s["counts"][i] += 1
+            s["sum"] += value
+            s["count"] += 1
+
+    def samples(self):
+        out = []
+        for key, s in self._series.items():
+            for b, c in zip(self.buckets, s["counts"]):
+                out.append((f"{self.name}_bucket",
+                            _fmt_labels(self.labels + ("le",), key + (_fmt_num(b),)), c))
+            out.append((f"{self.name}_sum", _fmt_labels(self.labels, key), s["sum"]))
+            out.append((f"{self.name}_count", _fmt_labels(self.labels, key), s["count"]))
+        return out
+
+
+# ==========================
+# MÉTRICAS
+# ==========================
+_sessions_seen: dict[str, float] = {}
+
+
+def _sessoes_do_runtime() -> int | None:
+    """
+    Sessões ativas segundo o runtime do Streamlit. Usa um atributo privado
+    (Runtime._session_mgr), que pode mudar entre versões: None se não existir.
+    """
+    try:
+        from streamlit import runtime
+        if not runtime.exists():
+            return None
+        mgr = getattr(runtime.get_instance(), "_session_mgr", None)
+        contar = getattr(mgr, "num_active_sessions", None)
+        return int(contar()) if callable(contar) else None
+    except Exception:
+        return None
+
+
+def _active_sessions() -> int:
+    n = _sessoes_do_runtime()
+    if n is not None:
+        return n
+    # fallback: sessões vistas pelos ganchos do profiler (observe_rerun) nos últimos SESSION_TTL_S
+    cutoff = time.time() - SESSION_TTL_S
+    with _lock:
+        return sum(1 for t in _sessions_seen.values() if t >= cutoff)
+
+
+RERUN_SECONDS = Histogram("vdem_rerun_duration_seconds", "Duração dos reruns do script.", ("app", "page"))
+RERUNS = Counter("vdem_reruns_total", "Reruns concluídos.", ("app", "page"))
+PARQUET_BYTES = Counter("vdem_parquet_bytes_read_total", "Bytes (comprimidos) das colunas lidas do Parquet.")
+PARQUET_COLUMNS = Counter("vdem_parquet_columns_loaded_total", "Colunas lidas do Parquet.")
+PARQUET_READS = Counter("vdem_parquet_reads_total", "Leituras efetivas do Parquet (cache miss).")
+CACHE_HITS = Counter("vdem_cache_hits_total", "Chamadas atendidas pelo st.cache_data.", ("fn",))
+CACHE_MISSES = Counter("vdem_cache_misses_total", "Chamadas que executaram a função cacheada.", ("fn",))
+ACTIVE_SESSIONS = Gauge("vdem_active_sessions", "Sessões ativas.", _active_sessions)
+
+REGISTRY = [RERUN_SECONDS, RERUNS, PARQUET_BYTES, PARQUET_COLUMNS, PARQUET_READS,
+            CACHE_HITS, CACHE_MISSES, ACTIVE_SESSIONS]
+
+
+def render() -> str:
+    """Todas as métricas no formato texto de exposição do Prometheus (0.0.4)."""
+    lines = []
+    with _lock:
+        for m in REGISTRY:
+            lines.append(f"# HELP {m.name} {m.help}")
+            lines.append(f"# TYPE {m.name} {m.kind}")
+            for name, labels, value in m.samples():
+                lines.append(f"{name}{labels} {_fmt_num(value)}")
+    return "\n".join(lines) + "\n"
+
+
+# ==========================
+# GANCHOS (chamados pelos apps)
+# ==========================
+def observe_rerun(record: dict):
+    """Listener do vdem_profiler: registra a duração de cada rerun."""
+    labels = {"app": record.get("app") or "", "page": record.get("page") or ""}
+    RERUN_SECONDS.observe(record["total_ms"] / 1000.0, **labels)
+    RERUNS.inc(**labels)
+    if record.get("session"):
+        with _lock:
+            _sessions_seen[record["session"]] = time.time()
+
+
+def parquet_column_bytes(path, columns=None) -> int:
+    """Soma o tamanho comprimido dos column chunks (só das colunas pedidas)."""
+    import pyarrow.parquet as pq
+
+    md = pq.ParquetFile(str(path)).metadata
+    wanted = set(columns) if columns else None
+    total = 0
+    for rg in range(md.num_row_groups):
+        row_group = md.row_group(rg)
+        for c in range(row_group.num_columns):
+            col = row_group.column(c)
+            if wanted is None or col.path_in_schema.split(".")[0] in wanted:
+                total += col.total_compressed_size
+    return total
+
+
+def record_parquet_read(path, columns, n_columns: int):
+    PARQUET_READS.inc()
+    PARQUET_COLUMNS.inc(n_columns)
+    try:
+        PARQUET_BYTES.inc(parquet_column_bytes(path, columns))
+    except Exception:
+        pass
+
+
+def note_cache_miss():
+    """Chame dentro do corpo de uma função @st.cache_data (só roda em miss)."""
+    _local.cache_miss = True
+
+
+def track_cache(fn_name: str):
+    """
+    Decorador aplicado POR FORA do @st.cache_data: conta hit/miss conforme
+    o corpo cacheado tenha chamado note_cache_miss() ou não.
+    """
+    def deco(cached_fn):
+        def wrapper(*args, **kwargs):
+            prev = getattr(_local, "cache_miss", False)
+            _local.cache_miss = False
+            try:
+                return cached_fn(*args, **kwargs)
+            finally:
+                if _local.cache_miss:
+                    CACHE_MISSES.inc(fn=fn_name)
+                else:
+                    CACHE_HITS.inc(fn=fn_name)
+                _local.cache_miss = prev
+        wrapper.__name__ = getattr(cached_fn, "__name__", fn_name)
+        wrapper.__doc__ = getattr(cached_fn, "__doc__", None)
+        wrapper.clear = getattr(cached_fn, "clear", None)
+        return wrapper
+    return deco
+
+
+# ==========================
+# SERVIDOR HTTP
+# ==========================
+_server = None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass  # não poluir o log do Streamlit
+
+
+def configured_port() -> int | None:
+    raw = os.environ.get("VDEM_METRICS_PORT", str(DEFAULT_PORT)).strip().lower()
+    if raw in ("", "0", "off", "false", "no"):
+        return None
+    return int(raw)
+
+
+def start_server(port: int | None = None, host: str = "127.0.0.1") -> int | None:
+    """
+    Sobe o endpoint /metrics uma vez por processo (idempotente).
+    Retorna a porta em uso, ou None se desligado/indisponível.
+    """
+    global _server
+    with _lock:
+        if _server is not None:
+            return _server.server_address[1]
+        port = configured_port() if port is None else port
+        if port is None:
+            return None
+        try:
+            _server = ThreadingHTTPServer((host, port), _Handler)
+        except OSError:
+            return None  # porta ocupada (ex.: outro processo do app)
+        _server.daemon_threads = True
+        threading.Thread(target=_server.serve_forever, name="vdem-metrics", daemon=True).start()
+        return _server.server_address[1]
+
+
+def server_port() -> int | None:
+    return _server.server_address[1] if _server is not None else None
+
+
+def stop_server():
+    global _server
+    with _lock:
+        if _server is not None:
+            _server.shutdown()
+            _server.server_close()
+            _server = None
+
+
+def install():
+    """Liga o exportador ao profiler e sobe o servidor (chamado no topo dos apps)."""
+    import vdem_profiler as prof
+
+    prof.add_listener(observe_rerun)
+    return start_server()
+
+
+if __name__ == "__main__":
+    port = start_server()
+    print(f"Servindo /metrics em http://127.0.0.1:{port}/metrics (Ctrl+C para sair)")
+    threading.Event().wait()
@@ -0,0 +1,125 @@
+"""
+Regressão em painel com efeitos fixos de país e de ano (two-way FE).
+
+Os efeitos fixos são absorvidos pela transformação within: y e todos os
+regressores são centrados alternadamente nas médias por país e por ano até
+convergir (método de projeções alternadas; num painel balanceado basta uma
+volta). As médias por grupo saem de np.bincount sobre a matriz inteira, sem
+dummies. Depois é MQO nos dados centrados, com erro-padrão robusto por país
+(cluster, correção G/(G−1)·(N−1)/(N−K), como no reghdfe).
+
+    res = efeitos_fixos(df, "v2x_libdem", ["e_gdppc", "e_peaveduc", "e_civil_war"])
+    res["tabela"]   # termo, coef, ep, t, p, sig
+"""
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+import vdem_stats
+import vdem_teffects
+
+
+def _medias(cod, V, n_g, cont):
+    """Médias por grupo de cada coluna de V (n × k) → (n_g × k)."""
+    return np.column_stack([np.bincount(cod, V[:, j], n_g) for j in range(V.shape[1])]) / cont[:, None]
+
+
+def centrar_duplo(V: np.ndarray, pais: np.ndarray, ano: np.ndarray,
+                  tol: float = 1e-10, max_iter: int = 500) -> tuple[np.ndarray, int]:
+    """Tira as médias de país e de ano de cada coluna (projeções alternadas). Devolve (V~, iterações)."""
+    V = V.astype(float, copy=True)
+    n_p, n_a = int(pais.max()) + 1, int(ano.max()) + 1
+    cont_p = np.bincount(pais, minlength=n_p).astype(float)
+    cont_a = np.bincount(ano, minlength=n_a).astype(float)
+    escala = np.maximum(np.abs(V).max(0), 1e-12)
+    for it in range(1, max_iter + 1):
+        V -= _medias(pais, V, n_p, cont_p)[pais]
+        m_a = _medias(ano, V, n_a, cont_a)
+        V -= m_a[ano]
+        if np.max(np.abs(m_a) / escala) < tol:
+            break
+    return V, it
+
+
+def _sem_singletons(pais, ano):
+    """Remove, até estabilizar, observações sozinhas no seu país ou ano (não identificam nada)."""
+    ok = np.ones(len(pais), dtype=bool)
+    while True:
+        cp = np.bincount(pais[ok], minlength=int(pais.max()) + 1)
+        ca = np.bincount(ano[ok], minlength=int(ano.max()) + 1)
+        novo = ok & (cp[pais] > 1) & (ca[ano] > 1)
+        if novo.sum() == ok.sum():
+            return ok
+        ok = novo
+
+
+def efeitos_fixos(df: pd.DataFrame, desfecho: str, regressores, year_range=None,
+                  log_vars=()) -> dict:
+    """
+    y_it = x_it·β + α_i + γ_t + u_it. Devolve {"tabela", "n_obs", "n_paises",
+    "n_anos", "r2_within", "iteracoes"}. `log_vars`: regressores que entram em log.
+    """
+    regressores = list(regressores)
+    if not regressores:
+        raise ValueError("Escolha pelo menos um regressor.")
+    num = lambda c: pd.to_numeric(df[c], errors="coerce").to_numpy(dtype=float)  # noqa: E731
+    anos = num("year")
+    cols = [num(desfecho)]
+    for c in regressores:
+        v = num(c)
+        if c in log_vars:
+            with np.errstate(invalid="ignore", divide="ignore"):
+                v = np.where(v > 0, np.log(v), np.nan)
+        cols.append(v)
+    V = np.column_stack(cols)
+
+    ok = ~np.isnan(V).any(1) & ~np.isnan(anos)
+    if year_range is not None:
+        ok &= (anos >= year_range[0]) & (anos <= year_range[1])
+    _, pais = np.unique(df["country_name"].astype(str).to_numpy()[ok], return_inverse=True)
+    _, ano = np.unique(anos[ok], return_inverse=True)
+    V = V[ok]
+    fica = _sem_singletons(pais, ano)
+    V = V[fica]
+    _, pais = np.unique(pais[fica], return_inverse=True)
+    _, ano = np.unique(ano[fica], return_inverse=True)
+    n, k = len(V), len(regressores)
+    if n <= k + 2 or pais.max() < 1:
+        raise ValueError("Poucas observações com todos os regressores no período.")
+
+    Vt, iteracoes = centrar_duplo(V, pais, ano)
+    y, X = Vt[:, 0], Vt[:, 1:]
+    usa = X.std(0) > 1e-10 * np.maximum(np.abs(V[:, 1:]).max(0), 1e-12)  # sem variação within: sai
+    Xu = X[:, usa]
+    XtX_inv = np.linalg.pinv(Xu.T @ Xu)
+    b_u = XtX_inv @ Xu.T @ y
+    u = y - Xu @ b_u
+
+    G = int(pais.max()) + 1
+    scores = np.column_stack([np.bincount(pais, Xu[:, j] * u, G) for j in range(Xu.shape[1])])
+    c = G / max(G - 1, 1) * (n - 1) / max(n - Xu.shape[1], 1)
+    V_b = XtX_inv @ (scores.T @ scores) @ XtX_inv * c
+
+    b = np.full(k, np.nan)
+    ep = np.full(k, np.nan)
+    b[usa] = b_u
+    ep[usa] = np.sqrt(np.diag(V_b))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        t = b / ep
+    p = 2 * (1 - vdem_teffects.norm_cdf(np.abs(np.nan_to_num(t))))
+    p[np.isnan(t)] = np.nan
+    tabela = pd.DataFrame({
+        "termo": [f"log({c})" if c in log_vars else c for c in regressores],
+        "coef": b, "ep": ep, "t": t, "p": p,
+        "sig": [vdem_stats.estrelas(z) if np.isfinite(z) else "" for z in t],
+    })
+    sst = float(y @ y)
+    return {
+        "tabela": tabela,
+        "n_obs": int(n),
+        "n_paises": G,
+        "n_anos": int(ano.max()) + 1,
+        "r2_within": float(1 - (u @ u) / sst) if sst > 0 else np.nan,
+        "iteracoes": int(iteracoes),
+    }
@@ -0,0 +1,306 @@
+"""
+Instrumentação leve dos reruns dos apps Streamlit.
+
+Cada rerun abre um span raiz (begin_rerun) e as etapas do script abrem
+spans aninhados com `span("nome")`. No fim (end_rerun) o registro do rerun
+é agregado por sessão (st.session_state) e por processo (dicionário do
+módulo, protegido por lock). O painel de debug fica escondido e só aparece
+com `?debug=1` na URL.
+
+Uso típico:
+    import vdem_profiler as prof
+    prof.begin_rerun("multipage")
+    with prof.span("load_data"):
+        df = load_data()
+    ...
+    prof.end_rerun()
+    prof.render_debug_panel()
+
+Dentro de um st.fragment use `with prof.fragment("multipage", "nome"):` — os
+reruns só do fragmento viram registros próprios (o script inteiro não roda).
+"""
+from __future__ import annotations
+
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+
+import pandas as pd
+import streamlit as st
+
+SESSION_KEY = "_prof_historico"   # últimos reruns da sessão
+PAGE_KEY = "_prof_pagina"         # página do último rerun completo (para os fragmentos)
+SESSION_MAX = 50
+PROCESS_MAX = 500                 # reruns guardados no processo (para exportar)
+
+_local = threading.local()        # cada sessão roda o script na própria thread
+_lock = threading.Lock()
+_process_stats: dict[str, dict] = {}
+_process_reruns: deque = deque(maxlen=PROCESS_MAX)
+_listeners: list = []
+
+
+def _session_id() -> str | None:
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx()
+        return ctx.session_id if ctx else None
+    except Exception:
+        return None
+
+
+def _current():
+    return getattr(_local, "rerun", None)
+
+
+def begin_rerun(app: str, page: str | None = None):
+    """Abre o span raiz do rerun atual (descarta um rerun anterior não fechado, ex.: st.stop)."""
+    _local.rerun = {
+        "app": app,
+        "page": page,
+        "session": _session_id(),
+        "ts": time.time(),
+        "t0": time.perf_counter(),
+        "stack": [],
+        "spans": [],
+    }
+
+
+def set_page(page: str | None):
+    """Define a página (seleção do option_menu) do rerun atual."""
+    cur = _current()
+    if cur is not None:
+        cur["page"] = page
+    try:
+        st.session_state[PAGE_KEY] = page
+    except Exception:
+        pass
+
+
+@contextmanager
+def span(name: str):
+    """Mede uma etapa do rerun. Fora de um rerun ativo é um no-op."""
+    cur = _current()
+    if cur is None:
+        yield
+        return
+    stack = cur["stack"]
+    path = "/".join(stack + [name])
+    stack.append(name)
+    t = time.perf_counter()
+    try:
+        yield
+    finally:
+        t_end = time.perf_counter()
+        stack.pop()
+        cur["spans"].append({
+            "name": name,
+            "path": path,
+            "depth": len(stack),
+            "start_ms": (t - cur["t0"]) * 1000.0,
+            "dur_ms": (t_end - t) * 1000.0,
+        })
+
+
+@contextmanager
+def fragment(app: str, name: str):
+    """
+    Corpo de um st.fragment. Num rerun completo é só um span; num rerun do
+    próprio fragmento (o resto do script não roda) abre e fecha um registro
+    de rerun próprio, marcado com o nome do fragmento.
+    """
+    if _current() is not None:
+        with span(name):
+            yield
+        return
+    try:
+        page = st.session_state.get(PAGE_KEY)
+    except Exception:
+        page = None
+    begin_rerun(app, page)
+    _local.rerun["fragment"] = name
+    try:
+        with span(name):
+            yield
+    finally:
+        end_rerun()
+
+
+def add_listener(fn):
+    """Registra fn(record) chamado a cada end_rerun (ex.: exportador de métricas)."""
+    if fn not in _listeners:
+        _listeners.append(fn)
+
+
+def end_rerun() -> dict | None:
+    """Fecha o rerun atual e agrega o registro na sessão e no processo."""
+    cur = _current()
+    if cur is None:
+        return None
+    _local.rerun = None
+    total_ms = (time.perf_counter() - cur["t0"]) * 1000.0
+    record = {
+        "ts": cur["ts"],
+        "app": cur["app"],
+        "page": cur["page"],
+        "session": cur["session"],
+        "total_ms": total_ms,
+        "fragment": cur.get("fragment"),
+        "spans": sorted(cur["spans"], key=lambda s: s["start_ms"]),
+    }
+
+    try:
+        hist = st.session_state.setdefault(SESSION_KEY, deque(maxlen=SESSION_MAX))
+        hist.append(record)
+    except Exception:
+        pass  # fora de um contexto Streamlit (ex.: testes de unidade)
+
+    with _lock:
+        _process_reruns.append(record)
+        for s in [{"path": "rerun", "dur_ms": total_ms}] + [
+            {"path": f"rerun/{s['path']}", "dur_ms": s["dur_ms"]} for s in record["spans"]
+        ]:
+            agg = _process_stats.setdefault(s["path"], {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+            agg["count"] += 1
+            agg["total_ms"] += s["dur_ms"]
+            agg["max_ms"] = max(agg["max_ms"], s["dur_ms"])
+
+    for fn in list(_listeners):
+        try:
+            fn(record)
+        except Exception:
+            pass
+    return record
+
+
+# ==========================
+# AGREGAÇÕES
+# ==========================
+def _aggregate(records) -> pd.DataFrame:
+    rows = []
+    for r in records:
+        rows.append({"path": "rerun", "dur_ms": r["total_ms"]})
+        rows.extend({"path": f"rerun/{s['path']}", "dur_ms": s["dur_ms"]} for s in r["spans"])
+    if not rows:
+        return pd.DataFrame(columns=["path", "count", "total_ms", "mean_ms", "max_ms"])
+    g = pd.DataFrame(rows).groupby("path")["dur_ms"].agg(["count", "sum", "mean", "max"]).reset_index()
+    g.columns = ["path", "count", "total_ms", "mean_ms", "max_ms"]
+    return g.sort_values("total_ms", ascending=False, ignore_index=True)
+
+
+def session_records() -> list[dict]:
+    try:
+        return list(st.session_state.get(SESSION_KEY, []))
+    except Exception:
+        return []
+
+
+def session_stats() -> pd.DataFrame:
+    """Tempo por etapa agregado nos reruns da sessão atual."""
+    return _aggregate(session_records())
+
+
+def process_stats() -> pd.DataFrame:
+    """Tempo por etapa agregado em todas as sessões deste processo."""
+    with _lock:
+        items = [dict(path=p, **v) for p, v in _process_stats.items()]
+    if not items:
+        return _aggregate([])
+    g = pd.DataFrame(items)
+    g["mean_ms"] = g["total_ms"] / g["count"]
+    return g[["path", "count", "total_ms", "mean_ms", "max_ms"]].sort_values(
+        "total_ms", ascending=False, ignore_index=True
+    )
+
+
+def reset_process_stats():
+    with _lock:
+        _process_stats.clear()
+        _process_reruns.clear()
+
+
+# ==========================
+# EXPORTAÇÃO
+# ==========================
+def to_jsonl(records=None) -> str:
+    """Um rerun por linha (JSON), para análise offline."""
+    if records is None:
+        with _lock:
+            records = list(_process_reruns)
+    return "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records)
+
+
+def export_jsonl(path, records=None) -> Path:
+    path = Path(path)
+    path.write_text(to_jsonl(records), encoding="utf-8")
+    return path
+
+
+# ==========================
+# PAINEL DE DEBUG (escondido: ?debug=1)
+# ==========================
+def debug_enabled() -> bool:
+    try:
+        return str(st.query_params.get("debug", "")).lower() in ("1", "true", "sim")
+    except Exception:
+        return False
+
+
+def flame_chart(record: dict):
+    """Gráfico estilo flame/icicle: uma barra por span, profundidade no eixo Y."""
+    import altair as alt
+
+    rows = [{"name": "rerun", "path": "rerun", "depth": 0,
+             "start_ms": 0.0, "end_ms": record["total_ms"], "dur_ms": record["total_ms"]}]
+    rows += [{"name": s["name"], "path": f"rerun/{s['path']}", "depth": s["depth"] + 1,
+              "start_ms": s["start_ms"], "end_ms": s["start_ms"] + s["dur_ms"], "dur_ms": s["dur_ms"]}
+             for s in record["spans"]]
+    data = pd.DataFrame(rows)
+    base = alt.Chart(data).encode(
+        x=alt.X("start_ms:Q", title="ms desde o início do rerun"),
+        x2="end_ms:Q",
+        y=alt.Y("depth:O", title=None, axis=None),
+    )
+    bars = base.mark_bar(stroke="white").encode(
+        color=alt.Color("name:N", legend=None),
+        tooltip=["path:N", alt.Tooltip("dur_ms:Q", format=".1f"), alt.Tooltip("start_ms:Q", format=".1f")],
+    )
+    labels = base.mark_text(align="left", dx=3, color="black").encode(text="name:N")
+    return (bars + labels).properties(height=max(120, 28 * (int(data["depth"].max()) + 1)))
+
+
+def render_debug_panel():
+    """Painel escondido com breakdown do último rerun, agregados e exportação JSONL."""
+    if not debug_enabled():
+        return
+    records = session_records()
+    with st.expander("🛠️ Profiler (debug)", expanded=True):
+        if not records:
+            st.caption("Nenhum rerun registrado ainda.")
+            return
+        last = records[-1]
+        st.caption(
+            f"Último rerun: **{last['total_ms']:.1f} ms** — app `{last['app']}`, página `{last['page']}`"
+            + (f", fragmento `{last['fragment']}`" if last.get("fragment") else "") + " "
+            f"({len(records)} rerun(s) nesta sessão)"
+        )
+        st.altair_chart(flame_chart(last), use_container_width=True)
+
+        c1, c2 = st.columns(2)
+        with c1:
+            st.markdown("**Sessão**")
+            st.dataframe(session_stats().round(2), hide_index=True, use_container_width=True)
+        with c2:
+            st.markdown("**Processo (todas as sessões)**")
+            st.dataframe(process_stats().round(2), hide_index=True, use_container_width=True)
+
+        d1, d2 = st.columns(2)
+        with d1:
+            st.download_button("⬇️ JSONL (sessão)", to_jsonl(records),
+                               file_name="profiler_sessao.jsonl", mime="application/jsonl")
+        with d2:
+            st.download_button("⬇️ JSONL (processo)", to_jsonl(),
+                               file_name="profiler_processo.jsonl", mime="application/jsonl")
@@ -0,0 +1,246 @@
+"""
+Variáveis relacionadas: as k mais correlacionadas (|r| de Pearson) com cada
+variável do catálogo, no painel país-ano inteiro.
+
+Job offline: a matriz país-ano × variável é processada em blocos de colunas
+(tiles), então a memória fica limitada a dois blocos por vez. Para cada par de
+blocos, as correlações par a par só com as linhas observadas nas duas colunas
+saem de seis produtos de matrizes (contagens, somas, somas de quadrados e
+produtos cruzados com máscaras 0/1). O top-k de cada variável é atualizado
+bloco a bloco e gravado como um Parquet pequeno (variavel, rank, relacionada,
+r, n), com fingerprint nos metadados como o cubo.
+
+    python vdem_related.py vdem_all.parquet [--out vdem_related.parquet] [--k 10] [--bloco 512]
+
+Nos apps: rel = carregar(artefato, fingerprint_da_base(base)) → dict variável →
+DataFrame (lookup O(1)), ou None se o artefato foi gerado de outra base.
+Para um grupo pequeno de colunas, matriz_correlacao + ordem_cluster dão o
+heatmap da página de correlações.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+SKIP_SUFFIX = ("_sd", "_osp", "_codelow", "_codehigh", "_ord", "_mean", "_nr")
+SKIP_COLS = {"year", "country_id", "COWcode", "codingstart", "codingend", "project", "historical"}
+META_KEY = b"vdem_related"
+K = 10
+BLOCO = 512
+MIN_OBS = 30
+
+
+def variaveis_candidatas(schema_ou_df) -> list[str]:
+    """Colunas numéricas da base, sem as companheiras (_sd, _codelow, …) e sem ids/datas de codificação."""
+    if hasattr(schema_ou_df, "dtypes"):
+        cols = [c for c in schema_ou_df.columns if pd.api.types.is_numeric_dtype(schema_ou_df[c])]
+    else:
+        import pyarrow as pa
+        cols = [f.name for f in schema_ou_df if pa.types.is_integer(f.type) or pa.types.is_floating(f.type)]
+    return [c for c in cols if c not in SKIP_COLS and not c.endswith(SKIP_SUFFIX)]
+
+
+def fingerprint(variaveis, k: int, source=None) -> str:
+    h = hashlib.sha1()
+    h.update(json.dumps([list(variaveis), k]).encode())
+    if source is not None and Path(source).exists():
+        st_ = Path(source).stat()
+        h.update(f"{st_.st_size}:{int(st_.st_mtime)}".encode())
+    return h.hexdigest()
+
+
+def fingerprint_da_base(source, k: int = K) -> str:
+    """Fingerprint que o job gravaria hoje para a base Parquet `source` (só lê o esquema)."""
+    import pyarrow.parquet as pq
+
+    return fingerprint(variaveis_candidatas(pq.read_schema(source)), k, source)
+
+
+# ==========================
+# CÁLCULO (blocos de colunas)
+# ==========================
+def _bloco(df: pd.DataFrame, cols) -> tuple[np.ndarray, np.ndarray]:
+    """Valores centrados (0 onde falta) e máscara 0/1 de um bloco de colunas."""
+    X = df[list(cols)].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64)
+    M = ~np.isnan(X)
+    with np.errstate(invalid="ignore"):
+        X = X - np.nanmean(np.where(M.any(0), X, 0.0), axis=0)  # centrar reduz cancelamento nas somas
+    return np.where(M, X, 0.0), M.astype(np.float64)
+
+
+def correlacao_par(A, MA, B, MB, min_obs: int = MIN_OBS):
+    """r de Pearson entre todas as colunas de A e de B, usando só as linhas observadas em cada par."""
+    n = MA.T @ MB
+    sa, sb = A.T @ MB, MA.T @ B
+    saa, sbb = (A * A).T @ MB, MA.T @ (B * B)
+    sab = A.T @ B
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cov = n * sab - sa * sb
+        r = cov / np.sqrt((n * saa - sa * sa) * (n * sbb - sb * sb))
+    r[(n < min_obs) | ~np.isfinite(r)] = np.nan
+    return np.clip(r, -1.0, 1.0), n
+
+
+def top_k(df: pd.DataFrame, variaveis, k: int = K, bloco: int = BLOCO, min_obs: int = MIN_OBS,
+          progresso=None) -> pd.DataFrame:
+    """Top-k por |r| de cada variável: variavel, rank, relacionada, r, n."""
+    variaveis = list(variaveis)
+    V = len(variaveis)
+    best_r = np.full((V, k), np.nan)     # |r| ordenável; NaN = vaga livre
+    best_s = np.zeros((V, k))            # r com sinal
+    best_j = np.full((V, k), -1, dtype=np.int64)
+    best_n = np.zeros((V, k))
+    cortes = [(a, min(a + bloco, V)) for a in range(0, V, bloco)]
+
+    def _atualiza(lin, r, n, col0):
+        """Junta o bloco (lin × colunas) ao top-k atual das linhas `lin`."""
+        cand_a = np.concatenate([np.nan_to_num(best_r[lin], nan=-1.0), np.nan_to_num(np.abs(r), nan=-1.0)], 1)
+        cand_s = np.concatenate([best_s[lin], np.nan_to_num(r)], 1)
+        cand_j = np.concatenate([best_j[lin], np.broadcast_to(np.arange(r.shape[1]) + col0, r.shape)], 1)
+        cand_n = np.concatenate([best_n[lin], n], 1)
+        idx = np.argsort(-cand_a, axis=1, kind="stable")[:, :k]
+        pega = lambda m: np.take_along_axis(m, idx, 1)  # noqa: E731
+        a = pega(cand_a)
+        best_r[lin] = np.where(a >= 0, a, np.nan)
+        best_s[lin], best_j[lin], best_n[lin] = pega(cand_s), pega(cand_j), pega(cand_n)
+
+    feitos = 0
+    total = len(cortes) * (len(cortes) + 1) // 2
+    for bi, (a0, a1) in enumerate(cortes):
+        A, MA = _bloco(df, variaveis[a0:a1])
+        for b0, b1 in cortes[bi:]:
+            B, MB = (A, MA) if b0 == a0 else _bloco(df, variaveis[b0:b1])
+            r, n = correlacao_par(A, MA, B, MB, min_obs)
+            if b0 == a0:
+                np.fill_diagonal(r, np.nan)
+            _atualiza(np.arange(a0, a1), r, n, b0)
+            if b0 != a0:
+                _atualiza(np.arange(b0, b1), r.T, n.T, a0)
+            feitos += 1
+            if progresso is not None:
+                progresso(feitos, total)
+
+    ok = best_j >= 0
+    ok &= ~np.isnan(best_r)
+    lin, pos = np.nonzero(ok)
+    nomes = np.asarray(variaveis, dtype=object)
+    return pd.DataFrame({
+        "variavel": pd.Categorical(nomes[lin], categories=variaveis),
+        "rank": (pos + 1).astype("int8"),
+        "relacionada": pd.Categorical(nomes[best_j[lin, pos]], categories=variaveis),
+        "r": best_s[lin, pos].astype("float32"),
+        "n": best_n[lin, pos].astype("int32"),
+    })
+
+
+# ==========================
+# MATRIZ DE UM GRUPO (página de correlações)
+# ==========================
+def matriz_correlacao(df: pd.DataFrame, cols, min_obs: int = 10) -> tuple[np.ndarray, np.ndarray]:
+    """Correlações par a par (linhas observadas nas duas colunas) de poucas colunas projetadas: (r, n)."""
+    X = np.ma.masked_invalid(df[list(cols)].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64))
+    X = X - X.mean(axis=0)
+    M = (~np.ma.getmaskarray(X)).astype(np.float64)
+    A = X.filled(0.0)
+    r, n = correlacao_par(A, M, A, M, min_obs)
+    np.fill_diagonal(r, np.where(np.diag(n) >= min_obs, 1.0, np.nan))
+    return r, n
+
+
+def ordem_cluster(r: np.ndarray) -> np.ndarray:
+    """
+    Ordem das folhas de um agrupamento hierárquico (ligação média) com
+    distância 1 − |r|: variáveis parecidas ficam vizinhas no heatmap.
+    """
+    n = r.shape[0]
+    if n <= 2:
+        return np.arange(n)
+    D = 1.0 - np.abs(np.nan_to_num(r, nan=0.0))
+    np.fill_diagonal(D, np.inf)
+    ordens = [[i] for i in range(n)]
+    tam = np.ones(n)
+    vivo = np.ones(n, dtype=bool)
+    for _ in range(n - 1):
+        i, j = divmod(int(np.argmin(D)), n)
+        i, j = min(i, j), max(i, j)
+        # ligação média: distância do grupo novo = média ponderada pelos tamanhos
+        novo = (D[i] * tam[i] + D[j] * tam[j]) / (tam[i] + tam[j])
+        D[i, :] = novo
+        D[:, i] = novo
+        D[i, i] = np.inf
+        D[j, :] = np.inf
+        D[:, j] = np.inf
+        ordens[i] = ordens[i] + ordens[j]
+        tam[i] += tam[j]
+        vivo[j] = False
+    return np.asarray(ordens[int(np.flatnonzero(vivo)[0])])
+
+
+# ==========================
+# ARTEFATO
+# ==========================
+def gravar(rel: pd.DataFrame, path, fp: str) -> Path:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table = pa.Table.from_pandas(rel, preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), META_KEY: fp.encode()})
+    path = Path(path)
+    pq.write_table(table, path)
+    return path
+
+
+def carregar(path, fp: str | None = None) -> dict[str, pd.DataFrame] | None:
+    """
+    Artefato → {variável: DataFrame(rank, relacionada, r, n)}; None se não
+    existir ou se o fingerprint não bater (índice de outra versão da base).
+    """
+    import pyarrow.parquet as pq
+
+    path = Path(path)
+    if not path.exists():
+        return None
+    meta = pq.read_schema(path).metadata or {}
+    if fp is not None and meta.get(META_KEY, b"").decode() != fp:
+        return None
+    rel = pq.read_table(path).to_pandas()
+    rel["variavel"] = rel["variavel"].astype(str)
+    rel["relacionada"] = rel["relacionada"].astype(str)
+    return {v: g.drop(columns="variavel").reset_index(drop=True) for v, g in rel.groupby("variavel", sort=False)}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Gera o índice de variáveis relacionadas (top-k de |r|).")
+    ap.add_argument("source", help="Base (Parquet ou CSV) com country_name, year e as variáveis.")
+    ap.add_argument("--out", help="Artefato de saída (padrão: vdem_related.parquet ao lado da base).")
+    ap.add_argument("--k", type=int, default=K)
+    ap.add_argument("--bloco", type=int, default=BLOCO, help="Colunas por bloco (limita a memória).")
+    args = ap.parse_args(argv)
+
+    source = Path(args.source)
+    if source.suffix == ".parquet":
+        import pyarrow.parquet as pq
+        cols = variaveis_candidatas(pq.read_schema(source))
+        df = pd.read_parquet(source, columns=cols)
+    else:
+        df = pd.read_csv(source, low_memory=False)
+        cols = variaveis_candidatas(df)
+        df = df[cols]
+
+    def progresso(i, total):
+        if i % 5 == 0 or i == total:
+            print(f"{i}/{total} blocos…", flush=True)
+
+    rel = top_k(df, cols, k=args.k, bloco=args.bloco, progresso=progresso)
+    out = Path(args.out) if args.out else source.with_name("vdem_related.parquet")
+    gravar(rel, out, fingerprint(cols, args.k, source))
+    print(f"{rel['variavel'].nunique()} variáveis × top-{args.k} em {out}")
+
+
+if __name__ == "__main__":
+    main()
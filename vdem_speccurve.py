@@ -0,0 +1,198 @@
+"""
+Curva de especificações: o efeito da ONU (δ do modelo "comum" de vdem_teffects)
+em centenas de variantes — desfecho × conjunto de controles × janela amostral.
+
+Os modelos rodam num ProcessPoolExecutor (processos "spawn"; a base vai uma vez
+para cada processo, no initializer) e cada resultado é gravado assim que sai,
+numa linha de um checkpoint JSONL. Rodar de novo com o mesmo checkpoint continua
+de onde parou; se duas sessões rodarem ao mesmo tempo, uma especificação pode
+ser gravada duas vezes, e a leitura fica só com a primeira.
+
+    especs = gerar_especificacoes(["v2x_libdem", "v2x_polyarchy"])
+    for r in rodar(df, especs, "speccurve.jsonl"):   # gerador: um resultado por modelo
+        ...
+
+    python vdem_speccurve.py UNdem-All.csv [--out speccurve.jsonl] [--workers N]
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import pandas as pd
+
+import vdem_teffects
+
+CONTROLES = ["e_gdppc", "e_peaveduc", "e_civil_war", "e_miinteco", "reg_dem"]
+JANELAS = [(1820, 2000), (1900, 2000), (1946, 2000), (1820, 2020)]
+DESFECHOS = ["v2x_libdem", "v2x_polyarchy", "v2x_partipdem", "v2x_delibdem", "v2x_egaldem"]
+
+
+def gerar_especificacoes(desfechos=None, controles=None, janelas=None) -> list[dict]:
+    """Todas as combinações desfecho × subconjunto de controles × janela."""
+    desfechos = desfechos or DESFECHOS
+    controles = controles or CONTROLES
+    janelas = janelas or JANELAS
+    base = vdem_teffects.ESPEC_PAPER
+    especs = []
+    for desfecho in desfechos:
+        for k in range(len(controles) + 1):
+            for ctrl in itertools.combinations(controles, k):
+                for janela in janelas:
+                    especs.append({**base, "desfecho": desfecho, "covariaveis": list(ctrl),
+                                   "anos": list(janela)})
+    return especs
+
+
+def id_espec(espec: dict) -> str:
+    return hashlib.sha1(json.dumps(espec, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def colunas(especs) -> list[str]:
+    cols = set()
+    for e in especs:
+        cols |= set(vdem_teffects.colunas_necessarias(e))
+    return sorted(cols)
+
+
+# ==========================
+# CHECKPOINT
+# ==========================
+def ler_checkpoint(path) -> pd.DataFrame:
+    """
+    Resultados já gravados (um por linha), um por especificação: linhas repetidas
+    do mesmo id (sessões concorrentes anexando ao mesmo arquivo) ficam só com a
+    primeira. Linha cortada no fim é ignorada.
+    """
+    path = Path(path)
+    linhas, vistos = [], set()
+    if path.exists():
+        for txt in path.read_text(encoding="utf-8").splitlines():
+            try:
+                r = json.loads(txt)
+            except json.JSONDecodeError:
+                continue
+            if r.get("id") in vistos:
+                continue
+            vistos.add(r.get("id"))
+            linhas.append(r)
+    return pd.DataFrame(linhas)
+
+
+def _gravar(path: Path, r: dict):
+    with path.open("a", encoding="utf-8") as f:
+        f.write(json.dumps(r, ensure_ascii=False) + "\n")
+
+
+def tabela_curva(res: pd.DataFrame, controles=None) -> pd.DataFrame:
+    """Resultados ordenados pelo efeito, com posição (rank), IC 95% e uma coluna 0/1 por controle."""
+    controles = controles or CONTROLES
+    d = res.dropna(subset=["efeito"]).sort_values("efeito").reset_index(drop=True)
+    d["rank"] = range(1, len(d) + 1)
+    d["li"] = d["efeito"] - 1.96 * d["ep"]
+    d["ls"] = d["efeito"] + 1.96 * d["ep"]
+    d["significativo"] = (d["li"] > 0) | (d["ls"] < 0)
+    d["janela_txt"] = d["janela"].map(lambda j: f"{j[0]}–{j[1]}")
+    for c in controles:
+        d[c] = d["controles"].map(lambda cs, c=c: c in cs)
+    return d
+
+
+# ==========================
+# EXECUÇÃO
+# ==========================
+_DF = None  # base do processo de trabalho (posta pelo initializer)
+
+
+def _init(df):
+    global _DF
+    _DF = df
+
+
+def _rodar_uma(espec: dict) -> dict:
+    try:
+        res = vdem_teffects.efeito_pontual(_DF, espec)
+    except Exception as e:  # modelo degenerado não derruba o lote
+        res = {"efeito": float("nan"), "ep": float("nan"), "n_obs": 0, "n_paises": 0, "erro": str(e)}
+    return {
+        "id": id_espec(espec),
+        "desfecho": espec["desfecho"],
+        "controles": espec["covariaveis"],
+        "janela": espec["anos"],
+        **res,
+    }
+
+
+def rodar(df: pd.DataFrame, especs, checkpoint, workers: int | None = None):
+    """
+    Gerador: roda as especificações que ainda não estão no checkpoint e devolve
+    cada resultado assim que termina (já gravado). Interromper no meio não perde
+    o que terminou — basta chamar de novo.
+    """
+    checkpoint = Path(checkpoint)
+    checkpoint.parent.mkdir(parents=True, exist_ok=True)
+    if checkpoint.exists() and checkpoint.stat().st_size:
+        with checkpoint.open("rb+") as f:  # linha cortada por interrupção: fecha antes de anexar
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+    feitos = set(ler_checkpoint(checkpoint).get("id", pd.Series(dtype=str)))
+    pendentes = [e for e in especs if id_espec(e) not in feitos]
+    if not pendentes:
+        return
+    base = df[[c for c in colunas(pendentes) if c in df.columns]]
+    workers = min(workers or os.cpu_count() or 1, len(pendentes))
+
+    if workers <= 1:
+        _init(base)
+        for e in pendentes:
+            r = _rodar_uma(e)
+            _gravar(checkpoint, r)
+            yield r
+        return
+
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init, initargs=(base,),
+                               mp_context=multiprocessing.get_context("spawn"))
+    try:
+        futuros = [pool.submit(_rodar_uma, e) for e in pendentes]
+        for f in as_completed(futuros):
+            r = f.result()
+            _gravar(checkpoint, r)
+            yield r
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Roda a curva de especificações (com checkpoint).")
+    ap.add_argument("source", help="Base (CSV ou Parquet) com as colunas do paper.")
+    ap.add_argument("--out", help="Checkpoint JSONL (padrão: speccurve.jsonl ao lado da base).")
+    ap.add_argument("--workers", type=int, default=None)
+    args = ap.parse_args(argv)
+
+    source = Path(args.source)
+    especs = gerar_especificacoes()
+    if source.suffix == ".parquet":
+        import pyarrow.parquet as pq
+        cols = [c for c in colunas(especs) if c in pq.read_schema(source).names]
+        df = pd.read_parquet(source, columns=cols)
+    else:
+        head = pd.read_csv(source, nrows=0).columns
+        df = pd.read_csv(source, usecols=[c for c in colunas(especs) if c in head])
+    especs = [e for e in especs if e["desfecho"] in df.columns]
+    out = Path(args.out) if args.out else source.with_name("speccurve.jsonl")
+    n = 0
+    for n, r in enumerate(rodar(df, especs, out, args.workers), 1):
+        if n % 25 == 0:
+            print(f"{n} modelos novos…", flush=True)
+    print(f"{n} modelos novos; {len(ler_checkpoint(out))} no total em {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Estimadores vetorizados (NumPy puro) usados pelas abas de análise dos apps.
+
+    ols_por_grupo(grupos, x, y)                 # y ~ a + b·x para todos os grupos (ex.: anos) de uma vez
+    estrelas(z)                                  # "***" / "**" / "*" / "" pela estatística z (bicaudal)
+    bootstrap_paralelo(fn, dados, n_boot, seed)  # réplicas em blocos num pool de processos
+    pool_processos()                             # pool "spawn" de longa duração (st.cache_resource nos apps)
+"""
+from __future__ import annotations
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+
+# ==========================
+# OLS POR GRUPO (estatísticas suficientes)
+# ==========================
+def ols_por_grupo(grupos, x, y, min_obs: int = 3) -> pd.DataFrame:
+    """
+    Ajusta y = a + b·x separadamente em cada grupo, num passe só.
+
+    Para cada grupo g calcula n, médias e as somas centradas Sxx, Syy, Sxy com
+    np.bincount; daí saem b = Sxy/Sxx, a = ȳ − b·x̄, R² = Sxy²/(Sxx·Syy) e o
+    erro-padrão de b, √(SQR/(n−2)/Sxx). Pares com NaN são descartados; grupos
+    com menos de `min_obs` observações (ou x constante) ficam de fora.
+
+    Devolve DataFrame indexado pelo grupo: n, intercepto, inclinacao, r2,
+    ep_inclinacao, ep_intercepto.
+    """
+    g = np.asarray(grupos)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    ok = ~(np.isnan(x) | np.isnan(y))
+    if g.dtype.kind == "f":
+        ok &= ~np.isnan(g)
+    g, x, y = g[ok], x[ok], y[ok]
+
+    chaves, cod = np.unique(g, return_inverse=True)
+    k = len(chaves)
+    n = np.bincount(cod, minlength=k).astype(float)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mx = np.bincount(cod, x, k) / n
+        my = np.bincount(cod, y, k) / n
+        dx, dy = x - mx[cod], y - my[cod]
+        sxx = np.bincount(cod, dx * dx, k)
+        syy = np.bincount(cod, dy * dy, k)
+        sxy = np.bincount(cod, dx * dy, k)
+
+        b = sxy / sxx
+        a = my - b * mx
+        sqr = np.clip(syy - b * sxy, 0.0, None)
+        s2 = sqr / (n - 2)
+        ep_b = np.sqrt(s2 / sxx)
+        ep_a = np.sqrt(s2 * (1.0 / n + mx * mx / sxx))
+        r2 = np.where(syy > 0, sxy * sxy / (sxx * syy), np.nan)
+
+    out = pd.DataFrame({
+        "n": n.astype(int),
+        "intercepto": a,
+        "inclinacao": b,
+        "r2": r2,
+        "ep_inclinacao": ep_b,
+        "ep_intercepto": ep_a,
+    }, index=pd.Index(chaves, name="grupo"))
+    return out[(out["n"] >= min_obs) & (sxx > 0)]
+
+
+# ==========================
+# SIGNIFICÂNCIA
+# ==========================
+def estrelas(z) -> str:
+    """Estrelas das tabelas de coeficientes: |z| ≥ 2,576 (1%), 1,960 (5%), 1,645 (10%)."""
+    z = abs(z)
+    return "***" if z >= 2.576 else "**" if z >= 1.960 else "*" if z >= 1.645 else ""
+
+
+# ==========================
+# BOOTSTRAP EM PARALELO
+# ==========================
+BOOT_CHUNK = 50  # réplicas por tarefa: o resultado não depende do nº de processos
+EM_PROCESSO_ATE = 5_000_000  # elementos dos dados × réplicas: abaixo disso o pool custa mais que o bootstrap
+
+
+def pool_processos(workers: int | None = None) -> ProcessPoolExecutor:
+    """
+    Pool de processos iniciados por "spawn" (não "fork"): seguro de criar de
+    dentro do servidor do Streamlit, que tem várias threads. Os apps guardam um
+    só, de longa duração, em st.cache_resource e o passam em `pool=`.
+    """
+    return ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1,
+                               mp_context=multiprocessing.get_context("spawn"))
+
+
+def tamanho_dados(dados) -> int:
+    """Total de elementos dos arrays em `dados` (array, ou tupla/lista/dict de arrays)."""
+    if isinstance(dados, dict):
+        return sum(tamanho_dados(v) for v in dados.values())
+    if isinstance(dados, (tuple, list)):
+        return sum(tamanho_dados(v) for v in dados)
+    return int(getattr(dados, "size", 1))
+
+
+def bootstrap_paralelo(fn, dados, n_boot: int, seed: int = 0, workers: int | None = None,
+                       pool: ProcessPoolExecutor | None = None) -> np.ndarray:
+    """
+    Roda fn(dados, n, rng_seed) → array (n, ...) em blocos de BOOT_CHUNK réplicas
+    e concatena. `fn` precisa ser uma função de módulo (picklável). Cada bloco
+    tem a própria semente (SeedSequence.spawn), então o resultado é o mesmo com
+    1 ou N processos.
+
+    Problemas pequenos (tamanho_dados × n_boot < EM_PROCESSO_ATE) rodam no
+    próprio processo. Os maiores vão para `pool` (ver pool_processos) ou, sem
+    ele, para um pool "spawn" temporário de `workers` processos.
+    """
+    tamanhos = [min(BOOT_CHUNK, n_boot - i) for i in range(0, n_boot, BOOT_CHUNK)]
+    sementes = np.random.SeedSequence(seed).spawn(len(tamanhos))
+    workers = min(workers or os.cpu_count() or 1, len(tamanhos))
+    if workers <= 1 or tamanho_dados(dados) * n_boot < EM_PROCESSO_ATE:
+        partes = [fn(dados, n, s) for n, s in zip(tamanhos, sementes)]
+    elif pool is not None:
+        partes = list(pool.map(fn, [dados] * len(tamanhos), tamanhos, sementes))
+    else:
+        with pool_processos(workers) as temp:
+            partes = list(temp.map(fn, [dados] * len(tamanhos), tamanhos, sementes))
+    return np.concatenate(partes, axis=0)
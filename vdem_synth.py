@@ -0,0 +1,541 @@
+"""
+Gerador sintético de uma base no formato do V-Dem (para benchmarks e testes
+offline, sem a base licenciada).
+
+- ~200 países × 235 anos (1789–2023), painel desbalanceado (cada país tem
+  ano de início; estados históricos terminam cedo);
+- variáveis do catálogo `indicadores_vdem.csv` com as famílias reais:
+  índices `v2x_*` (0–1, com `_codelow`/`_codehigh`), indicadores de
+  especialistas `v2*`/`v3*` (escala latente, com `_ord`, `_codelow`,
+  `_codehigh`, `_sd`, `_osp*`, `_mean`, `_nr`), fatores externos `e_*`;
+- cobertura (NaN) realista por era e por família;
+- colunas do paper (un_member, un_entry_year, colonized, board, dist);
+- tudo vetorizado com NumPy e reprodutível pela semente.
+
+Os fatores latentes (democracia, desenvolvimento, conflito) são comuns a
+todas as variáveis, então correlações, tendências e episódios fazem sentido.
+
+Uso:
+    python vdem_synth.py PASTA_SAIDA [--countries 200] [--seed 2024] [--no-companions] [--no-csv]
+
+Escreve vdem_all.parquet, UNdem-All.csv, indicadores_vdem.csv e (cópia)
+indicadoresVDEM.csv — os arquivos que os apps leem via VDEM_DATA_DIR.
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import io
+import re
+import shutil
+import zlib
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = Path(__file__).resolve().parent
+CATALOG_CSV = REPO_ROOT / "indicadores_vdem.csv"
+
+YEAR_START, YEAR_END = 1789, 2023
+
+# Companheiras das variáveis de especialistas (modelo de mensuração do V-Dem)
+EXPERT_COMPANIONS = ("_ord", "_codelow", "_codehigh", "_sd",
+                     "_osp", "_osp_codelow", "_osp_codehigh", "_osp_sd", "_mean", "_nr")
+INDEX_COMPANIONS = ("_codelow", "_codehigh")
+
+CONTEMPORARY = [
+    "Afghanistan", "Albania", "Algeria", "Angola", "Argentina", "Armenia", "Australia", "Austria",
+    "Azerbaijan", "Bahrain", "Bangladesh", "Barbados", "Belarus", "Belgium", "Benin", "Bhutan",
+    "Bolivia", "Bosnia and Herzegovina", "Botswana", "Brazil", "Bulgaria", "Burkina Faso", "Burundi",
+    "Cabo Verde", "Cambodia", "Cameroon", "Canada", "Central African Republic", "Chad", "Chile",
+    "China", "Colombia", "Comoros", "Congo", "Costa Rica", "Croatia", "Cuba", "Cyprus",
+    "Czech Republic", "Democratic Republic of the Congo", "Denmark", "Djibouti", "Dominican Republic",
+    "Ecuador", "Egypt", "El Salvador", "Equatorial Guinea", "Eritrea", "Estonia", "Eswatini",
+    "Ethiopia", "Fiji", "Finland", "France", "Gabon", "Gambia", "Georgia", "Germany", "Ghana",
+    "Greece", "Guatemala", "Guinea", "Guinea-Bissau", "Guyana", "Haiti", "Honduras", "Hong Kong",
+    "Hungary", "Iceland", "India", "Indonesia", "Iran", "Iraq", "Ireland", "Israel", "Italy",
+    "Ivory Coast", "Jamaica", "Japan", "Jordan", "Kazakhstan", "Kenya", "Kosovo", "Kuwait",
+    "Kyrgyzstan", "Laos", "Latvia", "Lebanon", "Lesotho", "Liberia", "Libya", "Lithuania",
+    "Luxembourg", "Madagascar", "Malawi", "Malaysia", "Maldives", "Mali", "Malta", "Mauritania",
+    "Mauritius", "Mexico", "Moldova", "Mongolia", "Montenegro", "Morocco", "Mozambique", "Myanmar",
+    "Namibia", "Nepal", "Netherlands", "New Zealand", "Nicaragua", "Niger", "Nigeria", "North Korea",
+    "North Macedonia", "Norway", "Oman", "Pakistan", "Palestine", "Panama", "Papua New Guinea",
+    "Paraguay", "Peru", "Philippines", "Poland", "Portugal", "Qatar", "Romania", "Russia", "Rwanda",
+    "São Tomé and Príncipe", "Saudi Arabia", "Senegal", "Serbia", "Seychelles", "Sierra Leone",
+    "Singapore", "Slovakia", "Slovenia", "Solomon Islands", "Somalia", "Somaliland", "South Africa",
+    "South Korea", "South Sudan", "Spain", "Sri Lanka", "Sudan", "Suriname", "Sweden", "Switzerland",
+    "Syria", "Taiwan", "Tajikistan", "Tanzania", "Thailand", "Timor-Leste", "Togo",
+    "Trinidad and Tobago", "Tunisia", "Turkey", "Turkmenistan", "Uganda", "Ukraine",
+    "United Arab Emirates", "United Kingdom", "United States of America", "Uruguay", "Uzbekistan",
+    "Vanuatu", "Venezuela", "Vietnam", "Yemen", "Zambia", "Zanzibar", "Zimbabwe",
+]
+
+# Estados históricos: (nome, ano de início, ano de fim)
+HISTORICAL = [
+    ("Baden", 1789, 1870), ("Bavaria", 1789, 1870), ("Hamburg", 1789, 1867), ("Hanover", 1789, 1866),
+    ("Hesse-Darmstadt", 1789, 1870), ("Hesse-Kassel", 1789, 1866), ("Mecklenburg Schwerin", 1789, 1867),
+    ("Modena", 1789, 1859), ("Nassau", 1789, 1866), ("Oldenburg", 1789, 1870), ("Papal States", 1789, 1870),
+    ("Parma", 1789, 1859), ("Piedmont-Sardinia", 1789, 1861), ("Saxe-Weimar-Eisenach", 1789, 1867),
+    ("Saxony", 1789, 1870), ("Tuscany", 1789, 1859), ("Two Sicilies", 1789, 1860), ("Würtemberg", 1789, 1870),
+    ("German Democratic Republic", 1949, 1990), ("Republic of Vietnam", 1954, 1975),
+    ("South Yemen", 1967, 1990), ("Orange Free State", 1854, 1902),
+]
+
+# Países presentes desde 1789 (os demais começam em 1900 ou na independência)
+OLD_STATES = {
+    "Austria", "China", "Denmark", "France", "Iran", "Japan", "Netherlands", "Portugal", "Russia",
+    "Spain", "Sweden", "Switzerland", "Turkey", "United Kingdom", "United States of America",
+    "Haiti", "Morocco", "Oman", "Nepal", "Thailand", "Ethiopia", "Afghanistan", "Korea", "Norway",
+    "Egypt", "Hungary", "Poland", "Greece", "Belgium", "Germany", "Italy", "Brazil", "Argentina",
+    "Chile", "Colombia", "Mexico", "Peru", "Venezuela", "Bolivia", "Ecuador", "Paraguay", "Uruguay",
+    "Guatemala", "Honduras", "El Salvador", "Nicaragua", "Costa Rica", "Dominican Republic",
+}
+
+
+# ==========================
+# CATÁLOGO
+# ==========================
+def load_catalog(path=CATALOG_CSV) -> pd.DataFrame:
+    """
+    Lê o catálogo (id, titulo, variavel) consertando as linhas que vieram
+    inteiras entre aspas (títulos com vírgula).
+    """
+    cat = pd.read_csv(path, sep=",", low_memory=False, dtype=str)
+    broken = cat["variavel"].isna() & cat["id"].str.contains(",", na=False)
+    if broken.any():
+        fixed = [next(csv.reader(io.StringIO(s))) for s in cat.loc[broken, "id"]]
+        fixed = [row + [None] * (3 - len(row)) for row in fixed]
+        cat.loc[broken, ["id", "titulo", "variavel"]] = [row[:3] for row in fixed]
+    return cat[["id", "titulo", "variavel"]]
+
+
+_TAG = re.compile(r"\(([A-Z][A-Z\*,]*)\)\s*\([^()]*\)\s*$")
+
+
+def _kind(var: str, titulo: str, classe: str) -> str:
+    """Família da variável: id, index, expert, factual ou external."""
+    if classe == "1":
+        return "id"
+    m = _TAG.search(str(titulo or ""))
+    tag = m.group(1) if m else ""
+    if var.startswith("e_") or tag == "E":
+        return "external"
+    if tag == "D" or var.startswith(("v2x", "v3x")):
+        return "index"
+    if "C" in tag.split(","):
+        return "expert"
+    return "factual"
+
+
+def _stable_u(*parts) -> float:
+    """Uniforme [0, 1) determinística a partir de um texto (independe da ordem de geração)."""
+    return (zlib.crc32("|".join(map(str, parts)).encode()) % 10_000_000) / 10_000_000
+
+
+def build_specs(catalog: pd.DataFrame, variables=None) -> pd.DataFrame:
+    """Uma linha por variável a gerar, com família, grupo, cobertura e cargas nos fatores."""
+    v = catalog.dropna(subset=["variavel"]).copy()
+    v = v[v["id"].str.count(r"\.") >= 2].drop_duplicates("variavel")
+    if variables is not None:
+        v = v[v["variavel"].isin(set(variables))]
+    v["classe"] = v["id"].str.split(".").str[0]
+    v["grupo"] = v["id"].str.split(".").str[:2].str.join(".")
+    v["kind"] = [_kind(a, b, c) for a, b, c in zip(v["variavel"], v["titulo"], v["classe"])]
+
+    # cargas: variáveis do mesmo grupo compartilham a carga base (grupos correlacionados)
+    g_dem = np.array([_stable_u("dem", g) for g in v["grupo"]])
+    g_dev = np.array([_stable_u("dev", g) for g in v["grupo"]])
+    u_var = np.array([_stable_u("var", x) for x in v["variavel"]])
+    sign = np.where(np.array([_stable_u("sig", x) for x in v["variavel"]]) < 0.15, -1.0, 1.0)
+    v["load_dem"] = sign * (0.5 + g_dem) * (0.8 + 0.4 * u_var)
+    v["load_dev"] = (g_dev - 0.3) * 0.6
+    v["noise"] = 0.25 + 0.5 * np.array([_stable_u("noi", x) for x in v["variavel"]])
+
+    # cobertura por era
+    v["cov_start"] = [_coverage_start(x, k, u) for x, k, u in zip(v["variavel"], v["kind"], u_var)]
+    v["cov_end"] = np.where(v["variavel"].str.startswith("v3"), 1920, YEAR_END)
+    return v.reset_index(drop=True)
+
+
+_EXTERNAL_START = [
+    ("e_wbgi", 1996), ("e_wb_", 1960), ("e_ti_", 1995), ("e_fh_", 1972), ("e_total_", 1932),
+    ("e_radio", 1920), ("e_pt_coup", 1950), ("e_civil_war", 1946), ("e_uds", 1946), ("e_bnr", 1946),
+    ("e_chga", 1946), ("e_cow_", 1870), ("e_mi", 1800), ("e_pe", 1820), ("e_gdp", 1789),
+    ("e_polity", 1800), ("e_p_polity", 1800), ("e_lexical", 1789), ("e_vanhanen", 1810),
+    ("e_boix", 1800), ("e_regionpol", 1789), ("e_regiongeo", 1789), ("e_area", 1789),
+]
+
+
+def _coverage_start(var: str, kind: str, u: float) -> int:
+    if kind == "external":
+        for prefix, start in _EXTERNAL_START:
+            if var.startswith(prefix):
+                return start
+        return 1900
+    if kind == "index" or var.startswith("v3"):
+        return YEAR_START
+    if var.startswith("v2"):
+        # ~40% das variáveis contemporâneas também têm a série histórica (1789+)
+        return YEAR_START if u < 0.4 else 1900
+    return YEAR_START
+
+
+# ==========================
+# PAÍSES
+# ==========================
+def build_countries(n_countries: int = 200, seed: int = 2024) -> pd.DataFrame:
+    """Países com ano de início/fim e atributos constantes (colônia, fronteira, distância, ONU)."""
+    rng = np.random.default_rng([seed, 1])
+    names = list(CONTEMPORARY) + [h[0] for h in HISTORICAL]
+    names += [f"Synthland {i:03d}" for i in range(max(0, n_countries - len(names)))]
+    names = names[:n_countries]
+    hist = {h[0]: h[1:] for h in HISTORICAL}
+    n = len(names)
+
+    start = np.where(rng.random(n) < 0.55, 1900, rng.integers(1918, 1994, n))
+    start = np.where([c in OLD_STATES for c in names], YEAR_START, start)
+    end = np.full(n, YEAR_END)
+    for i, c in enumerate(names):
+        if c in hist:
+            start[i], end[i] = hist[c]
+
+    colonized = ((start >= 1900) & (rng.random(n) < 0.85)) | (rng.random(n) < 0.1)
+    board = rng.random(n) < 0.12
+    dist = np.round(rng.uniform(0.5, 16.0, n), 3)
+
+    # adesão à ONU: fundadores (1945), ondas de descolonização e pós-1990
+    founding = (start <= 1945) & (end >= 1945) & (rng.random(n) < 0.7)
+    later = np.maximum(start, 1946) + rng.geometric(0.12, n)
+    un_entry = np.where(founding, 1945, later).astype(float)
+    un_entry[(end < 1945) | (un_entry > YEAR_END)] = np.nan
+
+    return pd.DataFrame({
+        "country_name": names,
+        "country_id": np.arange(1, n + 1),
+        "country_text_id": [_text_id(c, i) for i, c in enumerate(names)],
+        "start": start, "end": end,
+        "colonized": colonized.astype(float), "board": board.astype(float), "dist": dist,
+        "un_entry_year": un_entry,
+    })
+
+
+def _text_id(name: str, i: int) -> str:
+    letters = re.sub(r"[^A-Za-z]", "", name).upper()
+    return (letters[:2] + chr(65 + i % 26)) if len(letters) >= 2 else f"X{i:02d}"
+
+
+# ==========================
+# FATORES LATENTES
+# ==========================
+def _sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+def latent_factors(countries: pd.DataFrame, years: np.ndarray, rng: np.random.Generator) -> dict:
+    """
+    Fatores país×ano (matrizes n_c × n_y): democracia (0–1), desenvolvimento
+    (z), guerra civil/internacional (0/1) e membro da ONU (0/1).
+    """
+    n_c, n_y = len(countries), len(years)
+    t = (years - YEAR_START) / (YEAR_END - YEAR_START)
+
+    # desenvolvimento: tendência com nível e ritmo próprios
+    dev = (rng.normal(0, 0.6, (n_c, 1)) + (2.5 + rng.normal(0, 0.6, (n_c, 1))) * t[None, :] ** 1.6
+           + np.cumsum(rng.normal(0, 0.03, (n_c, n_y)), axis=1))
+
+    # conflitos: cadeias de Markov (vetorizadas entre países, laço só nos anos)
+    civil = np.zeros((n_c, n_y), dtype=bool)
+    inter = np.zeros((n_c, n_y), dtype=bool)
+    p_on = 0.02 + 0.03 * rng.random((n_c, 1))
+    for j in range(1, n_y):
+        civil[:, j] = np.where(civil[:, j - 1], rng.random(n_c) < 0.75, rng.random(n_c) < p_on[:, 0])
+        world_war = years[j] in (1914, 1915, 1916, 1917, 1918, 1939, 1940, 1941, 1942, 1943, 1944, 1945)
+        inter[:, j] = np.where(inter[:, j - 1], rng.random(n_c) < 0.5,
+                               rng.random(n_c) < (0.25 if world_war else 0.01))
+
+    un_entry = countries["un_entry_year"].to_numpy()
+    un = (years[None, :] >= np.nan_to_num(un_entry, nan=np.inf)[:, None])
+
+    # democracia: ondas globais + passeio aleatório + choques (episódios) + efeitos
+    waves = (0.9 * _sigmoid((years - 1919) / 3) - 0.8 * _sigmoid((years - 1933) / 2)
+             + 0.9 * _sigmoid((years - 1946) / 3) + 1.1 * _sigmoid((years - 1990) / 2))
+    shocks = rng.normal(0, 0.6, (n_c, n_y)) * (rng.random((n_c, n_y)) < 0.015)
+    walk = np.cumsum(rng.normal(0, 0.06, (n_c, n_y)) + shocks, axis=1)
+    z = (rng.normal(-1.8, 0.8, (n_c, 1)) + rng.uniform(0.4, 1.2, (n_c, 1)) * waves[None, :] + walk
+         + 0.25 * dev + 0.4 * un - 0.5 * civil - 0.3 * inter)
+    dem = _sigmoid(z)
+
+    exists = (years[None, :] >= countries["start"].to_numpy()[:, None]) & \
+             (years[None, :] <= countries["end"].to_numpy()[:, None])
+    return {"dem": dem, "dev": dev, "civil": civil, "inter": inter, "un": un, "exists": exists}
+
+
+# ==========================
+# GERAÇÃO DE UM BLOCO DE PAÍSES
+# ==========================
+def _missing_rate(years: np.ndarray, kind: str) -> np.ndarray:
+    era = np.select([years < 1900, years < 1946], [1.0, 0.5], 0.15)
+    base = {"external": 0.25, "expert": 0.04, "factual": 0.08, "index": 0.03}.get(kind, 0.0)
+    return base * era
+
+
+def _cells(specs, kind, rows, yrs, F, rng):
+    """Valores latentes (linhas × variáveis) de uma família, com máscara de NaN por era/cobertura."""
+    sp = specs[specs["kind"] == kind]
+    if sp.empty:
+        return sp, None, None
+    dem = F["dem"][rows][:, None]
+    dev = F["dev"][rows][:, None]
+    x = ((dem - 0.5) * 4.0 * sp["load_dem"].to_numpy()[None, :]
+         + dev * sp["load_dev"].to_numpy()[None, :]
+         + rng.normal(0, 1, (len(yrs), len(sp))) * sp["noise"].to_numpy()[None, :])
+    yy = yrs[:, None]
+    nan = ((yy < sp["cov_start"].to_numpy()[None, :]) | (yy > sp["cov_end"].to_numpy()[None, :])
+           | (rng.random(x.shape) < _missing_rate(yrs, kind)[:, None]))
+    return sp, x, nan
+
+
+def _block(names, mat, suffix=""):
+    return pd.DataFrame(mat, columns=[f"{v}{suffix}" for v in names], copy=False)
+
+
+def generate_chunk(countries: pd.DataFrame, specs: pd.DataFrame, years: np.ndarray,
+                   rng: np.random.Generator, companions: bool = True, paper_columns: bool = True) -> pd.DataFrame:
+    """Gera todas as colunas para um bloco de países (linhas = país-ano existentes)."""
+    F = latent_factors(countries, years, rng)
+    ci, yi = np.nonzero(F["exists"])
+    rows = (ci, yi)
+    yrs = years[yi]
+    n = len(ci)
+    blocks = []
+
+    # ---- identificadores ----
+    ids = pd.DataFrame({
+        "country_name": countries["country_name"].to_numpy()[ci],
+        "country_text_id": countries["country_text_id"].to_numpy()[ci],
+        "country_id": countries["country_id"].to_numpy()[ci],
+        "year": yrs.astype("int64"),
+        "historical_date": [f"{y}-12-31" for y in yrs],
+        "histname": countries["country_name"].to_numpy()[ci],
+        "codingstart": countries["start"].to_numpy()[ci].astype(float),
+        "codingend": countries["end"].to_numpy()[ci].astype(float),
+        "COWcode": (countries["country_id"].to_numpy()[ci] * 5).astype(float),
+        "project": np.where(yrs < 1900, 1.0, 0.0),
+        "historical": np.where(yrs < 1900, 1.0, 0.0),
+    })
+    want_ids = set(specs.loc[specs["kind"] == "id", "variavel"]) | {"country_name", "country_text_id", "country_id", "year"}
+    blocks.append(ids[[c for c in ids.columns if c in want_ids]])
+
+    # ---- índices v2x_* (0–1) + intervalos ----
+    sp, x, nan = _cells(specs, "index", rows, yrs, F, rng)
+    if x is not None:
+        val = np.clip(F["dem"][rows][:, None] * (sp["load_dem"].to_numpy() > 0)
+                      + (1 - F["dem"][rows][:, None]) * (sp["load_dem"].to_numpy() <= 0)
+                      + 0.05 * x, 0.0, 1.0)
+        half = (0.02 + 0.08 * _sigmoid((1900 - yrs) / 40.0))[:, None] * (0.5 + rng.random(val.shape))
+        val[nan] = np.nan
+        blocks.append(_block(sp["variavel"], val))
+        if companions:
+            blocks.append(_block(sp["variavel"], np.clip(val - half, 0, 1), "_codelow"))
+            blocks.append(_block(sp["variavel"], np.clip(val + half, 0, 1), "_codehigh"))
+
+    # ---- indicadores de especialistas (escala latente) + companheiras ----
+    sp, x, nan = _cells(specs, "expert", rows, yrs, F, rng)
+    if x is not None:
+        val = np.clip(x, -5, 5)
+        val[nan] = np.nan
+        blocks.append(_block(sp["variavel"], val))
+        if companions:
+            sd = 0.25 + 0.6 * rng.random(val.shape) * (1 + (yrs < 1900)[:, None])
+            ordv = np.digitize(val, [-1.5, -0.5, 0.5, 1.5]).astype(float)
+            osp = np.clip((val + 3) / 6 * 4, 0, 4)
+            ospsd = sd * 0.6
+            nr = np.round(2 + 6 * rng.random(val.shape))
+            for arr in (ordv, nr):
+                arr[nan] = np.nan
+            blocks += [
+                _block(sp["variavel"], ordv, "_ord"),
+                _block(sp["variavel"], val - sd, "_codelow"),
+                _block(sp["variavel"], val + sd, "_codehigh"),
+                _block(sp["variavel"], sd + 0 * val, "_sd"),
+                _block(sp["variavel"], osp, "_osp"),
+                _block(sp["variavel"], np.clip(osp - ospsd, 0, 4), "_osp_codelow"),
+                _block(sp["variavel"], np.clip(osp + ospsd, 0, 4), "_osp_codehigh"),
+                _block(sp["variavel"], ospsd + 0 * val, "_osp_sd"),
+                _block(sp["variavel"], np.clip(osp + rng.normal(0, 0.2, val.shape), 0, 4), "_mean"),
+                _block(sp["variavel"], nr, "_nr"),
+            ]
+
+    # ---- variáveis factuais (ordinais 0–4) ----
+    sp, x, nan = _cells(specs, "factual", rows, yrs, F, rng)
+    if x is not None:
+        val = np.digitize(x, [-1.5, -0.5, 0.5, 1.5]).astype(float)
+        val[nan] = np.nan
+        blocks.append(_block(sp["variavel"], val))
+
+    # ---- fatores externos e_* ----
+    sp, x, nan = _cells(specs, "external", rows, yrs, F, rng)
+    if x is not None:
+        val = _external_values(sp["variavel"].tolist(), x, F, rows, yrs, countries, ci, rng)
+        val[nan] = np.nan
+        blocks.append(_block(sp["variavel"], val))
+
+    # ---- colunas do paper (adesão à ONU e instrumentos) ----
+    if paper_columns:
+        blocks.append(pd.DataFrame({
+            "un_member": F["un"][rows].astype(float),
+            "un_entry_year": countries["un_entry_year"].to_numpy()[ci],
+            "colonized": countries["colonized"].to_numpy()[ci],
+            "board": countries["board"].to_numpy()[ci],
+            "dist": countries["dist"].to_numpy()[ci],
+        }))
+
+    out = pd.concat(blocks, axis=1)
+    assert len(out) == n
+    return out
+
+
+def _external_values(names, x, F, rows, yrs, countries, ci, rng):
+    """Escalas plausíveis por nome para as variáveis externas (vetorizado por coluna)."""
+    dev = F["dev"][rows]
+    dem = F["dem"][rows]
+    pop0 = np.exp(rng.normal(1.5, 1.2, len(countries)))[ci]           # milhões (nível do país)
+    pop = pop0 * np.exp(0.012 * (yrs - YEAR_START))
+    gdppc = np.exp(0.8 * dev + 0.2) * (1 + 0.05 * rng.normal(size=len(yrs))).clip(0.5)
+    region = (countries["country_id"].to_numpy()[ci] % 10 + 1).astype(float)
+    out = np.empty_like(x)
+    for j, v in enumerate(names):
+        col = x[:, j]
+        if v == "e_gdppc":
+            out[:, j] = np.round(gdppc, 3)
+        elif v == "e_gdp":
+            out[:, j] = np.round(gdppc * pop, 3)
+        elif v in ("e_pop", "e_mipopula", "e_wb_pop"):
+            out[:, j] = np.round(pop * 1000, 1)
+        elif v == "e_peaveduc":
+            out[:, j] = np.clip(1.6 * dev + 4.0 * dem + 0.3 * col, 0, 15).round(2)
+        elif v == "e_civil_war":
+            out[:, j] = F["civil"][rows].astype(float)
+        elif v == "e_miinteco":
+            out[:, j] = F["inter"][rows].astype(float)
+        elif v == "e_miinterc":
+            out[:, j] = (F["civil"][rows] | (rng.random(len(yrs)) < 0.02)).astype(float)
+        elif v.startswith("e_region"):
+            out[:, j] = region
+        elif v == "e_area":
+            out[:, j] = np.round(np.exp(rng.normal(5, 1.5, len(countries)))[ci], 1)
+        elif v.startswith("e_pt_coup"):
+            out[:, j] = rng.poisson(0.05 + 0.2 * (1 - dem))
+        elif v in ("e_boix_regime", "e_bnr_dem", "e_chga_demo"):
+            out[:, j] = (dem + 0.05 * col > 0.5).astype(float)
+        elif v.startswith(("e_v2x", "e_lexical", "e_uds", "e_fh", "e_wbgi", "e_polity", "e_p_polity", "e_vanhanen", "e_ti_")):
+            out[:, j] = np.round(dem + 0.05 * col, 4)
+        else:
+            out[:, j] = np.round(np.exp(0.3 * dev + 0.2 * col), 4)
+    return out
+
+
+# ==========================
+# API
+# ==========================
+def column_order(specs: pd.DataFrame, companions: bool, paper_columns: bool) -> list[str]:
+    """Ordem de colunas do V-Dem: identificadores, e cada variável seguida das companheiras."""
+    cols = ["country_name", "country_text_id", "country_id", "year"]
+    cols += [v for v in specs.loc[specs["kind"] == "id", "variavel"] if v not in cols
+             and v in ("historical_date", "histname", "codingstart", "codingend", "COWcode", "project", "historical")]
+    for v, k in zip(specs["variavel"], specs["kind"]):
+        if k == "id":
+            continue
+        cols.append(v)
+        if companions and k == "index":
+            cols += [v + s for s in INDEX_COMPANIONS]
+        elif companions and k == "expert":
+            cols += [v + s for s in EXPERT_COMPANIONS]
+    if paper_columns:
+        cols += ["un_member", "un_entry_year", "colonized", "board", "dist"]
+    return cols
+
+
+def generate_frame(n_countries: int = 12, year_start: int = YEAR_START, year_end: int = YEAR_END,
+                   variables=None, companions: bool = False, paper_columns: bool = True,
+                   seed: int = 2024, catalog_path=CATALOG_CSV) -> pd.DataFrame:
+    """Painel sintético em memória (para bases pequenas; para a escala completa use generate())."""
+    specs = build_specs(load_catalog(catalog_path), variables)
+    countries = build_countries(n_countries, seed)
+    years = np.arange(year_start, year_end + 1)
+    rng = np.random.default_rng([seed, 2, 0])
+    df = generate_chunk(countries, specs, years, rng, companions, paper_columns)
+    return df[[c for c in column_order(specs, companions, paper_columns) if c in df.columns]]
+
+
+def generate(out_dir, n_countries: int = 200, year_start: int = YEAR_START, year_end: int = YEAR_END,
+             variables=None, companions: bool = True, paper_columns: bool = True, seed: int = 2024,
+             chunk_countries: int = 20, write_csv: bool = True, catalog_path=CATALOG_CSV) -> dict:
+    """
+    Escreve a base sintética em `out_dir` por blocos de países (memória limitada):
+    vdem_all.parquet (um row group por bloco), UNdem-All.csv, indicadores_vdem.csv
+    (catálogo só com as variáveis geradas) e indicadoresVDEM.csv (cópia, usada pelo vdem_app).
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    catalog = load_catalog(catalog_path)
+    specs = build_specs(catalog, variables)
+    countries = build_countries(n_countries, seed)
+    years = np.arange(year_start, year_end + 1)
+    order = None
+    writer, schema = None, None
+    n_rows = 0
+    csv_path = out_dir / "UNdem-All.csv"
+    try:
+        for k, lo in enumerate(range(0, len(countries), chunk_countries)):
+            rng = np.random.default_rng([seed, 2, k])
+            chunk = generate_chunk(countries.iloc[lo:lo + chunk_countries].reset_index(drop=True),
+                                   specs, years, rng, companions, paper_columns)
+            if order is None:
+                order = [c for c in column_order(specs, companions, paper_columns) if c in chunk.columns]
+            chunk = chunk[order]
+            table = pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+            if writer is None:
+                schema = table.schema
+                writer = pq.ParquetWriter(out_dir / "vdem_all.parquet", schema, compression="snappy")
+            writer.write_table(table)
+            if write_csv:
+                chunk.to_csv(csv_path, mode="w" if k == 0 else "a", header=(k == 0), index=False,
+                             float_format="%.6g")
+            n_rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    generated = set(order or [])
+    is_var = catalog["id"].astype(str).str.count(r"\.") >= 2
+    catalog[~is_var | catalog["variavel"].isin(generated)].to_csv(out_dir / "indicadores_vdem.csv", index=False)
+    if (REPO_ROOT / "indicadoresVDEM.csv").exists():
+        shutil.copy(REPO_ROOT / "indicadoresVDEM.csv", out_dir / "indicadoresVDEM.csv")
+    return {"out_dir": out_dir, "rows": n_rows, "columns": len(order or []),
+            "countries": len(countries), "years": len(years)}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Gera uma base sintética no formato do V-Dem.")
+    ap.add_argument("out_dir")
+    ap.add_argument("--countries", type=int, default=200)
+    ap.add_argument("--year-start", type=int, default=YEAR_START)
+    ap.add_argument("--year-end", type=int, default=YEAR_END)
+    ap.add_argument("--seed", type=int, default=2024)
+    ap.add_argument("--no-companions", action="store_true", help="Sem _sd/_codelow/_codehigh/_ord/...")
+    ap.add_argument("--no-csv", action="store_true", help="Só Parquet (o CSV completo passa de 1 GB).")
+    args = ap.parse_args(argv)
+    info = generate(args.out_dir, n_countries=args.countries, year_start=args.year_start,
+                    year_end=args.year_end, companions=not args.no_companions, seed=args.seed,
+                    write_csv=not args.no_csv)
+    print(f"{info['rows']:_} linhas × {info['columns']:_} colunas".replace("_", ".")
+          + f" ({info['countries']} países, {info['years']} anos) em {info['out_dir']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Controle sintético para estudos de caso de entrada na ONU.
+
+Tratado: um país e o seu un_entry_year (T0). Doadores: países que não são
+membros em nenhum ano da janela [T0 − pre, T0 + pos] e têm o desfecho em todos
+os anos dela em que o tratado é observado. Os pesos resolvem
+
+    min ‖y₁,pré − Y₀,pré·w‖²   s.a.  w ≥ 0,  Σw = 1
+
+por gradiente projetado acelerado (FISTA) com projeção no simplex, vetorizado
+em lote: o tratado e todos os placebos (cada doador no papel de tratado, com os
+demais como doadores) são linhas da mesma matriz de pesos. Com mais de um lote
+de placebos, os lotes são divididos entre processos (o pool "spawn" de longa
+duração do app, ver vdem_stats.pool_processos).
+
+    res = controle_sintetico(df, "Brazil", 1945, pre=20, pos=15)
+    res["serie"]     # year, real, sintetico
+    res["pesos"]     # país, peso
+    res["placebos"]  # year, country_name, gap  (inferência por permutação)
+"""
+from __future__ import annotations
+
+import os
+
+import numpy as np
+import pandas as pd
+
+import vdem_stats
+
+PLACEBO_CHUNK = 32  # placebos por tarefa do pool
+
+
+# ==========================
+# OTIMIZAÇÃO (lote de problemas no simplex)
+# ==========================
+def projetar_simplex(V: np.ndarray, permitido: np.ndarray) -> np.ndarray:
+    """Projeção euclidiana de cada linha de V no simplex, só nas colunas permitidas."""
+    B, J = V.shape
+    Vm = np.where(permitido, V, -np.inf)
+    U = -np.sort(-Vm, axis=1)
+    finito = np.isfinite(U)
+    css = np.cumsum(np.where(finito, U, 0.0), axis=1)
+    k = np.arange(1, J + 1)
+    cond = finito & (U - (css - 1.0) / k > 0)
+    rho = J - 1 - np.argmax(cond[:, ::-1], axis=1)
+    theta = (css[np.arange(B), rho] - 1.0) / (rho + 1)
+    return np.where(permitido, np.maximum(V - theta[:, None], 0.0), 0.0)
+
+
+def resolver_pesos(M: np.ndarray, alvos: np.ndarray, permitido: np.ndarray,
+                   iters: int = 3000, tol: float = 1e-9) -> np.ndarray:
+    """
+    FISTA para min ½‖M·w − alvo‖² no simplex, para todos os alvos de uma vez.
+    M: (T, J) doadores; alvos: (P, T); permitido: (P, J). Devolve W (P, J).
+    """
+    MtM = M.T @ M
+    L = max(np.linalg.eigvalsh(MtM)[-1], 1e-12)
+    Mtb = alvos @ M  # (P, J)
+    n_ok = permitido.sum(1, keepdims=True).clip(1)
+    W = np.where(permitido, 1.0 / n_ok, 0.0)
+    Z, t = W.copy(), 1.0
+    ativo = np.arange(len(W))  # linhas que ainda não convergiram
+    for _ in range(iters):
+        Za, Wa = Z[ativo], W[ativo]
+        grad = Za @ MtM - Mtb[ativo]
+        W_novo = projetar_simplex(Za - grad / L, permitido[ativo])
+        t_novo = (1 + np.sqrt(1 + 4 * t * t)) / 2
+        Z[ativo] = W_novo + ((t - 1) / t_novo) * (W_novo - Wa)
+        W[ativo] = W_novo
+        t = t_novo
+        ativo = ativo[np.max(np.abs(W_novo - Wa), axis=1) >= tol]
+        if not ativo.size:
+            break
+    return W
+
+
+def _resolver_lote(args):
+    M, alvos, permitido = args
+    return resolver_pesos(M, alvos, permitido)
+
+
+# ==========================
+# PAINEL
+# ==========================
+def _painel(df, desfecho, anos):
+    """Matriz (anos × países) do desfecho e de un_member na janela."""
+    sub_ok = df["year"].between(anos[0], anos[-1]).to_numpy()
+    paises, cod = np.unique(df.loc[sub_ok, "country_name"].astype(str).to_numpy(), return_inverse=True)
+    yi = pd.to_numeric(df.loc[sub_ok, "year"]).to_numpy(dtype=int) - anos[0]
+    Y = np.full((len(anos), len(paises)), np.nan)
+    U = np.full((len(anos), len(paises)), np.nan)
+    Y[yi, cod] = pd.to_numeric(df.loc[sub_ok, desfecho], errors="coerce").to_numpy(dtype=float)
+    U[yi, cod] = pd.to_numeric(df.loc[sub_ok, "un_member"], errors="coerce").to_numpy(dtype=float)
+    return paises, Y, U
+
+
+def controle_sintetico(df: pd.DataFrame, pais: str, t0: int, pre: int = 20, pos: int = 15,
+                       desfecho: str = "v2x_libdem", placebos: bool = True,
+                       workers: int | None = None, pool=None) -> dict:
+    """
+    Série real × sintética do país, pesos dos doadores e (opcional) os placebos.
+    `pool`: executor reaproveitado entre chamadas; sem ele, um pool "spawn" temporário.
+    """
+    t0 = int(t0)
+    anos = np.arange(t0 - pre, t0 + pos + 1)
+    paises, Y, U = _painel(df, desfecho, anos)
+    if pais not in paises:
+        raise ValueError(f"{pais} não tem dados entre {anos[0]} e {anos[-1]}.")
+    i = int(np.searchsorted(paises, pais))
+    # anos com o tratado observado; os doadores precisam estar completos neles
+    obs = ~np.isnan(Y[:, i])
+    if (obs & (anos < t0)).sum() < 3 or not (obs & (anos >= t0)).any():
+        raise ValueError(f"{pais} tem poucos anos com {desfecho} entre {anos[0]} e {anos[-1]}.")
+    anos, Y, U = anos[obs], Y[obs], U[obs]
+
+    doador = ~np.isnan(Y).any(0) & (np.nan_to_num(U, nan=0.0) == 0).all(0)
+    doador[i] = False
+    if doador.sum() < 2:
+        raise ValueError("Menos de 2 países fora da ONU com dados completos na janela: amplie ou mude o período.")
+    nomes = paises[doador]
+    Y0 = Y[:, doador]
+    pre_m = anos < t0
+    M = Y0[pre_m]
+
+    # linha 0: o tratado; linhas 1..J: cada doador como placebo
+    J = Y0.shape[1]
+    alvos = np.vstack([Y[pre_m, i][None, :]] + ([M.T] if placebos else []))
+    permitido = np.ones((len(alvos), J), dtype=bool)
+    if placebos:
+        permitido[1:] = ~np.eye(J, dtype=bool)
+
+    lotes = [slice(a, min(a + PLACEBO_CHUNK, len(alvos))) for a in range(0, len(alvos), PLACEBO_CHUNK)]
+    workers = min(workers or os.cpu_count() or 1, len(lotes))
+    tarefas = [(M, alvos[s], permitido[s]) for s in lotes]
+    if workers <= 1:
+        W = np.vstack([_resolver_lote(t) for t in tarefas])
+    elif pool is not None:
+        W = np.vstack(list(pool.map(_resolver_lote, tarefas)))
+    else:
+        with vdem_stats.pool_processos(workers) as temp:
+            W = np.vstack(list(temp.map(_resolver_lote, tarefas)))
+
+    sint = W @ Y0.T                        # (P, anos)
+    real = np.vstack([Y[:, i][None, :]] + ([Y0.T] if placebos else []))
+    gap = real - sint
+    rmspe_pre = np.sqrt((gap[:, pre_m] ** 2).mean(1))
+    rmspe_pos = np.sqrt((gap[:, ~pre_m] ** 2).mean(1))
+    razao = rmspe_pos / np.clip(rmspe_pre, 1e-12, None)
+
+    out = {
+        "serie": pd.DataFrame({"year": anos, "real": real[0], "sintetico": sint[0]}),
+        "pesos": (pd.DataFrame({"country_name": nomes, "peso": W[0]})
+                  .query("peso > 1e-4").sort_values("peso", ascending=False).reset_index(drop=True)),
+        "rmspe_pre": float(rmspe_pre[0]),
+        "rmspe_pos": float(rmspe_pos[0]),
+        "n_doadores": int(J),
+    }
+    if placebos:
+        out["placebos"] = pd.DataFrame({
+            "year": np.tile(anos, J),
+            "country_name": np.repeat(nomes, len(anos)),
+            "gap": gap[1:].ravel(),
+            "rmspe_pre": np.repeat(rmspe_pre[1:], len(anos)),
+        })
+        # p-valor por permutação: posição da razão RMSPE pós/pré do tratado entre todas
+        out["p_valor"] = float((razao >= razao[0]).mean())
+    return out
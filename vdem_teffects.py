@@ -0,0 +1,296 @@
+"""
+Efeitos de tratamento endógeno da adesão à ONU (Tabela 3 do paper), recalculados
+a partir do painel carregado.
+
+Primeira etapa: probit de un_member nos instrumentos (colonized, board, dist) e
+nos conflitos defasados. Segunda etapa (função de controle, em duas etapas):
+
+- "potenciais" — uma equação de democracia por grupo, (0) controle e (1) tratado,
+  cada uma com o resíduo generalizado do probit; ATE = média de X(β1 − β0) e
+  ATET soma a diferença de correlação com o erro entre os tratados.
+- "comum"      — uma equação só com δ·UN e o resíduo generalizado (à la etregress);
+  ATE = ATET = δ.
+
+Erros-padrão por bootstrap de países (cluster): cada réplica é um vetor de pesos
+por país, aplicado como pesos de linha no probit e nos MQO ponderados; as
+réplicas rodam em blocos num pool de processos (vdem_stats.bootstrap_paralelo).
+
+    res = estimar(df, ESPEC_PAPER, n_boot=200)
+    res["tabela"]   # termo, equação, e uma coluna de estimativa/ep/estrelas por modelo
+"""
+from __future__ import annotations
+
+import warnings
+
+import numpy as np
+import pandas as pd
+
+import vdem_cube
+import vdem_stats
+
+ESPEC_PAPER = {
+    "desfecho": "v2x_libdem",
+    "tratamento": "un_member",
+    # todas defasadas em t−1; reg_dem = média regional (sem o próprio país)
+    "covariaveis": ["e_gdppc", "e_peaveduc", "e_miinteco", "e_civil_war", "reg_dem", "un_member"],
+    "instrumentos": ["colonized", "board", "dist"],
+    "selecao_defasadas": ["e_miinteco", "e_civil_war"],
+    "regiao": "e_regionpol_6C",
+    "anos": (1820, 2000),
+}
+
+ROTULOS = {
+    "e_gdppc": "Renda per capita (gdppc)",
+    "e_peaveduc": "Anos de educação (educ)",
+    "e_miinteco": "Guerra interestadual (war)",
+    "e_civil_war": "Guerra civil (civil_war)",
+    "reg_dem": "Spillover Democracia (reg_dem)",
+    "un_member": "Membro da ONU (UN)",
+    "colonized": "Histórico colonial (colonized)",
+    "board": "Fronteira c/ membro do CS (board)",
+    "dist": "Distância até a ONU (dist)",
+    "const": "Constante",
+}
+
+MODELOS = {"potenciais": "Potenciais resultados (1)", "comum": "Tratamento endógeno (2)"}
+
+
+def colunas_necessarias(espec: dict) -> list[str]:
+    cols = {"country_name", "year", espec["desfecho"], espec["tratamento"], espec["regiao"]}
+    cols |= set(espec["covariaveis"]) | set(espec["instrumentos"]) | set(espec["selecao_defasadas"])
+    return sorted(cols - {"reg_dem"})
+
+
+# ==========================
+# NORMAL PADRÃO (sem scipy)
+# ==========================
+def _erfc(x):
+    """erfc com erro relativo < 1,2e-7 em toda a reta (Numerical Recipes, erfcc)."""
+    z = np.abs(x)
+    t = 1.0 / (1.0 + 0.5 * z)
+    p = -1.26551223 + t * (1.00002368 + t * (0.37409196 + t * (0.09678418 + t * (-0.18628806 + t * (
+        0.27886807 + t * (-1.13520398 + t * (1.48851587 + t * (-0.82215223 + t * 0.17087277))))))))
+    r = t * np.exp(-z * z + p)
+    return np.where(x >= 0, r, 2.0 - r)
+
+
+def norm_cdf(x):
+    return 0.5 * _erfc(-np.asarray(x, dtype=float) / np.sqrt(2.0))
+
+
+def norm_pdf(x):
+    return np.exp(-0.5 * np.asarray(x, dtype=float) ** 2) / np.sqrt(2.0 * np.pi)
+
+
+# ==========================
+# ESTIMADORES BÁSICOS
+# ==========================
+def probit(d, Z, w=None, iters: int = 50, tol: float = 1e-9) -> np.ndarray:
+    """Probit por Newton-Raphson (hessiana analítica), com pesos de linha opcionais."""
+    w = np.ones(len(d)) if w is None else w
+    q = 2.0 * d - 1.0
+    g = np.zeros(Z.shape[1])
+    for _ in range(iters):
+        xb = Z @ g
+        lam = q * norm_pdf(q * xb) / np.clip(norm_cdf(q * xb), 1e-300, None)
+        grad = Z.T @ (w * lam)
+        H = (Z * (w * lam * (lam + xb))[:, None]).T @ Z
+        passo = np.linalg.solve(H, grad)
+        g = g + passo
+        if np.max(np.abs(passo)) < tol:
+            break
+    return g
+
+
+def mqo(y, X, w=None) -> np.ndarray:
+    """
+    MQO (ponderado se w for dado) pelas equações normais. Colunas sem variação
+    na amostra (além da constante, a 1ª) saem do ajuste e voltam como NaN.
+    """
+    w = np.ones(len(y)) if w is None else w
+    m = np.average(X, axis=0, weights=w)
+    var = np.average((X - m) ** 2, axis=0, weights=w)
+    usa = var > 1e-12
+    usa[0] = True
+    Xu = X[:, usa]
+    Xw = Xu * w[:, None]
+    b = np.full(X.shape[1], np.nan)
+    b[usa] = np.linalg.solve(Xw.T @ Xu, Xw.T @ y)
+    return b
+
+
+def residuo_generalizado(d, xb):
+    """E[u | D, Z]: φ/Φ para tratados, −φ/(1−Φ) para controles."""
+    phi = norm_pdf(xb)
+    return np.where(d == 1, phi / np.clip(norm_cdf(xb), 1e-300, None),
+                    -phi / np.clip(norm_cdf(-xb), 1e-300, None))
+
+
+# ==========================
+# PAINEL
+# ==========================
+def _defasar(cod, anos, v):
+    """v em t−1 do mesmo país (NaN se o ano anterior não estiver na base)."""
+    ordem = np.lexsort((anos, cod))
+    out = np.full(len(v), np.nan)
+    c, a, x = cod[ordem], anos[ordem], v[ordem]
+    ok = np.r_[False, (c[1:] == c[:-1]) & (a[1:] == a[:-1] + 1)]
+    lag = np.r_[np.nan, x[:-1]]
+    out[ordem] = np.where(ok, lag, np.nan)
+    return out
+
+
+def montar_painel(df: pd.DataFrame, espec: dict) -> dict:
+    """Arrays prontos para estimar: y, d, X (outcome), Z (seleção), cod (país), nomes."""
+    num = lambda c: pd.to_numeric(df[c], errors="coerce").to_numpy(dtype=float)  # noqa: E731
+    _, cod = np.unique(df["country_name"].astype(str).to_numpy(), return_inverse=True)
+    anos = num("year")
+    y, d = num(espec["desfecho"]), num(espec["tratamento"])
+
+    base = {c: num(c) for c in set(espec["covariaveis"]) | set(espec["selecao_defasadas"]) if c != "reg_dem"}
+    if "reg_dem" in espec["covariaveis"]:
+        # média regional deixa-um-fora do desfecho (só nos país-anos com o desfecho observado)
+        loo = vdem_cube.spillover_regional(df, espec["regiao"], [espec["desfecho"]]).iloc[:, 0].to_numpy()
+        base["reg_dem"] = np.where(np.isnan(y), np.nan, loo)
+    lags = {c: _defasar(cod, anos, v) for c, v in base.items()}
+
+    nomes_x = ["const"] + list(espec["covariaveis"])
+    nomes_z = ["const"] + list(espec["instrumentos"]) + list(espec["selecao_defasadas"])
+    X = np.column_stack([np.ones(len(y))] + [lags[c] for c in espec["covariaveis"]])
+    Z = np.column_stack([np.ones(len(y))] + [num(c) for c in espec["instrumentos"]]
+                        + [lags[c] for c in espec["selecao_defasadas"]])
+
+    ok = ~(np.isnan(y) | np.isnan(d) | np.isnan(X).any(1) | np.isnan(Z).any(1))
+    if espec.get("anos"):
+        ok &= (anos >= espec["anos"][0]) & (anos <= espec["anos"][1])
+    _, cod_ok = np.unique(cod[ok], return_inverse=True)
+    return {"y": y[ok], "d": (d[ok] > 0).astype(float), "X": X[ok], "Z": Z[ok],
+            "cod": cod_ok, "nomes_x": nomes_x, "nomes_z": nomes_z, "tratamento": espec["tratamento"]}
+
+
+# ==========================
+# ESTIMAÇÃO
+# ==========================
+def _ajustar(p: dict, w=None) -> np.ndarray:
+    """
+    Vetor de estimativas:
+    [ATE, ATET] potenciais, [ATE, ATET] comum, β(0), β(1), β comum, γ (probit).
+    """
+    y, d, X, Z = p["y"], p["d"], p["X"], p["Z"]
+    w = np.ones(len(y)) if w is None else w
+    g = probit(d, Z, w)
+    xb = Z @ g
+    gr = residuo_generalizado(d, xb)
+
+    # potenciais resultados: uma equação por grupo, cada uma com o resíduo generalizado
+    XG = np.column_stack([X, gr])
+    t, c = d == 1, d == 0
+    b1 = mqo(y[t], XG[t], w[t])
+    b0 = mqo(y[c], XG[c], w[c])
+    k = X.shape[1]
+    # coeficiente não identificado num grupo (coluna constante nele) conta como 0 na previsão
+    dif = X @ np.nan_to_num(b1[:k] - b0[:k])
+    ate_p = np.average(dif, weights=w)
+    lam1 = norm_pdf(xb[t]) / np.clip(norm_cdf(xb[t]), 1e-300, None)
+    atet_p = np.average(dif[t] + np.nan_to_num(b1[k] - b0[k]) * lam1, weights=w[t])
+
+    # equação comum com δ·D (etregress em duas etapas); a defasagem do próprio
+    # tratamento sai daqui, senão δ só seria identificado pelos anos de entrada
+    fica = np.array([n != p["tratamento"] for n in p["nomes_x"]])
+    bf = mqo(y, np.column_stack([X[:, fica], d, gr]), w)
+    bc = np.full(k, np.nan)
+    bc[fica] = bf[:fica.sum()]
+    delta = bf[fica.sum()]
+    return np.concatenate([[ate_p, atet_p, delta, delta], b0[:k], b1[:k], bc, g])
+
+
+def _boot_ajustes(dados, n, seed):
+    """n réplicas do bootstrap por país: pesos multinomiais → _ajustar ponderado."""
+    p = dados
+    rng = np.random.default_rng(seed)
+    n_c = int(p["cod"].max()) + 1
+    saida = []
+    for _ in range(n):
+        wc = rng.multinomial(n_c, np.full(n_c, 1.0 / n_c)).astype(float)
+        w = wc[p["cod"]]
+        try:
+            saida.append(_ajustar(p, w))
+        except np.linalg.LinAlgError:
+            continue
+    k = len(p["nomes_x"]) * 3 + len(p["nomes_z"]) + 4
+    return np.array(saida).reshape(-1, k)
+
+
+def estimar(df: pd.DataFrame, espec: dict = ESPEC_PAPER, n_boot: int = 200,
+            seed: int = 2024, workers: int | None = None, pool=None) -> dict:
+    """
+    Estima os dois modelos. Devolve {"tabela", "n_obs", "n_paises", "n_boot"};
+    a tabela tem termo, equacao ("", "(0)", "(1)" ou "seleção") e, por modelo,
+    colunas <modelo>, <modelo>_ep e <modelo>_sig.
+    """
+    p = montar_painel(df, espec)
+    if len(p["y"]) < 50 or p["d"].min() == p["d"].max():
+        raise ValueError("Observações insuficientes (ou sem variação no tratamento) para estimar.")
+    est = _ajustar(p)
+    boot = vdem_stats.bootstrap_paralelo(_boot_ajustes, p, n_boot, seed, workers, pool) if n_boot else None
+    ep = np.full(len(est), np.nan)
+    if boot is not None and len(boot) > 1:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)  # coeficientes não identificados → NaN
+            ep = np.nanstd(boot, axis=0, ddof=1)
+
+    kx, kz = len(p["nomes_x"]), len(p["nomes_z"])
+    i_b0, i_b1, i_bc, i_g = 4, 4 + kx, 4 + 2 * kx, 4 + 3 * kx
+    linhas = [("ATE", "", 0, 2), ("ATET", "", 1, 3)]
+    for j, nome in enumerate(p["nomes_x"]):
+        if nome == "const":
+            continue
+        linhas.append((nome, "(0)", i_b0 + j, None))
+        linhas.append((nome, "(1)", i_b1 + j, i_bc + j))
+    for j, nome in enumerate(p["nomes_z"]):
+        if nome != "const":
+            linhas.append((nome, "seleção", i_g + j, i_g + j))
+
+    reg = []
+    for termo, eq, ip, ic in linhas:
+        r = {"termo": termo, "equacao": eq}
+        for m, i in (("potenciais", ip), ("comum", ic)):
+            if i is None or np.isnan(est[i]):
+                r[m] = r[f"{m}_ep"] = np.nan
+                r[f"{m}_sig"] = ""
+            else:
+                r[m], r[f"{m}_ep"] = est[i], ep[i]
+                r[f"{m}_sig"] = vdem_stats.estrelas(est[i] / ep[i]) if ep[i] > 0 else ""
+        reg.append(r)
+    return {
+        "tabela": pd.DataFrame(reg),
+        "n_obs": int(len(p["y"])),
+        "n_paises": int(p["cod"].max()) + 1,
+        "n_boot": 0 if boot is None else int(len(boot)),
+    }
+
+
+def efeito_pontual(df: pd.DataFrame, espec: dict) -> dict:
+    """
+    Só o δ do modelo "comum" (sem bootstrap), com erro-padrão robusto por país
+    (sanduíche com correção G/(G−1)) da segunda etapa. Usado na curva de
+    especificações, onde o bootstrap de centenas de modelos seria caro demais.
+    """
+    p = montar_painel(df, espec)
+    if len(p["y"]) < 50 or p["d"].min() == p["d"].max():
+        return {"efeito": np.nan, "ep": np.nan, "n_obs": int(len(p["y"])), "n_paises": 0}
+    g = probit(p["d"], p["Z"])
+    gr = residuo_generalizado(p["d"], p["Z"] @ g)
+    fica = np.array([n != p["tratamento"] for n in p["nomes_x"]])
+    X = np.column_stack([p["X"][:, fica], p["d"], gr])
+    mantem = np.r_[True, X[:, 1:].std(0) > 1e-12]
+    i = int(mantem[:-2].sum())  # posição de δ depois de tirar as colunas constantes (gr pode sair)
+    X = X[:, mantem]
+    XtX_inv = np.linalg.inv(X.T @ X)
+    b = XtX_inv @ X.T @ p["y"]
+    u = p["y"] - X @ b
+    G = int(p["cod"].max()) + 1
+    scores = np.zeros((G, X.shape[1]))
+    np.add.at(scores, p["cod"], X * u[:, None])
+    V = XtX_inv @ (scores.T @ scores) @ XtX_inv * G / max(G - 1, 1)
+    return {"efeito": float(b[i]), "ep": float(np.sqrt(V[i, i])), "n_obs": int(len(p["y"])), "n_paises": G}
@@ -0,0 +1,228 @@
+"""
+Trajetórias país × ano de uma variável: busca de países com história parecida.
+
+A base vira uma matriz densa país × ano (NaN onde falta). Contra um país de
+referência, todos os ~200 países são comparados de uma vez:
+
+- euclidiana: raiz da média dos quadrados das diferenças nos anos que os dois
+  têm (exige um mínimo de anos em comum);
+- DTW com banda de Sakoe-Chiba: a recorrência roda célula a célula da banda,
+  mas cada passo é vetorizado sobre todos os países candidatos.
+
+    sim = similares(df, "Brazil", "v2x_libdem", (1900, 2020), k=8, metodo="dtw", banda=5)
+
+Agrupamento de trajetórias (página de clusters): séries interpoladas e
+(opcionalmente) padronizadas por país, k-means (k-means++) ou hierárquico de
+Ward, e o medoide de cada grupo como trajetória representativa.
+
+    paises, anos, X = features_agrupamento(df, "v2x_libdem", (1900, 2020))
+    res = agrupar(X, k=5, metodo="kmeans")   # rotulos, medoides
+"""
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+METODOS = ("euclidiana", "dtw")
+AGRUPAMENTOS = ("kmeans", "hierarquico")
+
+
+def matriz_trajetorias(df: pd.DataFrame, variavel: str, year_range=None):
+    """(paises, anos, Y) com Y país × ano (NaN onde não há dado)."""
+    anos_all = pd.to_numeric(df["year"], errors="coerce").to_numpy()
+    ok = ~np.isnan(anos_all)
+    if year_range is not None:
+        ok &= (anos_all >= year_range[0]) & (anos_all <= year_range[1])
+    paises, ci = np.unique(df.loc[ok, "country_name"].astype(str).to_numpy(), return_inverse=True)
+    a0, a1 = int(anos_all[ok].min()), int(anos_all[ok].max())
+    anos = np.arange(a0, a1 + 1)
+    Y = np.full((len(paises), len(anos)), np.nan)
+    Y[ci, anos_all[ok].astype(int) - a0] = pd.to_numeric(df.loc[ok, variavel], errors="coerce").to_numpy(dtype=float)
+    return paises, anos, Y
+
+
+def distancia_euclidiana(Y: np.ndarray, q: np.ndarray, min_comum: int) -> tuple[np.ndarray, np.ndarray]:
+    """RMS das diferenças nos anos em comum com q, para todas as linhas de Y; NaN se poucos anos."""
+    comum = ~np.isnan(Y) & ~np.isnan(q)
+    n = comum.sum(1)
+    d2 = np.where(comum, (Y - q) ** 2, 0.0).sum(1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        dist = np.sqrt(d2 / n)
+    dist[n < min_comum] = np.nan
+    return dist, n
+
+
+def _preencher(Y: np.ndarray) -> np.ndarray:
+    """Interpola lacunas internas de cada linha e estende as pontas com o valor mais próximo."""
+    n, T = Y.shape
+    t = np.arange(T)
+    ok = ~np.isnan(Y)
+    # índice do último/próximo ano observado (acumulados vetorizados)
+    ant = np.maximum.accumulate(np.where(ok, t, -1), axis=1)
+    prox = np.minimum.accumulate(np.where(ok, t, T)[:, ::-1], axis=1)[:, ::-1]
+    linhas = np.arange(n)[:, None]
+    ant_c, prox_c = np.clip(ant, 0, T - 1), np.clip(prox, 0, T - 1)
+    v_ant, v_prox = Y[linhas, ant_c], Y[linhas, prox_c]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        w = np.where(prox > ant, (t - ant) / (prox - ant), 0.0)
+    meio = v_ant + w * (v_prox - v_ant)
+    out = np.where(ant < 0, v_prox, np.where(prox >= T, v_ant, meio))
+    return np.where(ok, Y, out)
+
+
+def dtw_banda(C: np.ndarray, q: np.ndarray, banda: int) -> np.ndarray:
+    """DTW (custo quadrático, banda |i − j| ≤ banda) de q contra cada linha de C, vetorizado nas linhas."""
+    n, T = C.shape
+    banda = max(int(banda), 0)
+    R_ant = np.full((n, T + 1), np.inf)
+    R_ant[:, 0] = 0.0
+    for i in range(1, T + 1):
+        R = np.full((n, T + 1), np.inf)
+        j0, j1 = max(1, i - banda), min(T, i + banda)
+        for j in range(j0, j1 + 1):
+            custo = (C[:, j - 1] - q[i - 1]) ** 2
+            R[:, j] = custo + np.minimum(np.minimum(R_ant[:, j - 1], R_ant[:, j]), R[:, j - 1])
+        R_ant = R
+    return np.sqrt(R_ant[:, T] / T)
+
+
+def similares(df: pd.DataFrame, pais: str, variavel: str, year_range=None, k: int = 8,
+              metodo: str = "euclidiana", banda: int = 5, min_cobertura: float = 0.5) -> pd.DataFrame:
+    """
+    Os k países mais próximos de `pais`: country_name, distancia, anos_comuns.
+    min_cobertura: fração mínima dos anos observados do país de referência que o
+    candidato precisa ter.
+    """
+    if metodo not in METODOS:
+        raise ValueError(f"método desconhecido: {metodo}")
+    paises, anos, Y = matriz_trajetorias(df, variavel, year_range)
+    if pais not in paises:
+        raise ValueError(f"{pais} não tem dados de {variavel} no período.")
+    i = int(np.searchsorted(paises, pais))
+    q = Y[i]
+    obs = np.flatnonzero(~np.isnan(q))
+    if len(obs) < 3:
+        raise ValueError(f"{pais} tem menos de 3 anos com {variavel} no período.")
+    min_comum = max(3, int(np.ceil(min_cobertura * len(obs))))
+
+    dist, n = distancia_euclidiana(Y, q, min_comum)
+    if metodo == "dtw":
+        # trecho observado do país de referência; candidatos com cobertura suficiente nele
+        s = slice(obs[0], obs[-1] + 1)
+        cand = np.flatnonzero(~np.isnan(dist))
+        d = np.full(len(paises), np.nan)
+        if len(cand):
+            d[cand] = dtw_banda(_preencher(Y[cand, s]), _preencher(q[None, s])[0], banda)
+        dist = d
+    dist[i] = np.nan
+
+    ordem = np.argsort(np.where(np.isnan(dist), np.inf, dist))[:k]
+    ordem = ordem[~np.isnan(dist[ordem])]
+    return pd.DataFrame({"country_name": paises[ordem], "distancia": dist[ordem], "anos_comuns": n[ordem]})
+
+
+# ==========================
+# AGRUPAMENTO
+# ==========================
+def features_agrupamento(df: pd.DataFrame, variavel: str, year_range=None, min_cobertura: float = 0.6,
+                         padronizar: bool = True):
+    """
+    Matriz país × ano pronta para agrupar: anos em que pelo menos metade dos
+    países tem dado, países com `min_cobertura` desses anos, lacunas
+    interpoladas e, se `padronizar`, cada série em z-score (forma, não nível).
+    """
+    paises, anos, Y = matriz_trajetorias(df, variavel, year_range)
+    obs = ~np.isnan(Y)
+    obs_paises = obs.any(1)
+    anos_ok = obs[obs_paises].mean(0) >= 0.5 if obs_paises.any() else np.zeros(len(anos), dtype=bool)
+    anos, Y, obs = anos[anos_ok], Y[:, anos_ok], obs[:, anos_ok]
+    fica = obs.mean(1) >= min_cobertura if len(anos) else np.zeros(len(paises), dtype=bool)
+    if fica.sum() < 2:
+        raise ValueError(f"Menos de 2 países com {variavel} em anos suficientes do período.")
+    paises, X = paises[fica], _preencher(Y[fica])
+    if padronizar:
+        dp = X.std(1, keepdims=True)
+        X = (X - X.mean(1, keepdims=True)) / np.where(dp > 1e-12, dp, 1.0)
+    return paises, anos, X
+
+
+def _dist2(X, C):
+    """Distâncias euclidianas ao quadrado entre as linhas de X e de C."""
+    return np.maximum((X * X).sum(1)[:, None] - 2 * X @ C.T + (C * C).sum(1)[None, :], 0.0)
+
+
+def kmeans(X: np.ndarray, k: int, n_init: int = 8, iters: int = 100, seed: int = 2024) -> np.ndarray:
+    """k-means (Lloyd) com inicialização k-means++; devolve os rótulos da melhor de n_init rodadas."""
+    rng = np.random.default_rng(seed)
+    n = len(X)
+    melhor, melhor_inercia = None, np.inf
+    for _ in range(n_init):
+        C = X[[rng.integers(n)]]
+        for _ in range(1, k):
+            d = _dist2(X, C).min(1)
+            p = d / d.sum() if d.sum() > 0 else np.full(n, 1.0 / n)
+            C = np.vstack([C, X[rng.choice(n, p=p)]])
+        rot = np.full(n, -1)
+        for _ in range(iters):
+            novo = _dist2(X, C).argmin(1)
+            if (novo == rot).all():
+                break
+            rot = novo
+            cont = np.bincount(rot, minlength=k)
+            soma = np.zeros_like(C)
+            np.add.at(soma, rot, X)
+            C = np.where(cont[:, None] > 0, soma / np.maximum(cont, 1)[:, None], C)
+            vazios = np.flatnonzero(cont == 0)
+            if len(vazios):
+                # grupo vazio recomeça nos pontos mais longe do próprio centro
+                longe = _dist2(X, C)[np.arange(n), rot]
+                C[vazios] = X[np.argsort(-longe, kind="stable")[:len(vazios)]]
+        inercia = _dist2(X, C)[np.arange(n), rot].sum()
+        if inercia < melhor_inercia:
+            melhor, melhor_inercia = rot, inercia
+    return melhor
+
+
+def hierarquico(X: np.ndarray, k: int) -> np.ndarray:
+    """Agrupamento aglomerativo de Ward (atualização de Lance-Williams), cortado em k grupos."""
+    n = len(X)
+    D = _dist2(X, X)
+    np.fill_diagonal(D, np.inf)
+    rot = np.arange(n)
+    tam = np.ones(n)
+    for _ in range(n - k):
+        i, j = divmod(int(np.argmin(D)), n)
+        i, j = min(i, j), max(i, j)
+        t = tam[i] + tam[j] + tam
+        novo = ((tam[i] + tam) * D[i] + (tam[j] + tam) * D[j] - tam * D[i, j]) / t
+        D[i, :] = novo
+        D[:, i] = novo
+        D[i, i] = np.inf
+        D[j, :] = np.inf
+        D[:, j] = np.inf
+        rot[rot == j] = i
+        tam[i] += tam[j]
+    return np.unique(rot, return_inverse=True)[1]
+
+
+def agrupar(X: np.ndarray, k: int, metodo: str = "kmeans", seed: int = 2024) -> dict:
+    """
+    {"rotulos", "medoides"}: rótulos 0..k−1 ordenados pela média do medoide
+    (grupo 0 = trajetórias mais baixas) e o índice do medoide de cada grupo.
+    k fica limitado ao número de trajetórias distintas (pode sair menor que o pedido).
+    """
+    if metodo not in AGRUPAMENTOS:
+        raise ValueError(f"método desconhecido: {metodo}")
+    k = int(min(k, len(np.unique(X, axis=0))))
+    rot = kmeans(X, k, seed=seed) if metodo == "kmeans" else hierarquico(X, k)
+    _, rot = np.unique(rot, return_inverse=True)  # rótulos contíguos mesmo se algum grupo ficar vazio
+    k = int(rot.max()) + 1
+    D = np.sqrt(_dist2(X, X))
+    medoides = np.empty(k, dtype=int)
+    for g in range(k):
+        membros = np.flatnonzero(rot == g)
+        medoides[g] = membros[D[np.ix_(membros, membros)].sum(1).argmin()]
+    ordem = np.argsort(X[medoides].mean(1))
+    novo = np.empty(k, dtype=int)
+    novo[ordem] = np.arange(k)
+    return {"rotulos": novo[rot], "medoides": medoides[ordem]}